@@ -1,7 +1,5 @@
-from app.agent.tools.web_search import get_web_search_tool
-
-def get_tools():
-    return [
-        get_web_search_tool(),
-        # add more tools later (maps, OBD decoder, etc.)
-    ]
+def get_tools(latitude=None, longitude=None):
+    # imported here: the tools pull in langchain_core + tavily, which
+    # must not load just because a submodule of app.agent was imported
+    from app.agent.tools import get_tools as _get_tools
+    return _get_tools(latitude, longitude)
@@ -0,0 +1,221 @@
+# Degraded mode: rule-based answers while the LLM can't be used.
+#
+# Every failed LLM call used to end in the same generic "Let's continue step
+# by step" reply. The rule engine answers from SYMPTOM_GUARDS and the OBD
+# table instead: trouble codes in the message are decoded, and the guard
+# whose keywords match best supplies the diagnosis, explanation, follow-up
+# questions and confidence. All guard keywords are compiled into one regex
+# at import, so an answer takes microseconds and needs no I/O.
+#
+# It is used when
+#   - the LLM call of a turn fails,
+#   - the LLM circuit is open: LLM_BREAKER_FAILURES failures in a row, or
+#     one rate-limit / quota error, keep the LLM out for
+#     LLM_BREAKER_COOLDOWN_S (or the provider's Retry-After, if longer).
+#     After that one probe call is let through; success closes the circuit,
+#   - admission sheds a chat turn (DEGRADED_ON_SHED), so a busy server
+#     answers from the rules instead of returning 429; at most
+#     DEGRADED_MAX_CONCURRENT such turns run at once, the rest still get 429.
+# Degraded turns are saved but never folded into the chat summary.
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agent.tools.dtc_lookup import decode_dtcs
+from app.agent.vehicle_symptom import SYMPTOM_GUARDS
+from app.config import LLM_BREAKER_COOLDOWN_S, LLM_BREAKER_FAILURES
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# guards that should not wait for more questions
+WORKSHOP_GUARDS = frozenset({"brake_issue", "smell_smoke"})
+GUARD_SEVERITY = {"brake_issue": 0.8, "smell_smoke": 0.7, "gear_issue": 0.6, "starting_issue": 0.6}
+
+LIMITED_MODE_NOTE = (
+    " (Our assistant is running in limited mode right now, so this is a first "
+    "assessment based on common symptom patterns.)"
+)
+
+GENERIC_FOLLOW_UP_QUESTIONS = [
+    "Can you describe the issue in your own words?",
+    "When did you first notice this?",
+    "Does it happen all the time or only in certain situations?",
+]
+
+# no code or symptom recognised: the reply every failed turn used to get
+FALLBACK = {
+    "diagnosis": "Vehicle issue detected",
+    "explanation": "Thanks for the update. Let’s continue step by step.",
+    "severity": 0.6,
+    "action": "ASK",
+    "questions": GENERIC_FOLLOW_UP_QUESTIONS,
+    "confidence": 0.6,
+}
+
+
+def diagnose_codes(decoded: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answer for trouble codes that are all in the OBD table (decode_dtcs
+    output with no unknown codes).
+    """
+    diy = all(info["diy_possible"] and not info["multi_cause"] for info in decoded.values())
+    return {
+        "diagnosis": "; ".join(info["description"] for info in decoded.values()),
+        "explanation": (
+            "Decoded from the trouble codes. "
+            + ("Usually a DIY fix." if diy else "Several causes are possible; have a workshop confirm.")
+        ),
+        "severity": 0.4 if diy else 0.6,
+        "action": "DIY" if diy else "CONFIRM_WORKSHOP",
+        "confidence": 0.8 if diy else 0.6,
+    }
+
+
+class RuleEngine:
+    def __init__(self, guards: Dict[str, Dict[str, Any]]) -> None:
+        self.guards = guards
+        # keyword -> guards listing it ("grinding" is both a noise and a gear symptom)
+        self._owners: Dict[str, List[str]] = {}
+        for name, guard in guards.items():
+            for keyword in guard["keywords"]:
+                self._owners.setdefault(keyword.lower(), []).append(name)
+        # longest first, so "brake noise" wins over "brake"
+        alternatives = sorted(self._owners, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(re.escape(k) for k in alternatives) + r")(?!\w)"
+        )
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Name of the best matching guard, or None. A keyword scores its word
+        count; ties go to the guard with the higher confidence.
+        """
+        scores: Dict[str, int] = {}
+        for found in self._pattern.finditer(text.lower().replace("’", "'")):
+            keyword = found.group(0)
+            for name in self._owners[keyword]:
+                scores[name] = scores.get(name, 0) + len(keyword.split())
+        if not scores:
+            return None
+        return max(scores, key=lambda name: (scores[name], self.guards[name]["confidence"]))
+
+    def diagnose(self, text: str, context: str = "") -> Tuple[Dict[str, Any], str]:
+        """
+        Chat-shaped answer for `text` and what it came from ("codes",
+        "guard:<name>" or "none"). `context` (earlier turns) is matched only
+        when the message itself names no symptom, e.g. a bare "yes".
+        """
+        decoded = decode_dtcs([text])
+        known = {code: info for code, info in decoded.items() if "system" in info}
+        guard = self.match(text) or (self.match(context) if context and not known else None)
+
+        if known:
+            answer, source = diagnose_codes(known), "codes"
+            questions = self.guards[guard]["questions"] if guard else FALLBACK["questions"]
+        elif guard:
+            g = self.guards[guard]
+            answer = {
+                "diagnosis": g["diagnosis"],
+                "explanation": g["explanation"],
+                "severity": GUARD_SEVERITY.get(guard, 0.5),
+                "action": "CONFIRM_WORKSHOP" if guard in WORKSHOP_GUARDS else "ASK",
+                "confidence": g["confidence"],
+            }
+            questions, source = g["questions"], f"guard:{guard}"
+        else:
+            answer = {k: v for k, v in FALLBACK.items() if k != "questions"}
+            questions, source = FALLBACK["questions"], "none"
+
+        answer.update(
+            steps=[],
+            follow_up_questions=list(questions),
+            youtube_urls=[],
+        )
+        return answer, source
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures (or one rate-limit
+    error) -> half open after the cooldown, letting one probe through ->
+    closed on its success, open again on its failure. Thread-safe: agent
+    turns run in the threadpool.
+    """
+
+    def __init__(self, name: str, failures: int, cooldown_s: float) -> None:
+        self.name = name
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self._consecutive = 0
+        self._open_until = 0.0
+        self._probe_started = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("%s circuit %s -> %s", self.name, self.state, state)
+            metrics.counter(
+                "circuit_transitions_total", "Circuit breaker state changes",
+                {"circuit": self.name, "state": state},
+            ).inc()
+            self.state = state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go out now. A True in half-open state makes the
+        caller the probe; it must report the result.
+        """
+        if self.failures <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now >= self._open_until:
+                self._set("half_open")
+            # a probe that never reported back (its turn died first) is replaced
+            if self.state == "half_open" and (not self._probing or now - self._probe_started > self.cooldown_s):
+                self._probing = True
+                self._probe_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._probing = False
+            self._set("closed")
+
+    def record_failure(self, exc: Optional[BaseException] = None) -> None:
+        retry_after = _retry_after(exc) if exc is not None else None
+        with self._lock:
+            self._consecutive += 1
+            self._probing = False
+            if retry_after is not None or self.state == "half_open" or self._consecutive >= self.failures:
+                self._open_until = time.monotonic() + max(self.cooldown_s, retry_after or 0.0)
+                self._set("open")
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """
+    Seconds to stay away for a rate-limit / quota error, 0 if the error
+    gives none; None for any other error.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429 and type(exc).__name__ != "RateLimitError":
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+rule_engine = RuleEngine(SYMPTOM_GUARDS)
+llm_circuit = CircuitBreaker("llm", LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_S)
@@ -0,0 +1,40 @@
+import json
+from typing import Any, Dict, List
+
+
+def build_fleet_prompt(cases: List[Dict[str, Any]]):
+    """
+    One prompt for several independent vehicle cases. Each case is
+    {"case": int, "symptoms": str, "dtcs": {code: description}}.
+    """
+    from langchain_core.messages import SystemMessage, HumanMessage  # type: ignore
+
+    return [
+        SystemMessage(
+            content=(
+                "You are a professional vehicle diagnostician triaging a fleet.\n\n"
+                "You get a JSON list of independent cases. Each has reported symptoms "
+                "and the decoded trouble codes (may be empty). Diagnose every case on "
+                "its own; never mix information between cases.\n\n"
+
+                "Respond with STRICT JSON ONLY: a JSON array with one object per case, "
+                "no markdown, no extra text.\n\n"
+
+                "Object format:\n"
+                "{\n"
+                "  \"case\": <the case number you were given>,\n"
+                "  \"diagnosis\": \"short most likely cause\",\n"
+                "  \"explanation\": \"one or two sentences for the fleet manager\",\n"
+                "  \"severity\": 0.0-1.0,\n"
+                "  \"action\": \"DIY|CONFIRM_WORKSHOP|ESCALATE|ASK\",\n"
+                "  \"confidence\": 0.0-1.0\n"
+                "}\n\n"
+
+                "Rules:\n"
+                "- Use ASK with low confidence when the case has too little information\n"
+                "- ESCALATE anything unsafe to drive (brakes, steering, overheating, fuel smell)\n"
+                "- Do NOT invent symptoms or codes that are not in the case\n"
+            )
+        ),
+        HumanMessage(content=json.dumps(cases, ensure_ascii=False)),
+    ]
@@ -1,7 +1,6 @@
-from langchain_core.messages import SystemMessage, HumanMessage  # type: ignore
-
-
 def build_issue_prompt(chat_summary: str):
+    from langchain_core.messages import SystemMessage, HumanMessage  # type: ignore
+
     return [
         SystemMessage(
             content=(
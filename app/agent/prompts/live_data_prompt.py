@@ -0,0 +1,50 @@
+from typing import List, Optional
+
+from app.data import OBD_CODES
+from app.telemetry.live_state import live_state
+
+
+# Rough chars-per-token ratio, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def build_live_data_block(vehicle_id: Optional[str], max_tokens: int = 150) -> str:
+    """
+    Compact "Live data" context for the agent.
+    Lines are added in priority order (codes, alerts, readings)
+    until the token budget is used up. Empty if no fresh data.
+    """
+    state = live_state.get(vehicle_id)
+    if state is None:
+        return ""
+
+    lines: List[str] = []
+
+    for code in sorted(state.dtcs):
+        info = OBD_CODES.get(code)
+        desc = info["description"] if info else "unknown code"
+        lines.append(f"- DTC {code}: {desc}")
+
+    for event in reversed(state.anomalies):
+        lines.append(
+            f"- {event['state'].lower()} alert {event['rule']}: "
+            f"{event['field']}={event['value']:g} (peak {event['peak']:g})"
+        )
+
+    if state.readings:
+        lines.append(
+            "- readings: "
+            + ", ".join(
+                f"{k}={v:g}" if isinstance(v, (int, float)) else f"{k}={v}"
+                for k, v in state.readings.items()
+            )
+        )
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    block = "Live data:"
+    for line in lines:
+        if len(block) + len(line) + 1 > budget:
+            break
+        block += "\n" + line
+
+    return block if block != "Live data:" else ""
@@ -1,7 +1,6 @@
-from langchain_core.messages import SystemMessage, HumanMessage  # type: ignore
-
-
 def build_summary_prompt(previous_summary: str, new_turn: str):
+    from langchain_core.messages import SystemMessage, HumanMessage  # type: ignore
+
     return [
         SystemMessage(
             content=(
@@ -0,0 +1,289 @@
+# Similar resolved cases for the reply prompt.
+#
+# issues_summary holds every issue the agent has diagnosed, and the resolved
+# ones are solved cases: the same symptoms on another car usually had the
+# same cause. An issue is resolved with its fix through
+# POST /chat/{chat_id}/issue/resolve; duplicates the dedupe job resolved
+# into another issue (merged_into) are not cases and are never listed. Each resolved issue (title + summary) is embedded with a
+# hashing vectorizer (stemmed words and word pairs hashed into DIM signed
+# buckets, no vocabulary to fit or ship) and kept in an in-process index.
+# Queries are weighted by IDF over the indexed cases, so "engine" or "noise"
+# count less than "misfire" or "coolant".
+#
+# The index scans every vector until IVF_MIN_VECTORS cases, then switches to
+# an inverted-file index: spherical k-means centroids, and a query only scans
+# the RETRIEVAL_NPROBE closest lists. New cases are added to their closest
+# list; the centroids are retrained each time the index doubles.
+#
+# The index is filled on first use (or in the start-up warm-up) by paging
+# resolved issues in (resolved_at, id) order, and catches up on newly
+# resolved ones at most every RETRIEVAL_REFRESH_S.
+
+import logging
+import math
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from app.config import RETRIEVAL_MIN_SCORE, RETRIEVAL_NPROBE, RETRIEVAL_REFRESH_S
+from app.db.issue_index import canonical_issue_key
+from app.services.chat_search import tokenize
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+DIM = 1024
+TITLE_WEIGHT = 2.0
+IVF_MIN_VECTORS = 4096  # below this an exact scan is as fast as probing
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 20000
+PAGE_SIZE = 1000
+
+
+def _hashed(text: str, weight: float, out: Counter) -> None:
+    tokens = tokenize(text)
+    for token in tokens:
+        out[token] += weight
+    for a, b in zip(tokens, tokens[1:]):
+        out[f"{a} {b}"] += weight
+
+
+def _vector(features: Counter) -> np.ndarray:
+    buckets, weights = [], []
+    for feature, tf in features.items():
+        # crc32, not hash(): buckets must not change between processes
+        h = zlib.crc32(feature.encode())
+        buckets.append(h & (DIM - 1))
+        weights.append((-1.0 if h & 0x80000000 else 1.0) * (1 + math.log(tf)))
+    return np.bincount(buckets, weights, minlength=DIM).astype(np.float32)
+
+
+def _normalized(vec: np.ndarray) -> Optional[np.ndarray]:
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else None
+
+
+def embed_case(title: str, summary: str) -> Optional[np.ndarray]:
+    features: Counter = Counter()
+    _hashed(title, TITLE_WEIGHT, features)
+    _hashed(summary, 1.0, features)
+    return _normalized(_vector(features))
+
+
+class VectorIndex:
+    """
+    Cosine top-k over unit vectors: exact scan, then IVF once large enough.
+    """
+
+    def __init__(self, dim: int = DIM, nprobe: int = RETRIEVAL_NPROBE) -> None:
+        self.dim = dim
+        self.nprobe = nprobe
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._n = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_at = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def add(self, vec: np.ndarray) -> int:
+        if self._n == len(self._vectors):
+            grown = np.zeros((2 * len(self._vectors), self.dim), dtype=np.float32)
+            grown[: self._n] = self._vectors[: self._n]
+            self._vectors = grown
+
+        position = self._n
+        self._vectors[position] = vec
+        self._n += 1
+
+        if self._n >= max(IVF_MIN_VECTORS, 2 * self._trained_at):
+            self._train()
+        elif self._centroids is not None:
+            cell = int(np.argmax(self._centroids @ vec))
+            self._lists[cell].append(position)
+            self._list_arrays.pop(cell, None)
+        return position
+
+    def _train(self) -> None:
+        vectors = self._vectors[: self._n]
+        nlist = max(1, int(math.sqrt(self._n)))
+        rng = np.random.default_rng(0)
+
+        sample = vectors
+        if self._n > KMEANS_SAMPLE:
+            sample = vectors[rng.choice(self._n, KMEANS_SAMPLE, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            members = np.zeros((nlist, len(sample)), dtype=np.float32)
+            members[assign, np.arange(len(sample))] = 1
+            sums = members @ sample
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # an empty cell keeps its old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.cumsum(np.bincount(assign, minlength=nlist))[:-1]
+        self._lists = [cell.tolist() for cell in np.split(order, bounds)]
+        self._list_arrays = {}
+        self._centroids = centroids
+        self._trained_at = self._n
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        assert self._centroids is not None
+        nprobe = min(self.nprobe, len(self._lists))
+        cells = np.argpartition(self._centroids @ query, -nprobe)[-nprobe:]
+        arrays = []
+        for cell in cells.tolist():
+            array = self._list_arrays.get(cell)
+            if array is None:
+                array = self._list_arrays[cell] = np.asarray(self._lists[cell], dtype=np.int64)
+            arrays.append(array)
+        return np.concatenate(arrays)
+
+    def search(self, query: np.ndarray, k: int, exact: bool = False) -> List[Tuple[int, float]]:
+        """
+        (position, cosine) of the k closest vectors, closest first.
+        """
+        if not self._n or k <= 0:
+            return []
+
+        if self._centroids is None or exact:
+            positions = None
+            scores = self._vectors[: self._n] @ query
+        else:
+            positions = self._candidates(query)
+            scores = self._vectors[positions] @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        found = positions[top] if positions is not None else top
+        return list(zip(found.tolist(), scores[top].tolist()))
+
+
+class CaseIndex:
+    """
+    Resolved issues of all vehicles, searchable by symptom text.
+    """
+
+    def __init__(self, refresh_s: float = RETRIEVAL_REFRESH_S, nprobe: int = RETRIEVAL_NPROBE) -> None:
+        self.refresh_s = refresh_s
+        self.vectors = VectorIndex(nprobe=nprobe)
+        self.cases: List[Dict[str, Any]] = []
+        self._df = np.zeros(DIM, dtype=np.float32)  # cases per bucket, for IDF
+        self._after: Optional[Tuple[str, Any]] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        title, summary = row.get("title") or "", row.get("summary") or ""
+        vec = embed_case(title, summary)
+        if vec is None:
+            return
+        with self._lock:
+            self.vectors.add(vec)
+            self._df[vec != 0] += 1
+            self.cases.append({
+                "id": row.get("id"),
+                "vehicle_id": row.get("vehicle_id"),
+                "title": title,
+                "summary": summary,
+                "severity": row.get("severity"),
+                "key": canonical_issue_key(title),
+            })
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Index issues resolved since the last refresh, if one is due.
+        Returns how many were added. Only one thread refreshes at a time;
+        the others search what is already indexed.
+        """
+        due = (
+            force
+            or self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_s
+        )
+        if not due:
+            return 0
+
+        # the first fill blocks: without it there is nothing to search
+        if not self._refresh_lock.acquire(blocking=self._refreshed_at is None):
+            return 0
+        try:
+            if not force and self._refreshed_at is not None \
+                    and time.monotonic() - self._refreshed_at < self.refresh_s:
+                return 0
+
+            storage = get_storage()
+            added = 0
+            while True:
+                rows = storage.list_resolved_issues(self._after, PAGE_SIZE)
+                for row in rows:
+                    self.add(row)
+                    self._after = (row["resolved_at"], row["id"])
+                added += len(rows)
+                if len(rows) < PAGE_SIZE:
+                    break
+
+            self._refreshed_at = time.monotonic()
+            if added:
+                logger.info("Indexed %d resolved issues (%d total)", added, len(self.cases))
+            return added
+        finally:
+            self._refresh_lock.release()
+
+    def _query_vector(self, text: str) -> Optional[np.ndarray]:
+        features: Counter = Counter()
+        _hashed(text, 1.0, features)
+        vec = _vector(features)
+        n = len(self.cases)
+        vec *= np.log((1 + n) / (1 + self._df)) + 1
+        return _normalized(vec)
+
+    def similar(
+        self,
+        text: str,
+        k: int,
+        min_score: float = RETRIEVAL_MIN_SCORE,
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to k resolved cases closest to `text`, one per issue title,
+        best first. Cheap when no refresh is due; call from a thread.
+        """
+        if k <= 0:
+            return []
+        self.refresh()
+
+        with self._lock:
+            query = self._query_vector(text)
+            if query is None:
+                return []
+            # over-fetch: the same issue is often resolved on many vehicles
+            hits = self.vectors.search(query, 4 * k)
+
+            out, seen = [], set()
+            for position, score in hits:
+                case = self.cases[position]
+                if score < min_score or case["key"] in seen:
+                    continue
+                seen.add(case["key"])
+                out.append({**case, "score": round(score, 3)})
+                if len(out) == k:
+                    break
+            return out
+
+
+case_index = CaseIndex()
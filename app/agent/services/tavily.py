@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Any
+
+from app.cache.search_cache import get_search_cache
+from app.clients import clients
+from app.config import TAVILY_API_KEY
+
+# search() arguments that change how the call is made, not what it returns
+_TRANSPORT_PARAMS = ("timeout",)
+
+
+class CachedTavilyClient:
+    """
+    TavilyClient whose search() goes through the search cache
+    (app/cache/search_cache.py); everything else is passed through.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    def search(self, query: str, **params: Any) -> dict:
+        key_params = {k: v for k, v in params.items() if k not in _TRANSPORT_PARAMS}
+        return get_search_cache().get_or_fetch(
+            "tavily.search",
+            {"query": query, **key_params},
+            lambda: self._client.search(query=query, **params),
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+@lru_cache(maxsize=1)
+def get_tavily() -> CachedTavilyClient:
+    from tavily import TavilyClient # type: ignore
+
+    clients.on_close(get_tavily.cache_clear)
+    return CachedTavilyClient(
+        TavilyClient(api_key=TAVILY_API_KEY, session=clients.tavily_session)
+    )
@@ -1,15 +1,14 @@
-import requests
 from typing import List
 
-from langchain_core.tools import Tool # type: ignore
-from tavily import TavilyClient # type: ignore
-
-from app.config import GOOGLE_MAPS_KEY, TAVILY_API_KEY
+from app.agent.services.tavily import get_tavily
+from app.clients import clients
+from app.config import GOOGLE_MAPS_KEY
 
 
 PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 
-tavily = TavilyClient(api_key=TAVILY_API_KEY)
+# ~110 m: nearby lookups from the same spot share one cached web search
+WEB_SEARCH_COORD_DECIMALS = 3
 
 
 # -------------------------------------------------
@@ -34,10 +33,11 @@ def extract_maps_place_links_from_web(lat: float, lng: float) -> List[str]:
     try:
         query = (
             f"car workshop garage service center near "
-            f"{lat},{lng} site:google.com/maps"
+            f"{lat:.{WEB_SEARCH_COORD_DECIMALS}f},{lng:.{WEB_SEARCH_COORD_DECIMALS}f} "
+            f"site:google.com/maps"
         )
 
-        res = tavily.search(query=query, max_results=10)
+        res = get_tavily().search(query=query, max_results=10)
 
         links: List[str] = []
         for r in res.get("results", []):
@@ -89,7 +89,7 @@ def _find_nearby_workshops(input: dict) -> dict:
     }
 
     try:
-        res = requests.get(PLACES_URL, params=params, timeout=10)
+        res = clients.sync_http.get(PLACES_URL, params=params, timeout=10)
         res.raise_for_status()
         data = res.json()
         # print("GOOGLE_MAPS_KEY LOADED:", bool(GOOGLE_MAPS_KEY))
@@ -123,6 +123,8 @@ def _find_nearby_workshops(input: dict) -> dict:
 # -------------------------------------------------
 
 def get_workshop_tool():
+    from langchain_core.tools import Tool # type: ignore
+
     return Tool(
         name="find_nearby_workshops",
         func=_find_nearby_workshops,
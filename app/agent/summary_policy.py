@@ -0,0 +1,103 @@
+# When to re-summarise a chat.
+#
+# Regenerating the running summary costs an LLM call whose prompt grows with
+# the summary. Most turns (another ASK round on the same diagnosis) add little
+# to it. So a turn normally appends one structured line to a "Recent updates:"
+# section of the stored summary, with no LLM call. The LLM folds those lines
+# back into the summary only when:
+#   - the chat has no summary yet,
+#   - the diagnosis or the action changed,
+#   - SUMMARY_EVERY_N_TURNS updates are pending, or
+#   - the pending updates pass SUMMARY_DELTA_TOKEN_LIMIT (estimated).
+# The pending updates live in the stored summary itself, so every worker
+# sees the same state.
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import SUMMARY_DELTA_TOKEN_LIMIT, SUMMARY_EVERY_N_TURNS
+
+DELTA_HEADER = "Recent updates:"
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token), good enough for thresholds.
+    """
+    return (len(text) + 3) // 4
+
+
+def split_summary(summary: str) -> Tuple[str, List[str]]:
+    """
+    Stored summary -> (LLM-written part, pending update lines).
+    """
+    base, sep, tail = summary.partition(f"\n\n{DELTA_HEADER}\n")
+    if not sep and summary.startswith(f"{DELTA_HEADER}\n"):
+        base, tail = "", summary[len(DELTA_HEADER) + 1:]
+    return base.strip(), [line for line in tail.splitlines() if line.strip()]
+
+
+def join_summary(base: str, deltas: List[str]) -> str:
+    if not deltas:
+        return base
+    block = f"{DELTA_HEADER}\n" + "\n".join(deltas)
+    return f"{base}\n\n{block}" if base else block
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def delta_line(user_input: str, response: Dict[str, Any]) -> str:
+    return (
+        f"- User: {_shorten(user_input, 160)} -> "
+        f"diagnosis: {_shorten(response.get('diagnosis', ''), 80)}; "
+        f"action: {response.get('action')}; "
+        f"severity: {response.get('severity')}"
+    )
+
+
+def diagnosis_changed(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> bool:
+    """
+    True on the first answer, a new action, or a diagnosis that shares less
+    than half its words with the previous one (the LLM rewords the same
+    diagnosis from turn to turn).
+    """
+    if not isinstance(previous, dict):
+        return True
+    if previous.get("action") != current.get("action"):
+        return True
+
+    before = set(_WORD.findall(str(previous.get("diagnosis", "")).lower()))
+    after = set(_WORD.findall(str(current.get("diagnosis", "")).lower()))
+    if not before or not after:
+        return before != after
+    return len(before & after) / len(before | after) < 0.5
+
+
+class SummaryPolicy:
+    def __init__(self, every_n_turns: int, delta_token_limit: int) -> None:
+        self.every_n_turns = every_n_turns
+        self.delta_token_limit = delta_token_limit
+
+    def resummarize_reason(self, base: str, deltas: List[str], changed: bool) -> Optional[str]:
+        """
+        Why the LLM should rewrite the summary now, or None to just append.
+        """
+        if not base:
+            return "first"
+        if changed:
+            return "diagnosis_changed"
+        if len(deltas) >= self.every_n_turns:
+            return "turns"
+        if estimate_tokens("\n".join(deltas)) >= self.delta_token_limit:
+            return "tokens"
+        return None
+
+
+summary_policy = SummaryPolicy(
+    every_n_turns=SUMMARY_EVERY_N_TURNS,
+    delta_token_limit=SUMMARY_DELTA_TOKEN_LIMIT,
+)
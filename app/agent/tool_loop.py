@@ -0,0 +1,146 @@
+# Tool calls inside a chat turn.
+#
+# With AGENT_TOOLS_ENABLED the reply model is bound to the tools from
+# app/agent/tools (web search, DTC decode, nearby workshops) and may ask for
+# them before it answers. The calls requested in one model step are
+# independent, so they run concurrently on a shared pool. The turn gets
+# AGENT_TOOL_DEADLINE_S for all of its tool work and at most
+# AGENT_MAX_TOOL_STEPS model steps that may call tools; a call still running
+# at the deadline is reported to the model as timed out. Results are cached
+# for the turn, so a call the model repeats in a later step is not made
+# again. When the steps or the time run out, one last step with
+# tool_choice="none" makes the model answer with what it has.
+
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import AGENT_MAX_TOOL_STEPS, AGENT_TOOL_DEADLINE_S, AGENT_TOOL_WORKERS
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# tool output is clipped before it goes back into the prompt
+MAX_RESULT_CHARS = 4000
+
+TOOL_INSTRUCTIONS = """
+TOOLS:
+- You may call tools before answering: lookup_dtc for trouble codes the user
+  mentions, the web search for model-specific known issues or recalls, and
+  find_nearby_workshops when professional help is needed (if available).
+- Request all the tools you need in one step; they run in parallel.
+- Do not call a tool for general knowledge you already have.
+- The final answer is still the JSON object described above, nothing else.
+"""
+
+_pool = ThreadPoolExecutor(AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool")
+
+
+def _result_text(value: Any) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text[:MAX_RESULT_CHARS]
+
+
+def _count(tool: str, result: str) -> None:
+    metrics.counter(
+        "agent_tool_calls_total", "Tool calls requested by the chat agent",
+        {"tool": tool, "result": result},
+    ).inc()
+
+
+class TurnTools:
+    """
+    Runs one turn's tool calls: in parallel per step, under the turn's
+    deadline, with the results of earlier steps reused.
+    """
+
+    def __init__(self, tools: Sequence[Any], deadline: float, pool: Optional[ThreadPoolExecutor] = None) -> None:
+        self.tools = {tool.name: tool for tool in tools}
+        self.deadline = deadline
+        self.pool = pool or _pool
+        self.cache: Dict[Tuple[str, str], str] = {}
+
+    def run(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """
+        ToolMessages answering `calls`, in the same order.
+        """
+        from langchain_core.messages import ToolMessage  # type: ignore
+
+        texts: Dict[str, str] = {}
+        pending: Dict[str, Tuple[str, Tuple[str, str], Future]] = {}
+        started: Dict[Tuple[str, str], Future] = {}
+
+        for call in calls:
+            name, args = call["name"], call.get("args") or {}
+            key = (name, json.dumps(args, sort_keys=True, default=str))
+
+            if key in self.cache:
+                texts[call["id"]] = self.cache[key]
+                _count(name, "cached")
+                continue
+
+            tool = self.tools.get(name)
+            if tool is None:
+                texts[call["id"]] = f"Unknown tool {name!r}."
+                _count(name, "unknown")
+                continue
+
+            # the same call twice in one step runs once
+            future = started.get(key)
+            if future is None:
+                future = started[key] = self.pool.submit(tool.invoke, args)
+            pending[call["id"]] = (name, key, future)
+
+        done, _ = wait(started.values(), timeout=max(0.0, self.deadline - time.monotonic()))
+
+        for call_id, (name, key, future) in pending.items():
+            if future not in done:
+                future.cancel()
+                texts[call_id] = "Tool timed out; answer without it."
+                _count(name, "timeout")
+            elif future.exception() is not None:
+                logger.warning("Tool %s failed: %r", name, future.exception())
+                texts[call_id] = "Tool failed; answer without it."
+                _count(name, "error")
+            else:
+                texts[call_id] = self.cache[key] = _result_text(future.result())
+                _count(name, "ok")
+
+        return [ToolMessage(content=texts[call["id"]], tool_call_id=call["id"]) for call in calls]
+
+
+def run_with_tools(
+    llm: Any,
+    messages: List[Any],
+    tools: Sequence[Any],
+    max_steps: int = AGENT_MAX_TOOL_STEPS,
+    deadline_s: float = AGENT_TOOL_DEADLINE_S,
+) -> str:
+    """
+    Let `llm` call `tools` and return the text of its final answer.
+    `messages` starts with the system prompt; it is not modified.
+    """
+    from langchain_core.messages import SystemMessage  # type: ignore
+
+    deadline = time.monotonic() + deadline_s
+    turn_tools = TurnTools(tools, deadline)
+    messages = [messages[0], SystemMessage(content=TOOL_INSTRUCTIONS), *messages[1:]]
+    with_tools = llm.bind_tools(tools)
+
+    steps = 0
+    try:
+        while steps < max_steps and time.monotonic() < deadline:
+            reply = with_tools.invoke(messages)
+            steps += 1
+            if not reply.tool_calls:
+                return reply.content
+            messages.append(reply)
+            messages.extend(turn_tools.run(reply.tool_calls))
+    finally:
+        metrics.summary(
+            "agent_tool_steps", "Model steps with tools per chat turn"
+        ).observe(steps)
+
+    return llm.bind_tools(tools, tool_choice="none").invoke(messages).content
@@ -1,7 +1,37 @@
-from app.agent.tools.web_search import get_web_search_tool
+from functools import lru_cache
+from typing import Optional
 
 
-def get_tools():
-    return [
+def get_web_search_tool():
+    from app.agent.tools.web_search import get_web_search_tool as _get_web_search_tool
+    return _get_web_search_tool()
+
+
+def get_dtc_lookup_tool():
+    from app.agent.tools.dtc_lookup import get_dtc_lookup_tool as _get_dtc_lookup_tool
+    return _get_dtc_lookup_tool()
+
+
+def get_nearby_workshops_tool(latitude: float, longitude: float):
+    from app.agent.tools.workshops import get_nearby_workshops_tool as _get_tool
+    return _get_tool(latitude, longitude)
+
+
+@lru_cache(maxsize=1)
+def _shared_tools():
+    # schema inference is not free; these do not depend on the turn
+    return (
         get_web_search_tool(),
-    ]
+        get_dtc_lookup_tool(),
+    )
+
+
+def get_tools(latitude: Optional[float] = None, longitude: Optional[float] = None):
+    """
+    Tools the chat agent may call in a turn. The workshop lookup is only
+    offered when the turn carries the user's location.
+    """
+    tools = list(_shared_tools())
+    if latitude is not None and longitude is not None:
+        tools.append(get_nearby_workshops_tool(latitude, longitude))
+    return tools
@@ -0,0 +1,46 @@
+import re
+from typing import Any, Dict, List
+
+from app.data import OBD_CODES
+
+MAX_CODES = 10
+
+_CODE = re.compile(r"\b[PBCU][0-3][0-9A-F]{3}\b")
+
+
+def decode_dtcs(codes: List[str]) -> Dict[str, Any]:
+    """
+    Decode OBD-II trouble codes from the bundled reference table.
+    """
+    found = []
+    for raw in codes:
+        found += _CODE.findall((raw or "").upper())
+
+    decoded: Dict[str, Any] = {}
+    for code in list(dict.fromkeys(found))[:MAX_CODES]:
+        info = OBD_CODES.get(code)
+        decoded[code] = (
+            {
+                "description": info["description"],
+                "system": info.get("system"),
+                "multi_cause": info.get("multi_cause"),
+                "diy_possible": info.get("diy_possible"),
+            }
+            if info
+            else {"description": "unknown code (not in the reference table)"}
+        )
+    return decoded
+
+
+def get_dtc_lookup_tool():
+    from langchain_core.tools import StructuredTool  # type: ignore
+
+    return StructuredTool.from_function(
+        func=decode_dtcs,
+        name="lookup_dtc",
+        description=(
+            "Decode OBD-II diagnostic trouble codes such as P0301 or U0100: "
+            "description, affected system, whether several causes are common "
+            "and whether a DIY fix is usually possible. Input: list of codes."
+        ),
+    )
@@ -1,9 +1,38 @@
-from langchain_community.tools.tavily_search import TavilySearchResults  # type: ignore
-from app.config import TAVILY_API_KEY
+from typing import Any, Dict, List
 
-def get_web_search_tool():
-    return TavilySearchResults(
-        tavily_api_key=TAVILY_API_KEY,
-        max_results=5,
+from app.config import AGENT_TOOL_DEADLINE_S
+
+WEB_SEARCH_MAX_RESULTS = 5
+
+
+def _web_search(query: str) -> List[Dict[str, Any]]:
+    # same client (and result cache) as the workshop lookup
+    from app.agent.services.tavily import get_tavily
+
+    res = get_tavily().search(
+        query=query,
+        max_results=WEB_SEARCH_MAX_RESULTS,
         search_depth="advanced",
+        # a call past the turn's deadline is not waited for; free the worker
+        timeout=AGENT_TOOL_DEADLINE_S,
+    )
+    return [
+        {"url": r.get("url"), "content": r.get("content")}
+        for r in res.get("results", [])
+    ]
+
+
+def get_web_search_tool():
+    from langchain_core.tools import StructuredTool  # type: ignore
+
+    # name and output shape of langchain_community's TavilySearchResults,
+    # which this replaces: that one opened its own connection and had no cache
+    return StructuredTool.from_function(
+        func=_web_search,
+        name="tavily_search_results_json",
+        description=(
+            "A search engine optimized for comprehensive, accurate, and trusted results. "
+            "Useful for when you need to answer questions about current events. "
+            "Input should be a search query."
+        ),
     )
@@ -0,0 +1,20 @@
+from typing import List
+
+
+def get_nearby_workshops_tool(latitude: float, longitude: float):
+    from langchain_core.tools import StructuredTool  # type: ignore
+
+    from app.agent.services.workshop_giver import _find_nearby_workshops
+
+    # the model never sees coordinates; the tool is bound to this turn's location
+    def find_nearby_workshops() -> List[str]:
+        return _find_nearby_workshops({"latitude": latitude, "longitude": longitude})["maps_urls"]
+
+    return StructuredTool.from_function(
+        func=find_nearby_workshops,
+        name="find_nearby_workshops",
+        description=(
+            "Google Maps links for car workshops near the user. Use only when "
+            "the user needs a mechanic or the issue is not safe to fix themselves."
+        ),
+    )
@@ -1,11 +1,25 @@
 import json
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
 from uuid import UUID, uuid4
 from typing import List, Dict, Any
 
-from langchain_groq import ChatGroq  # type: ignore
-from langchain_core.prompts import ChatPromptTemplate  # type: ignore
-
-from app.config import GROQ_API_KEY
+from app.clients import clients
+from app.config import (
+    AGENT_TOOLS_ENABLED,
+    GROQ_API_KEY,
+    OPEN_ISSUES_IN_PROMPT,
+    RETRIEVAL_TOP_K,
+)
+from app.agent import get_tools
+from app.agent.degraded import (
+    GENERIC_FOLLOW_UP_QUESTIONS,
+    LIMITED_MODE_NOTE,
+    llm_circuit,
+    rule_engine,
+)
+from app.agent.tool_loop import run_with_tools
 from app.agent.prompts.vehicle_prompt import vehicle_prompt
 from app.db.db import (
     load_short_term_memory,
@@ -20,32 +34,32 @@ from app.db.ai_memory import (
     load_open_issues,
     upsert_issue_from_summary,
 )
+from app.db.issue_index import severity_rank
 
 from app.agent.prompts.summary_prompt import build_summary_prompt
 from app.agent.prompts.issue_prompt import build_issue_prompt
+from app.agent.prompts.live_data_prompt import build_live_data_block
+from app.agent.summary_policy import (
+    delta_line,
+    diagnosis_changed,
+    estimate_tokens,
+    join_summary,
+    split_summary,
+    summary_policy,
+)
+from app.metrics import metrics
+
 
+logger = logging.getLogger(__name__)
 
 # Dummy UUID used by Swagger
 SWAGGER_DUMMY_UUID = UUID("3fa85f64-5717-4562-b3fc-2c963f66afa6")
 
-GENERIC_FOLLOW_UP_QUESTIONS = [
-    "Can you describe the issue in your own words?",
-    "When did you first notice this?",
-    "Does it happen all the time or only in certain situations?",
-]
-
 WORKSHOP_PATTERNS = [
     "workshop", "garage", "service center",
     "mechanic", "repair shop", "nearby garage"
 ]
 
-# LLM setup
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="moonshotai/kimi-k2-instruct-0905",
-    temperature=0.2,
-)
-
 SYSTEM_PROMPT = f"""
 {vehicle_prompt}
 
@@ -55,15 +69,35 @@ CRITICAL INSTRUCTION:
 - No extra text
 """
 
-prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", SYSTEM_PROMPT),
-        (
-            "human",
-            "Conversation history:\n{conversation_history}\n\nUser update:\n{user_input}",
-        ),
-    ]
-)
+
+# LLM setup (built on first use: langchain_groq is slow to import)
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_groq import ChatGroq  # type: ignore
+
+    clients.on_close(get_llm.cache_clear)
+    return ChatGroq(
+        api_key=GROQ_API_KEY,
+        model="moonshotai/kimi-k2-instruct-0905",
+        temperature=0.2,
+        http_client=clients.llm_http,
+        http_async_client=clients.llm_async_http,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_prompt():
+    from langchain_core.prompts import ChatPromptTemplate  # type: ignore
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT),
+            (
+                "human",
+                "Conversation history:\n{conversation_history}\n\nUser update:\n{user_input}",
+            ),
+        ]
+    )
 
 
 # -------------------- Helpers --------------------
@@ -139,26 +173,147 @@ def build_workshop_response(chat_id: UUID) -> Dict[str, Any]:
     }
 
 
-# -------------------- Main Agent --------------------
+CASE_SUMMARY_CHARS = 240
 
-def run_vehicle_agent(
+
+def build_similar_cases_block(ctx: "TurnContext", user_input: str) -> str | None:
+    """
+    Resolved issues of other chats that match this turn's symptoms and the
+    current diagnosis. Retrieval problems only cost the block, not the turn.
+    """
+    if RETRIEVAL_TOP_K <= 0:
+        return None
+
+    # numpy; keep it out of app start-up (the warm-up imports it)
+    from app.agent.retrieval import case_index
+
+    last_agent = ctx.history_structured[-1].get("agent") if ctx.history_structured else None
+    diagnosis = last_agent.get("diagnosis", "") if isinstance(last_agent, dict) else ""
+
+    try:
+        cases = case_index.similar(f"{diagnosis}\n{user_input}", RETRIEVAL_TOP_K)
+    except Exception:
+        logger.warning("Similar case lookup failed", exc_info=True)
+        return None
+
+    metrics.summary(
+        "retrieval_cases", "Similar resolved cases in the reply prompt"
+    ).observe(len(cases))
+    if not cases:
+        return None
+
+    lines = []
+    for case in cases:
+        summary = " ".join(case["summary"].split())
+        if len(summary) > CASE_SUMMARY_CHARS:
+            summary = summary[:CASE_SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+        lines.append(f"- {case['title']} (severity: {case['severity']}): {summary}")
+    return (
+        "Similar resolved cases (from other chats; use them to narrow down the cause, "
+        "not as facts about this vehicle):\n" + "\n".join(lines)
+    )
+
+
+# -------------------- Turn phases --------------------
+#
+# A turn is split into phases so the per-chat actor (app/services/chat_actor.py)
+# can run several queued turns of one chat back to back: the context is loaded
+# once, each turn is answered and saved, and the summary / issue update runs
+# once for the whole batch.
+
+HISTORY_LIMIT = 10
+
+
+@dataclass
+class TurnContext:
+    chat_id: UUID
+    vehicle_id: str | None
+    history_text: str
+    history_structured: List[Dict[str, Any]]
+    chat_summary: str
+    chat_issue_summary: str | None
+    open_issues: List[Dict[str, Any]]
+
+
+@dataclass
+class TurnOutcome:
+    response: Dict[str, Any]
+    # "User: ...\nAgent: ..." for the summary; None if nothing to summarise
+    new_turn: str | None = None
+    # one "Recent updates" line, used when the summary is not rewritten
+    delta: str | None = None
+    # diagnosis or action differs from the previous answer
+    changed: bool = False
+    # the turn may open / update an issue
+    issue_candidate: bool = False
+
+
+def load_turn_context(chat_id: UUID, vehicle_id: str | None) -> TurnContext:
+    return TurnContext(
+        chat_id=chat_id,
+        vehicle_id=vehicle_id,
+        history_text=load_short_term_memory(chat_id, limit=HISTORY_LIMIT),
+        history_structured=load_short_term_memory_structured(chat_id, limit=HISTORY_LIMIT),
+        chat_summary=load_chat_summary(str(chat_id)) or "",
+        chat_issue_summary=load_chat_issue_summary(str(chat_id)),
+        open_issues=load_open_issues(vehicle_id),
+    )
+
+
+def _remember_turn(ctx: TurnContext, user_input: str, response: Dict[str, Any]) -> None:
+    """
+    Append a saved turn to the loaded history, the same way
+    load_short_term_memory(_structured) would read it back.
+    """
+    lines = ctx.history_text.split("\n") if ctx.history_text else []
+    lines += [
+        f"User: {user_input}",
+        f"Agent: diagnosis={response.get('diagnosis')}, action={response.get('action')}",
+    ]
+    ctx.history_text = "\n".join(lines[-2 * HISTORY_LIMIT:])
+
+    ctx.history_structured.append({"user": user_input, "agent": json_safe(response)})
+    del ctx.history_structured[:-HISTORY_LIMIT]
+
+
+def answer_degraded(ctx: TurnContext, user_input: str, user_id: str, reason: str) -> TurnOutcome:
+    """
+    Reply from the rule engine (app/agent/degraded.py) and save the turn.
+    The outcome has no new_turn, so finish_turns leaves the summary alone.
+    """
+    response, source = rule_engine.diagnose(user_input, context=ctx.history_text)
+    response["explanation"] += LIMITED_MODE_NOTE
+    response["chat_id"] = ctx.chat_id
+    metrics.counter(
+        "agent_degraded_turns_total", "Chat turns answered by the rule engine",
+        {"reason": reason, "source": source.split(":")[0]},
+    ).inc()
+
+    save_chat_turn(
+        str(ctx.chat_id),
+        user_id,
+        ctx.vehicle_id,
+        user_input,
+        json_safe(response),
+    )
+    _remember_turn(ctx, user_input, response)
+    return TurnOutcome(response)
+
+
+def answer_turn(
+    ctx: TurnContext,
     user_input: str,
-    chat_id: UUID | None,
     user_id: str,
-    vehicle_id: str | None = None,
     latitude: float | None = None,
     longitude: float | None = None,
-) -> Dict[str, Any]:
-
-    if chat_id is None or chat_id == SWAGGER_DUMMY_UUID:
-        chat_id = uuid4()
-
-    history_text = load_short_term_memory(chat_id, limit=10)
-    history_structured = load_short_term_memory_structured(chat_id, limit=10)
-
-    chat_summary = load_chat_summary(str(chat_id)) or ""
-    chat_issue_summary = load_chat_issue_summary(str(chat_id))
-    open_issues = load_open_issues(vehicle_id)
+    degraded: bool = False,
+) -> TurnOutcome:
+    """
+    Reply to one user message and save the turn. `degraded` (load shedding)
+    answers from the rules without calling the LLM.
+    """
+    chat_id = ctx.chat_id
+    vehicle_id = ctx.vehicle_id
 
     if any(k in user_input.lower() for k in WORKSHOP_PATTERNS):
         response = build_workshop_response(chat_id)
@@ -169,44 +324,73 @@ def run_vehicle_agent(
             user_input,
             json_safe(response),
         )
-        return response
+        _remember_turn(ctx, user_input, response)
+        return TurnOutcome(response)
+
+    if degraded:
+        return answer_degraded(ctx, user_input, user_id, "load_shed")
+    if not llm_circuit.allow():
+        return answer_degraded(ctx, user_input, user_id, "circuit_open")
 
     context_blocks = []
 
-    if chat_summary:
-        context_blocks.append(f"Conversation summary:\n{chat_summary}")
+    if ctx.chat_summary:
+        context_blocks.append(f"Conversation summary:\n{ctx.chat_summary}")
 
-    if chat_issue_summary:
-        context_blocks.append(f"Current issue:\n{chat_issue_summary}")
+    if ctx.chat_issue_summary:
+        context_blocks.append(f"Current issue:\n{ctx.chat_issue_summary}")
 
-    if open_issues:
+    if ctx.open_issues:
+        # most severe first; the rest add tokens, not diagnosis
+        shown = sorted(ctx.open_issues, key=lambda i: severity_rank(i.get("severity")), reverse=True)
         context_blocks.append(
             "Known unresolved issues:\n"
-            + "\n".join(f"- {i['title']} (severity: {i['severity']})" for i in open_issues)
+            + "\n".join(
+                f"- {i['title']} (severity: {i['severity']})"
+                for i in shown[:OPEN_ISSUES_IN_PROMPT]
+            )
         )
 
+    similar_cases = build_similar_cases_block(ctx, user_input)
+    if similar_cases:
+        context_blocks.append(similar_cases)
+
+    live_data = build_live_data_block(vehicle_id)
+    if live_data:
+        context_blocks.append(live_data)
+
     combined_input = (
         "\n\n".join(context_blocks) + f"\n\nUser update:\n{user_input}"
         if context_blocks
         else user_input
     )
 
-    messages = prompt.format_messages(
-        conversation_history=history_text,
+    messages = get_prompt().format_messages(
+        conversation_history=ctx.history_text,
         user_input=combined_input,
     )
+    metrics.summary(
+        "agent_prompt_tokens", "Estimated tokens in the reply prompt"
+    ).observe(estimate_tokens(ctx.history_text + combined_input))
 
     try:
-        ai_text = llm.invoke(messages).content
+        try:
+            if AGENT_TOOLS_ENABLED:
+                ai_text = run_with_tools(get_llm(), messages, get_tools(latitude, longitude))
+            else:
+                ai_text = get_llm().invoke(messages).content
+        except Exception as exc:
+            llm_circuit.record_failure(exc)
+            raise
+        llm_circuit.record_success()
 
         parsed = safe_json_extract(ai_text) or {}
         parsed = normalize_agent_response(parsed)
 
         previous_confidence = None
-        if history_structured:
-            last_agent = history_structured[-1].get("agent")
-            if isinstance(last_agent, dict):
-                previous_confidence = last_agent.get("confidence")
+        last_agent = ctx.history_structured[-1].get("agent") if ctx.history_structured else None
+        if isinstance(last_agent, dict):
+            previous_confidence = last_agent.get("confidence")
 
         parsed["confidence"] = compute_cumulative_confidence(
             previous_confidence,
@@ -214,6 +398,11 @@ def run_vehicle_agent(
         )
 
         parsed["chat_id"] = chat_id
+        # ASK share with vs without similar cases shows what retrieval buys
+        metrics.counter(
+            "agent_turns_total", "Answered chat turns",
+            {"action": parsed["action"], "similar_cases": "yes" if similar_cases else "no"},
+        ).inc()
 
         save_chat_turn(
             str(chat_id),
@@ -222,59 +411,127 @@ def run_vehicle_agent(
             user_input,
             json_safe(parsed),
         )
+        _remember_turn(ctx, user_input, parsed)
+
+        return TurnOutcome(
+            parsed,
+            new_turn=f"User: {user_input}\nAgent: {parsed['explanation']}",
+            delta=delta_line(user_input, parsed),
+            changed=diagnosis_changed(last_agent, parsed),
+            issue_candidate=(
+                parsed["confidence"] >= 0.7
+                and parsed["action"] in {"ESCALATE", "CONFIRM_WORKSHOP"}
+            ),
+        )
 
-        new_turn = f"User: {user_input}\nAgent: {parsed['explanation']}"
+    except Exception:
+        logger.exception("Reply failed for chat %s, answering from the rules", chat_id)
+        return answer_degraded(ctx, user_input, user_id, "llm_error")
 
-        summary_prompt = build_summary_prompt(
-            previous_summary=chat_summary,
-            new_turn=new_turn,
-        )
 
-        updated_summary = llm.invoke(summary_prompt).content.strip()
+def _invoke_recorded(llm, prompt) -> str:
+    """
+    llm.invoke for a call llm_circuit.allow() admitted; reports its outcome.
+    """
+    try:
+        content = llm.invoke(prompt).content
+    except Exception as exc:
+        llm_circuit.record_failure(exc)
+        raise
+    llm_circuit.record_success()
+    return content
+
+
+def finish_turns(ctx: TurnContext, outcomes: List[TurnOutcome]) -> None:
+    """
+    Fold the answered turns into the chat summary and open / update the
+    issue if any turn asks for it. The summary is rewritten by the LLM (one
+    call for the whole batch) only when summary_policy says so; otherwise
+    the turns are appended as "Recent updates" lines.
+    Failures here are logged; the turns are already saved and answered.
+    """
+    answered = [o for o in outcomes if o.new_turn]
+    if not answered:
+        return
+
+    base, deltas = split_summary(ctx.chat_summary)
+    reason = summary_policy.resummarize_reason(
+        base,
+        deltas + [o.delta for o in answered],
+        any(o.changed for o in answered),
+    )
 
-        if updated_summary and len(updated_summary) > 20:
-            upsert_chat_summary(
-                chat_id=str(chat_id),
-                vehicle_id=vehicle_id,
-                summary=updated_summary,
+    try:
+        llm = get_llm()
+        summary = None
+
+        # LLM-answered turns of a batch are appended as deltas while the
+        # circuit is open (degraded turns never get here)
+        if reason and llm_circuit.allow():
+            # updates already appended earlier are folded in with this batch
+            new_turn = "\n\n".join(deltas + [o.new_turn for o in answered])
+            summary_prompt = build_summary_prompt(
+                previous_summary=base,
+                new_turn=new_turn,
             )
+            metrics.summary(
+                "summary_prompt_tokens", "Estimated tokens in the summary prompt"
+            ).observe(estimate_tokens(base + new_turn))
+
+            updated_summary = _invoke_recorded(llm, summary_prompt).strip()
+            if updated_summary and len(updated_summary) > 20:
+                summary = updated_summary
+                metrics.counter(
+                    "summary_updates_total", "Chat summary updates",
+                    {"mode": "llm", "reason": reason},
+                ).inc()
+
+        if summary is None:
+            summary = join_summary(base, deltas + [o.delta for o in answered])
+            metrics.counter(
+                "summary_updates_total", "Chat summary updates", {"mode": "delta", "reason": "none"}
+            ).inc()
+
+        upsert_chat_summary(
+            chat_id=str(ctx.chat_id),
+            vehicle_id=ctx.vehicle_id,
+            summary=summary,
+        )
+        ctx.chat_summary = summary
+        metrics.summary(
+            "summary_tokens", "Estimated tokens in the stored chat summary"
+        ).observe(estimate_tokens(summary))
 
-        if (
-            updated_summary
-            and parsed["confidence"] >= 0.7
-            and parsed["action"] in {"ESCALATE", "CONFIRM_WORKSHOP"}
-        ):
-            issue_prompt = build_issue_prompt(updated_summary)
-            issue_json = safe_json_extract(llm.invoke(issue_prompt).content)
+        if any(o.issue_candidate for o in outcomes) and llm_circuit.allow():
+            issue_prompt = build_issue_prompt(summary)
+            issue_json = safe_json_extract(_invoke_recorded(llm, issue_prompt))
 
             if issue_json:
                 upsert_issue_from_summary(
-                    vehicle_id=vehicle_id,
-                    chat_id=str(chat_id),
+                    vehicle_id=ctx.vehicle_id,
+                    chat_id=str(ctx.chat_id),
                     issue=issue_json,
                 )
 
-        return parsed
-
-    except Exception as e:
-        fallback = {
-            "diagnosis": "Vehicle issue detected",
-            "explanation": "Thanks for the update. Let’s continue step by step.",
-            "severity": 0.6,
-            "action": "ASK",
-            "steps": [],
-            "follow_up_questions": GENERIC_FOLLOW_UP_QUESTIONS,
-            "youtube_urls": [],
-            "confidence": 0.6,
-            "chat_id": chat_id,
-        }
+    except Exception:
+        logger.exception("Summary update failed for chat %s", ctx.chat_id)
+
 
-        save_chat_turn(
-            str(chat_id),
-            user_id,
-            vehicle_id,
-            user_input,
-            json_safe(fallback),
-        )
+# -------------------- Main Agent --------------------
+
+def run_vehicle_agent(
+    user_input: str,
+    chat_id: UUID | None,
+    user_id: str,
+    vehicle_id: str | None = None,
+    latitude: float | None = None,
+    longitude: float | None = None,
+) -> Dict[str, Any]:
+
+    if chat_id is None or chat_id == SWAGGER_DUMMY_UUID:
+        chat_id = uuid4()
 
-        return fallback
+    ctx = load_turn_context(chat_id, vehicle_id)
+    outcome = answer_turn(ctx, user_input, user_id, latitude, longitude)
+    finish_turns(ctx, [outcome])
+    return outcome.response
@@ -1,10 +1,11 @@
 # app/auth.py
 from jose import jwt  # type: ignore
 from fastapi import HTTPException, Header  # type: ignore
-import httpx  # type: ignore
 import os
 from dotenv import load_dotenv # type: ignore
 
+from app.clients import clients
+
 load_dotenv()
 
 # 🔐 Load from environment
@@ -23,10 +24,9 @@ cached_keys = None
 async def get_jwks():
     global cached_keys
     if cached_keys is None:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(CLERK_JWKS_URL)
-            resp.raise_for_status()
-            cached_keys = resp.json()
+        resp = await clients.http.get(CLERK_JWKS_URL)
+        resp.raise_for_status()
+        cached_keys = resp.json()
     return cached_keys
 
 
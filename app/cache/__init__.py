@@ -0,0 +1,137 @@
+# Read-through cache for the per-turn reads of the chat agent: the chat
+# summary, the chat's issue summary and a vehicle's open issues. They change
+# only through app/db/ai_memory.py, which writes the new summary through to
+# the cache and invalidates the issue entries it touches.
+#
+# READ_CACHE_BACKEND=memory (default) keeps a bounded LRU per process;
+# READ_CACHE_BACKEND=redis shares entries (and invalidations) between workers
+# (needs REDIS_URL and the `redis` extra); READ_CACHE_BACKEND=off disables it.
+# Entries also expire after READ_CACHE_TTL_S, which bounds staleness for
+# writes made outside this app.
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.cache.base import CacheBackend
+from app.config import (
+    READ_CACHE_BACKEND,
+    READ_CACHE_MAX_ENTRIES,
+    READ_CACHE_TTL_S,
+    REDIS_URL,
+)
+from app.metrics import metrics
+
+BACKENDS = ("memory", "redis", "off")
+
+# key types, also the metric label
+CHAT_SUMMARY = "chat_summary"
+CHAT_ISSUE = "chat_issue"
+OPEN_ISSUES = "open_issues"
+KINDS = (CHAT_SUMMARY, CHAT_ISSUE, OPEN_ISSUES)
+
+
+class ReadCache:
+    def __init__(self, backend: Optional[CacheBackend], ttl_s: float) -> None:
+        self.backend = backend
+        self.ttl_s = ttl_s
+
+    def _count(self, kind: str, result: str) -> None:
+        metrics.counter(
+            "read_cache_requests_total", "Read cache lookups", {"kind": kind, "result": result}
+        ).inc()
+
+    def read_through(self, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        if self.backend is None:
+            return loader()
+
+        found, value = self.backend.get(f"{kind}:{key}")
+        if found:
+            self._count(kind, "hit")
+            return value
+
+        self._count(kind, "miss")
+        value = loader()
+        self.backend.set(f"{kind}:{key}", value, self.ttl_s)
+        return value
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        if self.backend is not None:
+            self.backend.set(f"{kind}:{key}", value, self.ttl_s)
+
+    def invalidate(self, kind: str, *keys: str) -> None:
+        if self.backend is not None:
+            self.backend.delete(*(f"{kind}:{key}" for key in keys))
+
+    def hit_rates(self) -> Dict[str, Optional[float]]:
+        """
+        Hit rate per key type since start, None before the first lookup.
+        """
+        rates: Dict[str, Optional[float]] = {}
+        for kind in KINDS:
+            hits = metrics.counter(
+                "read_cache_requests_total", "Read cache lookups", {"kind": kind, "result": "hit"}
+            ).value
+            misses = metrics.counter(
+                "read_cache_requests_total", "Read cache lookups", {"kind": kind, "result": "miss"}
+            ).value
+            rates[kind] = hits / (hits + misses) if hits + misses else None
+        return rates
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+
+_cache: Optional[ReadCache] = None
+_lock = threading.Lock()
+
+
+def create_read_cache(backend: str = READ_CACHE_BACKEND) -> ReadCache:
+    if backend == "off":
+        return ReadCache(None, READ_CACHE_TTL_S)
+
+    if backend == "memory":
+        from app.cache.memory_backend import MemoryBackend
+        return ReadCache(MemoryBackend(READ_CACHE_MAX_ENTRIES), READ_CACHE_TTL_S)
+
+    if backend == "redis":
+        if not REDIS_URL:
+            raise RuntimeError("READ_CACHE_BACKEND=redis requires REDIS_URL")
+        from app.cache.redis_backend import RedisBackend
+        return ReadCache(RedisBackend(REDIS_URL), READ_CACHE_TTL_S)
+
+    raise RuntimeError(f"Unknown READ_CACHE_BACKEND {backend!r}, expected one of {BACKENDS}")
+
+
+def get_read_cache() -> ReadCache:
+    """
+    Process-wide cache, created on first use.
+    """
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = create_read_cache()
+    return _cache
+
+
+def close_read_cache() -> None:
+    global _cache
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+
+
+__all__ = [
+    "BACKENDS",
+    "CHAT_ISSUE",
+    "CHAT_SUMMARY",
+    "CacheBackend",
+    "KINDS",
+    "OPEN_ISSUES",
+    "ReadCache",
+    "close_read_cache",
+    "create_read_cache",
+    "get_read_cache",
+]
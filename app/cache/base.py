@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import Any, Tuple
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store behind the read cache. Values are JSON-friendly
+    (what the storage layer returns); a miss is reported separately from a
+    cached None, so "no summary yet" is cached too.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        (found, value).
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_s: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None: ...
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,44 @@
+# Per-process LRU with a TTL. Invalidation only reaches this process, so with
+# several workers another worker may serve a value up to READ_CACHE_TTL_S old;
+# use the redis backend there.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+
+from app.cache.base import CacheBackend
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
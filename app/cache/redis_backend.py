@@ -0,0 +1,58 @@
+# Shared cache in Redis, so every worker sees the same entries and an
+# invalidation from one worker reaches all of them. Values are stored as
+# JSON with a TTL. Redis errors never fail a request: reads fall back to the
+# database and failed writes / deletes are logged (the TTL still bounds how
+# stale an entry can get).
+
+import json
+import logging
+from typing import Any, Tuple
+
+from app.cache.base import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBackend(CacheBackend):
+    def __init__(self, url: str, prefix: str = "readcache:", timeout_s: float = 0.25) -> None:
+        import redis  # type: ignore
+
+        self._errors = (redis.RedisError, OSError)
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout_s,
+            socket_connect_timeout=timeout_s,
+            health_check_interval=30,
+        )
+        self.prefix = prefix
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning("Read cache get failed for %s: %s", key, e)
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)["v"]
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        try:
+            self._client.set(
+                self.prefix + key,
+                json.dumps({"v": value}, default=str),
+                px=max(1, int(ttl_s * 1000)),
+            )
+        except self._errors as e:
+            logger.warning("Read cache set failed for %s: %s", key, e)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self._client.delete(*(self.prefix + k for k in keys))
+        except self._errors as e:
+            logger.warning("Read cache invalidation failed for %s: %s", keys, e)
+
+    def close(self) -> None:
+        self._client.close()
@@ -0,0 +1,239 @@
+# Cache for Tavily search results, shared by every caller of get_tavily().
+#
+# Automotive searches repeat a lot ("P0301 misfire cylinder 1", the same
+# workshop lookup around the same spot), and each Tavily call is slow and
+# billed. Results are keyed on the normalised query plus the other search
+# parameters and kept in a per-process LRU in front of a SQLite file, which
+# survives restarts and is shared by the workers on one host.
+#
+# A result is fresh for TAVILY_CACHE_TTL_S. For TAVILY_CACHE_STALE_S after
+# that it is still returned at once while one background refresh fetches a
+# new copy (stale-while-revalidate). Concurrent misses for the same key wait
+# for a single upstream call (single-flight); its error reaches all of them
+# and nothing is cached.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.cache.memory_backend import MemoryBackend
+from app.config import (
+    TAVILY_CACHE_MAX_ENTRIES,
+    TAVILY_CACHE_PATH,
+    TAVILY_CACHE_STALE_S,
+    TAVILY_CACHE_TTL_S,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY = 500  # writes between deletes of expired rows
+
+SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    params = dict(params)
+    if "query" in params:
+        params["query"] = normalize_query(params["query"])
+    raw = json.dumps([namespace, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SqliteStore:
+    """
+    key -> (fetched_at, JSON value) in one table. WAL, so several worker
+    processes can read while one writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SQL_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, value FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, fetched_at: float, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), fetched_at),
+            )
+
+    def prune(self, older_than: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM search_cache WHERE fetched_at < ?", (older_than,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SearchCache:
+    def __init__(
+        self,
+        path: Optional[str] = TAVILY_CACHE_PATH,
+        ttl_s: float = TAVILY_CACHE_TTL_S,
+        stale_s: float = TAVILY_CACHE_STALE_S,
+        max_entries: int = TAVILY_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self._memory = MemoryBackend(max_entries)
+        self._disk: Optional[SqliteStore] = None
+        if path:
+            try:
+                self._disk = SqliteStore(path)
+                self._disk.prune(time.time() - ttl_s - stale_s)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Search cache at %s unavailable, memory only: %s", path, exc)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        self._writes = 0
+
+    def _count(self, result: str) -> None:
+        metrics.counter(
+            "search_cache_requests_total", "Tavily search cache lookups", {"result": result}
+        ).inc()
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        found, entry = self._memory.get(key)
+        if found:
+            return entry
+        if self._disk is None:
+            return None
+        try:
+            entry = self._disk.get(key)
+        except sqlite3.Error as exc:
+            logger.warning("Search cache read failed: %s", exc)
+            return None
+        if entry is not None:
+            self._memory.set(key, entry, self._remaining(entry[0]))
+        return entry
+
+    def _remaining(self, fetched_at: float) -> float:
+        return max(0.0, fetched_at + self.ttl_s + self.stale_s - time.time())
+
+    def _store(self, key: str, value: Any) -> None:
+        fetched_at = time.time()
+        self._memory.set(key, (fetched_at, value), self.ttl_s + self.stale_s)
+        if self._disk is None:
+            return
+        try:
+            self._disk.put(key, fetched_at, value)
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._disk.prune(fetched_at - self.ttl_s - self.stale_s)
+        except sqlite3.Error as exc:
+            logger.warning("Search cache write failed: %s", exc)
+
+    def _fetch_once(self, key: str, fetch: Callable[[], Any]) -> Tuple[Future, bool]:
+        """
+        The in-flight fetch for `key`, started here if there is none.
+        Returns (future, started).
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+
+        try:
+            value = fetch()
+            self._store(key, value)
+            future.set_result(value)
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future, True
+
+    def _refresh(self, key: str, fetch: Callable[[], Any]) -> None:
+        future, _ = self._fetch_once(key, fetch)
+        if future.exception() is not None:
+            logger.warning("Background search refresh failed: %r", future.exception())
+
+    def get_or_fetch(self, namespace: str, params: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+        """
+        Cached result of `fetch()` for these parameters. Blocking; call
+        from a thread.
+        """
+        key = cache_key(namespace, params)
+        entry = self._lookup(key)
+
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.time() - fetched_at
+            if age < self.ttl_s:
+                self._count("hit")
+                return value
+            if age < self.ttl_s + self.stale_s:
+                self._count("stale")
+                with self._lock:
+                    refreshing = key in self._inflight
+                if not refreshing:
+                    self._refresher.submit(self._refresh, key, fetch)
+                return value
+
+        future, started = self._fetch_once(key, fetch)
+        self._count("miss" if started else "coalesced")
+        return future.result()
+
+    def close(self) -> None:
+        self._refresher.shutdown(wait=False, cancel_futures=True)
+        if self._disk is not None:
+            self._disk.close()
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Process-wide cache, created on first use.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache()
+    return _cache
+
+
+def close_search_cache() -> None:
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
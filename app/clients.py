@@ -0,0 +1,192 @@
+# Shared outbound HTTP clients.
+#
+# Every upstream (Clerk JWKS, Supabase PostgREST, Groq, Google Places,
+# Tavily) goes through one pooled keep-alive client instead of opening a new
+# connection (and TLS handshake) per call. Clients are created in the startup
+# hook, or on first use outside the app (scripts, benchmarks). warm_up()
+# opens the connections and fetches the JWKS before the first request, and
+# aclose() releases everything on shutdown. SDK clients built on top of these
+# (Supabase, Groq) register an on_close() reset so they are rebuilt with
+# fresh connections if the app starts again in the same process.
+#
+# httpx / requests are imported on first use to keep app.main cheap to import.
+
+import asyncio
+import importlib.util
+import logging
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from app.config import (
+    HTTP_CONNECT_TIMEOUT_S,
+    HTTP_KEEPALIVE_EXPIRY_S,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_TIMEOUT_S,
+    LLM_TIMEOUT_S,
+    SUPABASE_URL,
+)
+
+if TYPE_CHECKING:
+    import httpx  # type: ignore
+    import requests  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the h2 package (installed with httpx[http2], which supabase pulls in)
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+GROQ_ORIGIN = "https://api.groq.com"
+TAVILY_ORIGIN = "https://api.tavily.com"
+PLACES_ORIGIN = "https://maps.googleapis.com"
+
+
+def _limits() -> "httpx.Limits":
+    import httpx  # type: ignore
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+    )
+
+
+def _timeout(read_s: float) -> "httpx.Timeout":
+    import httpx  # type: ignore
+    return httpx.Timeout(read_s, connect=HTTP_CONNECT_TIMEOUT_S)
+
+
+def _async_client(read_s: float) -> "httpx.AsyncClient":
+    import httpx  # type: ignore
+    return httpx.AsyncClient(http2=HTTP2, limits=_limits(), timeout=_timeout(read_s))
+
+
+def _sync_client(read_s: float) -> "httpx.Client":
+    import httpx  # type: ignore
+    return httpx.Client(http2=HTTP2, limits=_limits(), timeout=_timeout(read_s))
+
+
+class ClientRegistry:
+    def __init__(self) -> None:
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._sync_http: Optional["httpx.Client"] = None
+        self._llm_http: Optional["httpx.Client"] = None
+        self._llm_async_http: Optional["httpx.AsyncClient"] = None
+        self._tavily_session: Optional["requests.Session"] = None
+        self._on_close: List[Callable[[], None]] = []
+
+    # ---------- clients ----------
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        """
+        General async client (JWKS and other async callers).
+        """
+        if self._http is None:
+            self._http = _async_client(HTTP_TIMEOUT_S)
+        return self._http
+
+    @property
+    def sync_http(self) -> "httpx.Client":
+        """
+        General sync client (Supabase PostgREST, Google Places).
+        """
+        if self._sync_http is None:
+            self._sync_http = _sync_client(HTTP_TIMEOUT_S)
+        return self._sync_http
+
+    @property
+    def llm_http(self) -> "httpx.Client":
+        """
+        Groq, sync; longer read timeout for completions.
+        """
+        if self._llm_http is None:
+            self._llm_http = _sync_client(LLM_TIMEOUT_S)
+        return self._llm_http
+
+    @property
+    def llm_async_http(self) -> "httpx.AsyncClient":
+        if self._llm_async_http is None:
+            self._llm_async_http = _async_client(LLM_TIMEOUT_S)
+        return self._llm_async_http
+
+    @property
+    def tavily_session(self) -> "requests.Session":
+        """
+        Tavily's SDK only takes a requests.Session and sets its auth headers
+        on it, so it gets a dedicated one.
+        """
+        if self._tavily_session is None:
+            import requests  # type: ignore
+            from requests.adapters import HTTPAdapter  # type: ignore
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_MAX_KEEPALIVE)
+            session.mount("https://", adapter)
+            self._tavily_session = session
+        return self._tavily_session
+
+    # ---------- lifecycle ----------
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """
+        Run `callback` after the clients are closed (e.g. drop a cached SDK
+        client that holds one of them).
+        """
+        if callback not in self._on_close:
+            self._on_close.append(callback)
+
+    def start(self) -> None:
+        for name in ("http", "sync_http", "llm_http", "llm_async_http", "tavily_session"):
+            getattr(self, name)
+        logger.info("HTTP clients ready (http2=%s)", HTTP2)
+
+    async def warm_up(self, timeout: float = 5.0) -> None:
+        """
+        Fetch the JWKS and open a pooled connection to each upstream.
+        Failures are logged only: the first real request will retry.
+        """
+        from app.auth.auth import get_jwks
+
+        def touch(client, url: str) -> None:
+            # any response means the connection is open and pooled
+            client.head(url, timeout=timeout)
+
+        jobs = {
+            "jwks": get_jwks(),
+            "groq": self.llm_async_http.head(GROQ_ORIGIN, timeout=timeout),
+            "groq-sync": asyncio.to_thread(touch, self.llm_http, GROQ_ORIGIN),
+            "places": asyncio.to_thread(touch, self.sync_http, PLACES_ORIGIN),
+            "tavily": asyncio.to_thread(touch, self.tavily_session, TAVILY_ORIGIN),
+        }
+        if SUPABASE_URL:
+            jobs["supabase"] = asyncio.to_thread(touch, self.sync_http, SUPABASE_URL)
+
+        results = await asyncio.gather(
+            *(asyncio.wait_for(job, timeout) for job in jobs.values()),
+            return_exceptions=True,
+        )
+        for name, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                logger.warning("Warm-up of %s failed: %r", name, result)
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        if self._llm_async_http is not None:
+            await self._llm_async_http.aclose()
+        if self._sync_http is not None:
+            self._sync_http.close()
+        if self._llm_http is not None:
+            self._llm_http.close()
+        if self._tavily_session is not None:
+            self._tavily_session.close()
+
+        self._http = self._sync_http = self._llm_http = None
+        self._llm_async_http = None
+        self._tavily_session = None
+
+        callbacks, self._on_close = self._on_close, []
+        for callback in callbacks:
+            callback()
+
+
+clients = ClientRegistry()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv # type: ignore
 
 load_dotenv()
@@ -7,4 +8,115 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_WEB_SEARCH")
-GOOGLE_MAPS_KEY = os.getenv("GOOGLE_MAPS_KEY")
\ No newline at end of file
+GOOGLE_MAPS_KEY = os.getenv("GOOGLE_MAPS_KEY")
+
+MAINTENANCE_RULES_TTL_S = int(os.getenv("MAINTENANCE_RULES_TTL_S", "600"))
+MAINTENANCE_REMINDERS_ENABLED = os.getenv("MAINTENANCE_REMINDERS_ENABLED", "0") == "1"
+# the running scheduler reloads its window this often, to see changes made on other workers
+MAINTENANCE_REMINDERS_RELOAD_S = float(os.getenv("MAINTENANCE_REMINDERS_RELOAD_S", "600"))
+
+# Storage backend for the hot tables: "supabase" (PostgREST) or "postgres" (asyncpg)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Set to 0 behind a transaction-mode pooler (pgbouncer / Supabase pooler on :6543)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Shared outbound HTTP clients (app/clients.py)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "60"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "30"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+HTTP_WARM_UP = os.getenv("HTTP_WARM_UP", "1") == "1"
+
+# Build the lazily loaded SDK clients (and warm HTTP connections) in the
+# background after startup instead of on the first request
+BACKGROUND_WARM_UP = os.getenv("BACKGROUND_WARM_UP", "1") == "1"
+
+# Static reference data: share OBD_CODES between workers through an mmap'd
+# table compiled into REFERENCE_CACHE_DIR (set OBD_CODES_SHARED=0 for a plain dict)
+OBD_CODES_SHARED = os.getenv("OBD_CODES_SHARED", "1") == "1"
+REFERENCE_CACHE_DIR = os.getenv(
+    "REFERENCE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "vehicle-agent-data")
+)
+
+# Admission control for /vehicle/chat (app/services/admission.py)
+CHAT_RATE_PER_MIN = float(os.getenv("CHAT_RATE_PER_MIN", "12"))
+CHAT_BURST = int(os.getenv("CHAT_BURST", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+CHAT_QUEUE_MAX = int(os.getenv("CHAT_QUEUE_MAX", "32"))
+CHAT_QUEUE_TIMEOUT_S = float(os.getenv("CHAT_QUEUE_TIMEOUT_S", "10"))
+
+# Idempotent /vehicle/chat submissions (app/services/idempotency.py)
+IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "300"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+# Per-chat turn sequencing (app/services/chat_actor.py). The advisory lock
+# also serialises a chat across workers; needs STORAGE_BACKEND=postgres.
+CHAT_ADVISORY_LOCK = os.getenv("CHAT_ADVISORY_LOCK", "0") == "1"
+# Locks are held on their own connections, outside the DB_POOL_* pool
+CHAT_LOCK_POOL_SIZE = int(os.getenv("CHAT_LOCK_POOL_SIZE", str(LLM_MAX_CONCURRENCY)))
+CHAT_LOCK_ACQUIRE_TIMEOUT_S = float(os.getenv("CHAT_LOCK_ACQUIRE_TIMEOUT_S", "5"))
+# wait for another worker's drain: longer than an LLM call
+CHAT_LOCK_WAIT_S = float(os.getenv("CHAT_LOCK_WAIT_S", str(2 * LLM_TIMEOUT_S)))
+
+# Chat summary policy (app/agent/summary_policy.py)
+SUMMARY_EVERY_N_TURNS = int(os.getenv("SUMMARY_EVERY_N_TURNS", "5"))
+SUMMARY_DELTA_TOKEN_LIMIT = int(os.getenv("SUMMARY_DELTA_TOKEN_LIMIT", "400"))
+
+# Read cache for chat summaries and issues (app/cache)
+READ_CACHE_BACKEND = os.getenv("READ_CACHE_BACKEND", "memory")
+READ_CACHE_TTL_S = float(os.getenv("READ_CACHE_TTL_S", "60"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Issue deduplication (app/db/issue_index.py)
+ISSUE_DEDUPE_THRESHOLD = float(os.getenv("ISSUE_DEDUPE_THRESHOLD", "0.6"))
+OPEN_ISSUES_IN_PROMPT = int(os.getenv("OPEN_ISSUES_IN_PROMPT", "5"))
+
+# Chat history search (app/services/chat_search.py)
+# indexes of the least recently searching users are dropped past this many turns
+SEARCH_INDEX_MAX_TURNS = int(os.getenv("SEARCH_INDEX_MAX_TURNS", "200000"))
+
+# Similar resolved cases in the reply prompt (app/agent/retrieval.py)
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))  # 0 disables retrieval
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.2"))
+RETRIEVAL_REFRESH_S = float(os.getenv("RETRIEVAL_REFRESH_S", "300"))
+RETRIEVAL_NPROBE = int(os.getenv("RETRIEVAL_NPROBE", "8"))
+
+# Tavily search result cache (app/cache/search_cache.py)
+TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH", ".cache/tavily.sqlite3")  # "" keeps it in memory only
+TAVILY_CACHE_TTL_S = float(os.getenv("TAVILY_CACHE_TTL_S", str(24 * 3600)))
+# past the TTL a result is still served for this long while it is refreshed
+TAVILY_CACHE_STALE_S = float(os.getenv("TAVILY_CACHE_STALE_S", str(7 * 24 * 3600)))
+TAVILY_CACHE_MAX_ENTRIES = int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "2000"))
+
+# Tool calls in the chat agent (app/agent/tool_loop.py)
+AGENT_TOOLS_ENABLED = os.getenv("AGENT_TOOLS_ENABLED", "1") == "1"
+AGENT_MAX_TOOL_STEPS = int(os.getenv("AGENT_MAX_TOOL_STEPS", "3"))  # model steps that may call tools
+AGENT_TOOL_DEADLINE_S = float(os.getenv("AGENT_TOOL_DEADLINE_S", "15"))  # per turn, for all tool steps
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "8"))
+
+# Batch fleet diagnosis (app/services/fleet_batch.py)
+FLEET_MAX_CASES = int(os.getenv("FLEET_MAX_CASES", "500"))
+FLEET_PACK_SIZE = int(os.getenv("FLEET_PACK_SIZE", "8"))  # cases per LLM call
+FLEET_LLM_CONCURRENCY = int(os.getenv("FLEET_LLM_CONCURRENCY", "2"))
+FLEET_PERSIST_CHUNK = int(os.getenv("FLEET_PERSIST_CHUNK", "100"))
+FLEET_JOB_TTL_S = float(os.getenv("FLEET_JOB_TTL_S", "3600"))  # finished jobs stay pollable this long
+FLEET_MAX_ACTIVE_JOBS = int(os.getenv("FLEET_MAX_ACTIVE_JOBS", "2"))  # per user
+FLEET_POLL_S = float(os.getenv("FLEET_POLL_S", "1"))  # reading a job another worker runs
+
+# Degraded mode: rule-based answers while the LLM is unavailable (app/agent/degraded.py)
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))  # 0 disables the breaker
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+DEGRADED_ON_SHED = os.getenv("DEGRADED_ON_SHED", "1") == "1"  # answer shed chat turns from the rules
+# shed turns answered from the rules at once, per worker; past this they get the 429
+DEGRADED_MAX_CONCURRENT = int(os.getenv("DEGRADED_MAX_CONCURRENT", "4"))
+
+# Live telemetry in the API process (app/telemetry/consumer.py)
+# "" = off, "obd" = live OBD listener, anything else = capture file to replay
+TELEMETRY_SOURCE = os.getenv("TELEMETRY_SOURCE", "")
+TELEMETRY_REPLAY_SPEED = float(os.getenv("TELEMETRY_REPLAY_SPEED", "1"))  # 0 = as fast as possible
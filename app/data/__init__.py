@@ -1,6 +1,26 @@
 import json
+import logging
 from pathlib import Path
 
-OBD_CODES = json.loads(
-    Path(__file__).with_name("obd_codes_refined.json").read_text(encoding="utf-8")
-)
+from app.config import OBD_CODES_SHARED, REFERENCE_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+OBD_CODES_SOURCE = Path(__file__).with_name("obd_codes_refined.json")
+
+
+def _load_obd_codes():
+    # Shared mode: one mmap'd copy in the page cache for all workers
+    # (app/data/shared.py). Otherwise every process parses its own dict.
+    if OBD_CODES_SHARED:
+        from app.data.shared import SharedTable
+
+        try:
+            return SharedTable.open(OBD_CODES_SOURCE, Path(REFERENCE_CACHE_DIR))
+        except OSError:
+            logger.warning("Shared OBD table unavailable, loading per process", exc_info=True)
+
+    return json.loads(OBD_CODES_SOURCE.read_text(encoding="utf-8"))
+
+
+OBD_CODES = _load_obd_codes()
@@ -0,0 +1,147 @@
+# Read-only reference tables shared between worker processes.
+#
+# The JSON source is compiled once into a compact index file and every
+# worker mmaps it read-only. The pages live in the OS page cache and are
+# shared by all processes, whether workers are forked (gunicorn --preload)
+# or spawned (uvicorn --workers). Each worker keeps only a small Mapping
+# object, not a dict of thousands of dicts.
+#
+# File layout (little endian):
+#   header   MAGIC, source crc32 (u32), source size (u64), count (u32)
+#   index    count x (key: 8 bytes, NUL padded; offset: u32; length: u32), sorted by key
+#   records  compact JSON of each value
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+MAGIC = b"REFTBL01"
+HEADER = struct.Struct("<8sIQI")
+ENTRY = struct.Struct("<8sII")
+KEY_WIDTH = 8
+
+
+def _fingerprint(raw: bytes) -> tuple[int, int]:
+    return zlib.crc32(raw), len(raw)
+
+
+def build_table(source: Path, target: Path) -> None:
+    """
+    Compile a {key: json-object} file into the mmap-able layout.
+    Written to a temp file and renamed, so concurrent builders are safe.
+    """
+    raw = source.read_bytes()
+    data: Dict[str, Any] = json.loads(raw)
+
+    keys = sorted(data)
+    records = [json.dumps(data[k], separators=(",", ":")).encode("utf-8") for k in keys]
+
+    base = HEADER.size + ENTRY.size * len(keys)
+    index = bytearray()
+    offset = base
+    for key, record in zip(keys, records):
+        encoded = key.encode("ascii")
+        if len(encoded) > KEY_WIDTH:
+            raise ValueError(f"Key {key!r} is longer than {KEY_WIDTH} bytes")
+        index += ENTRY.pack(encoded, offset, len(record))
+        offset += len(record)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, *_fingerprint(raw), len(keys)))
+            f.write(index)
+            for record in records:
+                f.write(record)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class SharedTable(Mapping):
+    """
+    Read-only Mapping over a compiled table. Values are decoded on access,
+    so callers get a fresh dict each time and cannot mutate shared state.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, crc, size, self._count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a reference table")
+        self.fingerprint = (crc, size)
+
+    @classmethod
+    def open(cls, source: Path, cache_dir: Path) -> "SharedTable":
+        """
+        Open the compiled table for `source`, (re)building it first if it is
+        missing or was built from a different version of the source.
+        """
+        target = cache_dir / f"{source.stem}.tbl"
+        fingerprint = _fingerprint(source.read_bytes())
+
+        if target.exists():
+            try:
+                table = cls(target)
+            except (ValueError, struct.error):
+                pass  # unreadable or another format: rebuild
+            else:
+                if table.fingerprint == fingerprint:
+                    return table
+                table.close()
+
+        build_table(source, target)
+        return cls(target)
+
+    # ---------- lookup ----------
+
+    def _key_at(self, i: int) -> bytes:
+        start = HEADER.size + i * ENTRY.size
+        return self._mm[start:start + KEY_WIDTH]
+
+    def _find(self, key: str) -> Optional[int]:
+        try:
+            wanted = key.encode("ascii").ljust(KEY_WIDTH, b"\0")
+        except (AttributeError, UnicodeEncodeError):
+            return None
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < wanted:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._key_at(lo) == wanted:
+            return lo
+        return None
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        _, offset, length = ENTRY.unpack_from(self._mm, HEADER.size + i * ENTRY.size)
+        return json.loads(self._mm[offset:offset + length])
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._key_at(i).rstrip(b"\0").decode("ascii")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._mm.close()
@@ -1,16 +1,29 @@
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
-from app.db.db import supabase
+from app.cache import CHAT_ISSUE, CHAT_SUMMARY, OPEN_ISSUES, get_read_cache
+from app.db.issue_index import IssueIndex, canonical_issue_key, severity_rank
+from app.storage import get_storage
 
 
 # Helpers
 def make_issue_key(title: str) -> str:
-    return (
-        title.lower()
-        .strip()
-        .replace("-", " ")
-        .replace("  ", " ")
-        .replace(" ", "_")
-    )
+    # content words, sorted: "Slipping clutch issue" and "Clutch slipping"
+    # share a key
+    return canonical_issue_key(title)
+
+
+def merge_issue(existing: Dict[str, Any], issue: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fields for folding a newly reported duplicate into an open issue: the
+    established title stays, the newer summary wins, severity never drops.
+    """
+    severities = [s for s in (existing.get("severity"), issue.get("severity")) if s is not None]
+    return {
+        "title": existing["title"],
+        "summary": issue.get("summary") or existing.get("summary"),
+        "severity": max(severities, key=severity_rank) if severities else None,
+        "issue_key": make_issue_key(existing["title"]),
+    }
 
 
 # ai_chat_summary (one row per chat)
@@ -18,17 +31,10 @@ def load_chat_summary(chat_id: Optional[str]) -> Optional[str]:
     if not chat_id:
         return None
 
-    res = (
-        supabase
-        .table("ai_chat_summary")
-        .select("summary")
-        .eq("chat_id", chat_id)
-        .limit(1)
-        .execute()
+    return get_read_cache().read_through(
+        CHAT_SUMMARY, chat_id, lambda: get_storage().load_chat_summary(chat_id)
     )
 
-    return res.data[0]["summary"] if res.data else None
-
 
 def upsert_chat_summary(
     chat_id: Optional[str],
@@ -38,14 +44,8 @@ def upsert_chat_summary(
     if not chat_id or not vehicle_id:
         return
 
-    supabase.table("ai_chat_summary").upsert(
-        {
-            "chat_id": chat_id,
-            "vehicle_id": vehicle_id,
-            "summary": summary,
-        },
-        on_conflict="chat_id",
-    ).execute()
+    get_storage().upsert_chat_summary(chat_id, vehicle_id, summary)
+    get_read_cache().put(CHAT_SUMMARY, chat_id, summary)  # write-through
 
 
 # issues_summary (vehicle-level issues)
@@ -53,18 +53,10 @@ def load_open_issues(vehicle_id: Optional[str]) -> List[Dict[str, Any]]:
     if not vehicle_id:
         return []
 
-    res = (
-        supabase
-        .table("issues_summary")
-        .select("id, issue_key, title, summary, severity")
-        .eq("vehicle_id", vehicle_id)
-        .is_("resolved_at", None)
-        .order("updated_at", desc=True)
-        .execute()
+    return get_read_cache().read_through(
+        OPEN_ISSUES, vehicle_id, lambda: get_storage().load_open_issues(vehicle_id)
     )
 
-    return res.data or []
-
 
 def upsert_issue_from_summary(
     vehicle_id: Optional[str],
@@ -80,32 +72,64 @@ def upsert_issue_from_summary(
 
     issue_key = make_issue_key(title)
 
-    existing = (
-        supabase
-        .table("issues_summary")
-        .select("id")
-        .eq("chat_id", chat_id)
-        .limit(1)
-        .execute()
-    )
+    storage = get_storage()
+    existing = storage.load_chat_issue(chat_id)  # not cached: decides insert vs update
 
-    if existing.data:
-        supabase.table("issues_summary").update({
+    duplicate = None
+    if not existing:
+        # another chat may have opened this issue under a different wording
+        duplicate = IssueIndex.from_rows(load_open_issues(vehicle_id)).find_duplicate(title)
+
+    if existing and existing.get("resolved_at"):
+        return  # closed with its fix; later summaries must not rewrite it
+
+    if existing:
+        storage.update_issue(existing["id"], {
             "title": title,
             "summary": issue.get("summary"),
             "severity": issue.get("severity"),
             "issue_key": issue_key,
-            "updated_at": "now()",
-        }).eq("id", existing.data[0]["id"]).execute()
+        })
+    elif duplicate:
+        storage.update_issue(duplicate["id"], merge_issue(duplicate, issue))
     else:
-        supabase.table("issues_summary").insert({
+        storage.insert_issue({
             "vehicle_id": vehicle_id,
             "chat_id": chat_id,
             "issue_key": issue_key,
             "title": title,
             "summary": issue.get("summary"),
             "severity": issue.get("severity"),
-        }).execute()
+        })
+
+    get_read_cache().invalidate(CHAT_ISSUE, chat_id)
+    if duplicate and duplicate.get("chat_id") and duplicate["chat_id"] != chat_id:
+        # the merged row belongs to the chat that opened the issue
+        get_read_cache().invalidate(CHAT_ISSUE, duplicate["chat_id"])
+    get_read_cache().invalidate(OPEN_ISSUES, vehicle_id)
+
+
+def resolve_chat_issue(chat_id: str, fix: str) -> Optional[Dict[str, Any]]:
+    """
+    Close the chat's issue with the fix that solved it, which makes it a
+    solved case for retrieval. None if the chat has no issue.
+    """
+    storage = get_storage()
+    issue = storage.load_chat_issue(chat_id)
+    if not issue:
+        return None
+
+    if not issue.get("resolved_at"):
+        summary = f"{issue.get('summary') or ''}\nFix: {fix.strip()}".strip()
+        resolved_at = datetime.now(timezone.utc).isoformat()
+        storage.update_issue(issue["id"], {"summary": summary, "resolved_at": resolved_at})
+        issue = {**issue, "summary": summary, "resolved_at": resolved_at}
+
+        get_read_cache().invalidate(CHAT_ISSUE, chat_id)
+        if issue.get("vehicle_id"):
+            get_read_cache().invalidate(OPEN_ISSUES, str(issue["vehicle_id"]))
+
+    return issue
 
 
 # issues_summary (chat-scoped view)
@@ -113,13 +137,8 @@ def load_chat_issue_summary(chat_id: Optional[str]) -> Optional[str]:
     if not chat_id:
         return None
 
-    res = (
-        supabase
-        .table("issues_summary")
-        .select("summary")
-        .eq("chat_id", chat_id)
-        .limit(1)
-        .execute()
-    )
+    def load() -> Optional[str]:
+        issue = get_storage().load_chat_issue(chat_id)
+        return issue["summary"] if issue else None
 
-    return res.data[0]["summary"] if res.data else None
+    return get_read_cache().read_through(CHAT_ISSUE, chat_id, load)
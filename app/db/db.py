@@ -1,20 +1,52 @@
 # Database helpers for AI chat sessions (short-term memory)
 
+import threading
 from uuid import UUID
 from typing import List, Dict, Any
 
-from supabase import create_client  # type: ignore
+from app.clients import clients
 from app.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from app.storage import get_storage
 
 
 # --------------------------------------------------
 # Supabase client
 # --------------------------------------------------
 
-supabase = create_client(
-    SUPABASE_URL,
-    SUPABASE_SERVICE_KEY
-)
+class _LazySupabase:
+    """
+    Stands in for the supabase Client: the SDK is imported and the client
+    built on first attribute access (`supabase.table(...)`), not at import.
+    """
+
+    def __init__(self) -> None:
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client  # type: ignore
+                    from supabase.lib.client_options import SyncClientOptions  # type: ignore
+
+                    self._client = create_client(
+                        SUPABASE_URL,
+                        SUPABASE_SERVICE_KEY,
+                        # PostgREST calls share the pooled keep-alive client
+                        options=SyncClientOptions(httpx_client=clients.sync_http),
+                    )
+                    clients.on_close(self.reset)
+        return self._client
+
+    def reset(self) -> None:
+        self._client = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+supabase = _LazySupabase()
 
 
 # --------------------------------------------------
@@ -32,13 +64,13 @@ def save_chat_turn(
     Save one user + AI exchange.
     `response_ai` MUST be a parsed JSON dict.
     """
-    supabase.table("ai_chat_history").insert({
+    get_storage().save_chat_turn({
         "chat_id": str(chat_id),
         "user_id": user_id,
         "vehicle_id": vehicle_id,
         "prompt": prompt,
         "response_ai": response_ai,   # stored as jsonb
-    }).execute()
+    })
 
 
 # --------------------------------------------------
@@ -50,17 +82,7 @@ def load_short_term_memory(chat_id: UUID, limit: int = 5) -> str:
     Returns conversation history as plain text.
     Used ONLY for LLM conversational context.
     """
-    response = (
-        supabase
-        .table("ai_chat_history")
-        .select("prompt, response_ai")
-        .eq("chat_id", str(chat_id))
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
-    )
-
-    rows = response.data or []
+    rows = get_storage().load_chat_turns(str(chat_id), limit)
     rows.reverse()  # oldest → newest
 
     history_lines: List[str] = []
@@ -102,17 +124,7 @@ def load_short_term_memory_structured(
       }
     ]
     """
-    response = (
-        supabase
-        .table("ai_chat_history")
-        .select("prompt, response_ai")
-        .eq("chat_id", str(chat_id))
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
-    )
-
-    rows = response.data or []
+    rows = get_storage().load_chat_turns(str(chat_id), limit)
     rows.reverse()  # oldest → newest
 
     history: List[Dict[str, Any]] = []
@@ -0,0 +1,141 @@
+# Fuzzy matching of issue titles within one vehicle.
+#
+# The LLM names the same problem differently from chat to chat ("Clutch
+# slipping", "Slipping clutch issue"), so an exact issue_key left every
+# wording as its own open issue. Titles are reduced to content words (light
+# stemming, filler words like "issue" / "possible" dropped) and compared by
+# a blend of word-set and character-trigram Jaccard similarity. The word
+# postings only narrow the candidates; a vehicle has a handful of open issues.
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from app.config import ISSUE_DEDUPE_THRESHOLD
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# issue severity as written by the issue prompt
+SEVERITY_RANK = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
+
+_FILLER = frozenset({
+    "a", "an", "and", "at", "bad", "car", "fail", "failing", "failure", "fault",
+    "faulty", "for", "from", "in", "is", "issue", "issues", "likely", "of", "on",
+    "or", "possible", "possibly", "potential", "problem", "problems", "suspected",
+    "the", "to", "vehicle", "with",
+})
+
+
+def stem(word: str) -> str:
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            if len(word) >= 4 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]  # slipping -> slipp -> slip
+            return word
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        word = word[:-1]
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]  # misfire / misfir(ing)
+    return word
+
+
+def severity_rank(severity: Any) -> float:
+    """
+    Orderable severity: LOW < MEDIUM < HIGH; numbers as they are; unknown lowest.
+    """
+    if isinstance(severity, (int, float)):
+        return float(severity)
+    return SEVERITY_RANK.get(str(severity or "").strip().upper(), 0)
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    return frozenset(
+        stem(w) for w in _WORD.findall((title or "").lower()) if w not in _FILLER
+    )
+
+
+def _shingles(tokens: Iterable[str]) -> FrozenSet[str]:
+    text = " ".join(sorted(tokens))
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2)) or frozenset([text])
+
+
+def canonical_issue_key(title: str) -> str:
+    """
+    Word-order independent key: "Slipping clutch issue" -> "clutch_slip".
+    A title of filler words only ("Possible issue") keys on its plain
+    lowercase words instead of collapsing to "".
+    """
+    tokens = title_tokens(title)
+    if not tokens:
+        return "_".join(_WORD.findall((title or "").lower()))
+    return "_".join(sorted(tokens))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _token_score(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    # a title that adds detail to another ("Clutch slipping under load") is
+    # the same issue, as long as the shorter one names more than one thing
+    if min(len(a), len(b)) >= 2:
+        return max(_jaccard(a, b), len(a & b) / min(len(a), len(b)))
+    return _jaccard(a, b)
+
+
+def _score(tokens, shingles, other_tokens, other_shingles) -> float:
+    return 0.5 * _token_score(tokens, other_tokens) + 0.5 * _jaccard(shingles, other_shingles)
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = title_tokens(a), title_tokens(b)
+    return _score(ta, _shingles(ta), tb, _shingles(tb))
+
+
+class IssueIndex:
+    """
+    Open issues of one vehicle, searchable by title similarity.
+    """
+
+    def __init__(self, threshold: float = ISSUE_DEDUPE_THRESHOLD) -> None:
+        self.threshold = threshold
+        self._issues: List[Tuple[Dict[str, Any], FrozenSet[str], FrozenSet[str]]] = []
+        self._postings: Dict[str, Set[int]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], threshold: float = ISSUE_DEDUPE_THRESHOLD) -> "IssueIndex":
+        index = cls(threshold)
+        for row in rows:
+            index.add(row)
+        return index
+
+    def add(self, row: Dict[str, Any]) -> None:
+        tokens = title_tokens(row.get("title") or "")
+        position = len(self._issues)
+        self._issues.append((row, tokens, _shingles(tokens)))
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(position)
+
+    def find_duplicate(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        The most similar indexed issue at or above the threshold, or None.
+        """
+        tokens = title_tokens(title)
+        shingles = _shingles(tokens)
+
+        candidates: Set[int] = set()
+        for token in tokens:
+            candidates |= self._postings.get(token, set())
+
+        best, best_score = None, self.threshold
+        for position in candidates:
+            row, other_tokens, other_shingles = self._issues[position]
+            score = _score(tokens, shingles, other_tokens, other_shingles)
+            if score >= best_score:
+                best, best_score = row, score
+        return best
+
+    def __len__(self) -> int:
+        return len(self._issues)
@@ -0,0 +1,3 @@
+# One-off / scheduled maintenance jobs, run as modules:
+#
+#     python -m app.jobs.<name> --help
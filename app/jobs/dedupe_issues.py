@@ -0,0 +1,104 @@
+# Merge near-duplicate open issues created before upserts deduplicated them.
+#
+#     python -m app.jobs.dedupe_issues --dry-run
+#     python -m app.jobs.dedupe_issues [--vehicle ID] [--threshold 0.6]
+#
+# Per vehicle, open issues are walked most recently updated first. An issue
+# that resembles one already kept (app/db/issue_index.py) is folded into it
+# the way an upsert would (ai_memory.merge_issue) and then resolved with
+# merged_into pointing at the kept issue, so it drops out of load_open_issues
+# and never counts as a solved case for retrieval. Kept issues get the canonical issue_key.
+# Safe to re-run: a second pass finds nothing to merge.
+
+import argparse
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from app.cache import OPEN_ISSUES, get_read_cache
+from app.config import ISSUE_DEDUPE_THRESHOLD
+from app.db.ai_memory import make_issue_key, merge_issue
+from app.db.issue_index import IssueIndex
+from app.storage import close_storage, get_storage
+
+logger = logging.getLogger(__name__)
+
+
+def plan_vehicle(
+    issues: List[Dict[str, Any]], threshold: float
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    (kept issues, [(duplicate, kept issue it merges into)]).
+    """
+    index = IssueIndex(threshold)
+    kept: List[Dict[str, Any]] = []
+    merges: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    for issue in issues:  # most recently updated first
+        target = index.find_duplicate(issue.get("title") or "")
+        if target is None:
+            kept.append(issue)
+            index.add(issue)
+        else:
+            merges.append((issue, target))
+    return kept, merges
+
+
+def dedupe_vehicle(vehicle_id: str, threshold: float, dry_run: bool) -> int:
+    storage = get_storage()
+    kept, merges = plan_vehicle(storage.load_open_issues(vehicle_id), threshold)
+
+    for duplicate, target in merges:
+        logger.info(
+            "%s: %r -> %r%s", vehicle_id, duplicate["title"], target["title"],
+            " (dry run)" if dry_run else "",
+        )
+    if dry_run:
+        return len(merges)
+
+    merged: Dict[Any, Dict[str, Any]] = {issue["id"]: dict(issue) for issue in kept}
+    for duplicate, target in merges:
+        # severity only goes up; the target's newer summary stays
+        fields = merge_issue(merged[target["id"]], {"severity": duplicate.get("severity")})
+        merged[target["id"]].update(fields)
+
+    resolved_at = datetime.now(timezone.utc).isoformat()
+    for duplicate, target in merges:
+        storage.update_issue(duplicate["id"], {"resolved_at": resolved_at, "merged_into": target["id"]})
+
+    for issue in kept:
+        changed = {}
+        if merged[issue["id"]].get("severity") != issue.get("severity"):
+            changed["severity"] = merged[issue["id"]]["severity"]
+        if issue.get("issue_key") != make_issue_key(issue["title"]):
+            changed["issue_key"] = make_issue_key(issue["title"])
+        if changed:
+            storage.update_issue(issue["id"], changed)
+
+    get_read_cache().invalidate(OPEN_ISSUES, vehicle_id)
+    return len(merges)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicle", help="only this vehicle_id")
+    parser.add_argument("--threshold", type=float, default=ISSUE_DEDUPE_THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true", help="log merges without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        vehicles = [args.vehicle] if args.vehicle else get_storage().list_open_issue_vehicles()
+        total = 0
+        for vehicle_id in vehicles:
+            total += dedupe_vehicle(vehicle_id, args.threshold, args.dry_run)
+        logger.info(
+            "%d duplicate issue(s) %s across %d vehicle(s)",
+            total, "found" if args.dry_run else "merged", len(vehicles),
+        )
+    finally:
+        close_storage()
+
+
+if __name__ == "__main__":
+    main()
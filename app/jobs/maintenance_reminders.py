@@ -0,0 +1,30 @@
+# Run the maintenance reminder scheduler as its own process.
+#
+#     python -m app.jobs.maintenance_reminders
+#
+# Needed with STORAGE_BACKEND=supabase, where API workers can't elect a
+# single runner: start exactly one of these (and leave the API's
+# MAINTENANCE_REMINDERS_ENABLED off, which does nothing there anyway). With
+# postgres it takes the same job lock as the API workers, so extra copies
+# only stand by.
+
+import asyncio
+import logging
+
+from app.services.maintenance_reminders import reminder_scheduler
+from app.storage import close_storage, get_storage
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    reminder_scheduler.single_process = not get_storage().session_locks
+    try:
+        asyncio.run(reminder_scheduler.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_storage()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,172 @@
 from fastapi import FastAPI, Request # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 from fastapi.responses import JSONResponse, Response # type: ignore
+import asyncio
 import logging
 
 from app.routers import vehicle_chat, vehicle_workshops
 from app.routers.maintenance_route import router as maintenance_router
-from app.routers import chathistory 
-
-# App
-app = FastAPI(
-    title="Vehicle Repair AI Agent",
-    version="0.4.0",
+from app.routers import chathistory
+from app.routers import fleet
+from app.clients import clients
+from app.config import (
+    BACKGROUND_WARM_UP,
+    HTTP_WARM_UP,
+    MAINTENANCE_REMINDERS_ENABLED,
+    RETRIEVAL_TOP_K,
 )
+from app.metrics import metrics
+from app.services.fleet_batch import fleet_jobs
+from app.services.maintenance_reminders import reminder_scheduler
+from app.cache import close_read_cache
+from app.cache.search_cache import close_search_cache
+from app.storage import close_storage
+from app.telemetry.consumer import telemetry_consumer
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Preflight OPTIONS (keep this)
-@app.middleware("http")
-async def preflight_middleware(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return Response(status_code=204)
-    return await call_next(request)
-
-# CORS (FINAL, CORRECT)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:8081",
-        "https://finalproject-production-fcdc.up.railway.app",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Global exception handler (DO NOT hardcode origin)
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    logger.exception("Unhandled server error")
-    return JSONResponse(
-        status_code=500,
-        content={"detail": "Internal Server Error"},
-        headers={
-            "Access-Control-Allow-Origin": request.headers.get("origin", "*"),
-            "Access-Control-Allow-Credentials": "true",
-        },
+# Warm-up
+def _load_heavy_modules() -> None:
+    """
+    Build the lazily created clients (langchain, Groq, Supabase, Tavily,
+    numpy) and the similar-case index off the event loop, so the first chat
+    request doesn't pay for it.
+    """
+    from app.agent.vehicle_agent import get_llm, get_prompt
+    from app.agent.retrieval import case_index
+    from app.agent.services.tavily import get_tavily
+    from app.agent.prompts.summary_prompt import build_summary_prompt
+    from app.db.db import supabase
+    import app.services.maintenance_due  # noqa: F401
+
+    get_prompt()
+    get_llm()
+    get_tavily()
+    supabase.get()
+    build_summary_prompt("", "")
+    if RETRIEVAL_TOP_K > 0:
+        case_index.refresh()
+
+
+async def _warm_up() -> None:
+    try:
+        if HTTP_WARM_UP:
+            await clients.warm_up()
+        await asyncio.to_thread(_load_heavy_modules)
+        logger.info("Warm-up finished")
+    except Exception:
+        logger.exception("Warm-up failed")
+
+
+def create_app() -> FastAPI:
+    """
+    App factory. Heavy SDKs are not imported here; they load on first use
+    or in the background warm-up started by the startup hook.
+
+        uvicorn app.main:app
+        uvicorn --factory app.main:create_app
+    """
+    app = FastAPI(
+        title="Vehicle Repair AI Agent",
+        version="0.4.0",
+    )
+
+    # Preflight OPTIONS (keep this)
+    @app.middleware("http")
+    async def preflight_middleware(request: Request, call_next):
+        if request.method == "OPTIONS":
+            return Response(status_code=204)
+        return await call_next(request)
+
+    # CORS (FINAL, CORRECT)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:8081",
+            "https://finalproject-production-fcdc.up.railway.app",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor"],
     )
 
-# Health
-@app.get("/")
-async def root():
-    return {"status": "ok"}
-
-@app.get("/health")
-async def health():
-    return {"ok": True}
-
-@app.get("/version")
-async def version():
-    return {"version": app.version}
-
-# Routers
-app.include_router(vehicle_chat.router)
-app.include_router(vehicle_workshops.router)
-app.include_router(maintenance_router)
-app.include_router(chathistory.router)
-
-# Lifecycle
-@app.on_event("startup")
-async def startup():
-    logger.info("Vehicle Agent started")
-    logger.info("CORS enabled for localhost and Railway")
-
-@app.on_event("shutdown")
-async def shutdown():
-    logger.info("Vehicle Agent stopped")
+    # Global exception handler (DO NOT hardcode origin)
+    @app.exception_handler(Exception)
+    async def global_exception_handler(request: Request, exc: Exception):
+        logger.exception("Unhandled server error")
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Internal Server Error"},
+            headers={
+                "Access-Control-Allow-Origin": request.headers.get("origin", "*"),
+                "Access-Control-Allow-Credentials": "true",
+            },
+        )
+
+    # Health
+    @app.get("/")
+    async def root():
+        return {"status": "ok"}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/version")
+    async def version():
+        return {"version": app.version}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    # Routers
+    app.include_router(vehicle_chat.router)
+    app.include_router(vehicle_workshops.router)
+    app.include_router(maintenance_router)
+    app.include_router(chathistory.router)
+    app.include_router(fleet.router)
+
+    # Lifecycle
+    @app.on_event("startup")
+    async def startup():
+        logger.info("Vehicle Agent started")
+        logger.info("CORS enabled for localhost and Railway")
+
+        clients.start()
+        app.state.warm_up_task = (
+            asyncio.create_task(_warm_up()) if BACKGROUND_WARM_UP else None
+        )
+
+        if MAINTENANCE_REMINDERS_ENABLED:
+            reminder_scheduler.start()
+        telemetry_consumer.start()
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        task = app.state.warm_up_task
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        await reminder_scheduler.stop()
+        await telemetry_consumer.stop()
+        await fleet_jobs.close()
+        close_storage()
+        close_read_cache()
+        close_search_cache()
+        await clients.aclose()
+        logger.info("Vehicle Agent stopped")
+
+    return app
+
+
+# App
+app = create_app()
@@ -0,0 +1,95 @@
+# In-process metrics, exposed at GET /metrics in the Prometheus text format.
+#
+# Counters and summaries (count / sum / max) only; values are per worker
+# process, and Prometheus adds them up across workers. Updated from the event
+# loop and from threadpool workers, hence the lock.
+
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+_Labels = FrozenSet[Tuple[str, str]]
+
+# a summary's max is reported as its quantile 1
+_MAX_QUANTILE = 'quantile="1"'
+
+
+def _label_text(labels: _Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in sorted(labels)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Summary:
+    def __init__(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._series: Dict[Tuple[str, _Labels], object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, cls, name: str, help: str, labels: Optional[Dict[str, str]]):
+        key = (name, frozenset((labels or {}).items()))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    known = self._help.setdefault(name, (kind, help))
+                    if known[0] != kind:
+                        raise ValueError(f"Metric {name} is already a {known[0]}")
+                    series = self._series[key] = cls()
+        return series
+
+    def counter(self, name: str, help: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get("counter", Counter, name, help, labels)
+
+    def summary(self, name: str, help: str, labels: Optional[Dict[str, str]] = None) -> Summary:
+        return self._get("summary", Summary, name, help, labels)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help) in sorted(self._help.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (series_name, labels), series in sorted(
+                self._series.items(), key=lambda item: (item[0][0], sorted(item[0][1]))
+            ):
+                if series_name != name:
+                    continue
+                if isinstance(series, Counter):
+                    lines.append(f"{name}{_label_text(labels)} {series.value:g}")
+                else:
+                    lines.append(f"{name}_count{_label_text(labels)} {series.count}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {series.sum:g}")
+                    lines.append(f"{name}{_label_text(labels, _MAX_QUANTILE)} {series.max:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
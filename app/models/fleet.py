@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field, model_validator # type: ignore
+from typing import List, Optional
+from uuid import UUID
+
+from app.config import FLEET_MAX_CASES
+
+
+class FleetCase(BaseModel):
+    vehicle_id: UUID
+    symptoms: str = Field("", max_length=2000)
+    dtcs: List[str] = Field(default_factory=list, max_length=20)
+    reference: Optional[str] = Field(None, max_length=100)  # caller's own id, echoed back
+
+    @model_validator(mode="after")
+    def _symptoms_or_codes(self) -> "FleetCase":
+        if not self.symptoms.strip() and not self.dtcs:
+            raise ValueError("a case needs symptoms or dtcs")
+        return self
+
+
+class FleetBatchRequest(BaseModel):
+    cases: List[FleetCase] = Field(..., min_length=1, max_length=FLEET_MAX_CASES)
+
+
+class FleetJobAccepted(BaseModel):
+    job_id: str
+    total: int
+    status_url: str
+    stream_url: str
@@ -1,5 +1,5 @@
 from uuid import UUID
-from pydantic import BaseModel # type: ignore
+from pydantic import BaseModel, Field # type: ignore
 from typing import List, Optional, Literal
 
 
@@ -21,3 +21,7 @@ class AgentResponse(BaseModel):
     confidence: float
     chat_id: UUID
     youtube_urls: list[str] = []
+
+
+class IssueResolve(BaseModel):
+    fix: str = Field(..., min_length=1, max_length=2000)  # what solved it
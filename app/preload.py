@@ -0,0 +1,36 @@
+# Preload mode for fork-based servers.
+#
+# Used as a gunicorn config module; gunicorn only reads the names below, so
+# this module does not import gunicorn:
+#
+#     gunicorn app.main:app -c python:app.preload -k uvicorn_worker.UvicornWorker -w 4
+#
+# The master imports the app (and with it OBD_CODES, SYMPTOM_GUARDS and the
+# prompt strings) once before forking, then moves every object alive at that
+# point to the GC's permanent generation. Collections in the workers never
+# touch those objects, so their pages stay shared copy-on-write instead of
+# being dirtied by refcount/GC bookkeeping.
+#
+# Plain `uvicorn --workers N` spawns fresh interpreters instead of forking;
+# there OBD_CODES is still shared through the mmap'd table (app/data/shared.py).
+
+import gc
+
+preload_app = True
+
+
+def preload_shared_data() -> None:
+    """
+    Import the immutable reference data and freeze the heap.
+    """
+    import app.agent.prompts.vehicle_prompt  # noqa: F401
+    import app.agent.vehicle_symptom  # noqa: F401
+    import app.data  # noqa: F401
+
+    gc.collect()
+    gc.freeze()
+
+
+def when_ready(server) -> None:
+    # runs in the master after the app has been loaded, before workers fork
+    preload_shared_data()
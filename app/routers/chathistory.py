@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from app.db.db import supabase
 from app.auth.auth import get_current_user_id
+from app.db.ai_memory import resolve_chat_issue
+from app.models.vehicle_chat import IssueResolve
+from app.services.chat_search import chat_search
 
 router = APIRouter(prefix="/chat", tags=["Chat History"])
 
@@ -40,6 +47,19 @@ async def get_chat_history(user=Depends(get_current_user_id)):
     return list(conversations.values())
 
 
+#ranked search over the user's past turns (prompt, diagnosis, explanation)
+#declared before /{chat_id} so "search" is not taken as a chat id
+@router.get("/search")
+async def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    since: Optional[date] = None,
+    user=Depends(get_current_user_id),
+):
+    results = await run_in_threadpool(chat_search.search, user, q, limit, since)
+    return {"query": q, "results": results}
+
+
 #loads all messages for a specific chat_id
 @router.get("/{chat_id}")
 async def get_chat(chat_id: str, user=Depends(get_current_user_id)):
@@ -54,3 +74,23 @@ async def get_chat(chat_id: str, user=Depends(get_current_user_id)):
         raise HTTPException(status_code=404, detail="Chat not found")
 
     return res.data
+
+
+#closes the chat's issue with the fix that solved it (feeds similar-case retrieval)
+@router.post("/{chat_id}/issue/resolve")
+async def resolve_issue(chat_id: str, payload: IssueResolve, user=Depends(get_current_user_id)):
+    res = supabase.table("ai_chat_history") \
+        .select("chat_id") \
+        .eq("chat_id", chat_id) \
+        .eq("user_id", user) \
+        .limit(1) \
+        .execute()
+
+    if not res.data:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    issue = await run_in_threadpool(resolve_chat_issue, chat_id, payload.fix)
+    if issue is None:
+        raise HTTPException(status_code=404, detail="Chat has no issue")
+
+    return issue
@@ -0,0 +1,69 @@
+import json
+
+from fastapi import APIRouter, Depends, Query  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+from fastapi.responses import StreamingResponse  # type: ignore
+from fastapi.security import HTTPBearer  # type: ignore
+
+from app.auth.auth import verify_token
+from app.db.users import ensure_user_exists
+from app.models.fleet import FleetBatchRequest, FleetJobAccepted
+from app.services.fleet_batch import fleet_jobs
+
+router = APIRouter(
+    prefix="/fleet",
+    tags=["Fleet"]
+)
+
+security = HTTPBearer()
+
+
+@router.post("/diagnose", response_model=FleetJobAccepted, status_code=202)
+async def diagnose_fleet(
+    req: FleetBatchRequest,
+    _=Depends(security),
+    user=Depends(verify_token),
+):
+    # results are saved as chat turns, which need the user row
+    await run_in_threadpool(
+        ensure_user_exists,
+        user_id=user["sub"],
+        email=user.get("email"),
+        name=user.get("name"),
+    )
+
+    job = fleet_jobs.submit(user["sub"], req.cases)
+    return FleetJobAccepted(
+        job_id=job.id,
+        total=len(req.cases),
+        status_url=f"/fleet/jobs/{job.id}",
+        stream_url=f"/fleet/jobs/{job.id}/stream",
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_fleet_job(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Skip results already fetched"),
+    _=Depends(security),
+    user=Depends(verify_token),
+):
+    job = await fleet_jobs.get(user["sub"], job_id)
+    return job.snapshot(offset)
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_fleet_job(
+    job_id: str,
+    _=Depends(security),
+    user=Depends(verify_token),
+):
+    job = await fleet_jobs.get(user["sub"], job_id)
+
+    async def lines():
+        # one result per line as it completes, then the final progress line
+        async for result in job.follow():
+            yield json.dumps({"type": "result", **result}) + "\n"
+        yield json.dumps({"type": "progress", **job.progress()}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
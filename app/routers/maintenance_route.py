@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from app.auth.auth import get_current_user_id
-from app.db.db import supabase
 
 from app.models.maintenance import (
     MaintenanceCreate,
@@ -8,20 +12,72 @@ from app.models.maintenance import (
 )
 
 from app.services.maintenance_service import (
+    list_all_maintenance_service,
     list_maintenance_service,
+    maintenance_summary_service,
     create_maintenance_service,
     update_maintenance_service,
     delete_maintenance_service,
+    maintenance_due_service,
+)
+from app.services.maintenance_rules import get_rules_catalogue
+from app.services.maintenance_bulk import (
+    FORMATS,
+    import_maintenance_stream,
+    iter_maintenance_export,
 )
 
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
 router = APIRouter(prefix="/maintenance")
 
 
 @router.get("/")
 def list_maintenance(
+    response: Response,
+    vehicle_id: Optional[UUID] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; enables X-Next-Cursor paging"),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated column list"),
+    summary: bool = Query(False, description="Latest record per service type per vehicle"),
+    user_id: str = Depends(get_current_user_id),
+):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    filters = dict(
+        vehicle_id=vehicle_id,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+        fields=field_list,
+    )
+
+    if summary:
+        return maintenance_summary_service(user_id, **filters)
+
+    # Without limit/cursor the full list is returned, as before paging existed
+    if limit is None and cursor is None:
+        return list_all_maintenance_service(user_id, **filters)
+
+    rows, next_cursor = list_maintenance_service(
+        user_id, limit=limit or 100, cursor=cursor, **filters
+    )
+
+    # Body stays a plain list; the next page is announced in a header
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/due")
+def maintenance_due(
+    as_of: Optional[date] = None,
+    daily_km: Optional[float] = None,
     user_id: str = Depends(get_current_user_id),
 ):
-    return list_maintenance_service(user_id)
+    return maintenance_due_service(user_id, as_of=as_of, daily_km=daily_km)
 
 
 @router.post("/")
@@ -32,6 +88,42 @@ def create_maintenance(
     return create_maintenance_service(user_id, payload)
 
 
+@router.post("/bulk")
+async def bulk_import_maintenance(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    user_id: str = Depends(get_current_user_id),
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    return await import_maintenance_stream(user_id, request.stream(), fmt)
+
+
+@router.get("/export")
+def export_maintenance(
+    format: str = Query("ndjson", description="csv or ndjson"),
+    vehicle_id: Optional[UUID] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    return StreamingResponse(
+        iter_maintenance_export(
+            user_id,
+            format,
+            vehicle_id=vehicle_id,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="maintenance.{format}"'},
+    )
+
+
 @router.patch("/{maintenance_id}")  # PATCH is correct for partial updates
 def update_maintenance(
     maintenance_id: str,
@@ -50,13 +142,23 @@ def delete_maintenance(
 
 
 @router.get("/rules")
-def list_maintenance_rules():
-    res = (
-        supabase
-        .table("maintenance_rules")
-        .select("service_type, display_name, requires_odometer")
-        .order("display_name")
-        .execute()
-    )
+def list_maintenance_rules(request: Request, response: Response):
+    rules, version = get_rules_catalogue()
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    # 304 when the client already has this catalogue version
+    if_none_match = request.headers.get("if-none-match", "")
+    client_tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
 
-    return res.data
+    response.headers.update(headers)
+    return [
+        {
+            "service_type": r["service_type"],
+            "display_name": r.get("display_name"),
+            "requires_odometer": r.get("requires_odometer"),
+        }
+        for r in rules
+    ]
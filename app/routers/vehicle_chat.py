@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends  # type: ignore
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, Response  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
 from fastapi.security import HTTPBearer  # type: ignore
 
-from app.agent.vehicle_agent import run_vehicle_agent
+from app.agent.vehicle_agent import SWAGGER_DUMMY_UUID
 from app.auth.auth import verify_token
 from app.models.vehicle_chat import ChatRequest, AgentResponse
 from app.db.users import ensure_user_exists  # ✅ ADD THIS
+from app.config import DEGRADED_MAX_CONCURRENT, DEGRADED_ON_SHED
+from app.services.admission import (
+    PRIORITY_NEW_CHAT,
+    PRIORITY_ONGOING_CHAT,
+    LoadShed,
+    chat_admission,
+)
+from app.services.chat_actor import chat_actors
+from app.services.idempotency import chat_idempotency
 
 router = APIRouter(
     prefix="/vehicle",
@@ -13,25 +25,68 @@ router = APIRouter(
 
 security = HTTPBearer()
 
+# degraded turns skip the LLM but still load context, save the turn and take
+# the chat lock, so they get a small budget of their own
+_degraded_slots = asyncio.Semaphore(DEGRADED_MAX_CONCURRENT)
+
 
 @router.post("/chat", response_model=AgentResponse)
 async def chat_vehicle(
     req: ChatRequest,
+    response: Response,
     _=Depends(security),          # Swagger auth
     user=Depends(verify_token),   # Clerk JWT payload
+    idempotency_key: str | None = Header(None, max_length=255),
 ):
+    # Retries of the same submission share one turn instead of running the
+    # agent (and saving the turn) again
+    result, replayed = await chat_idempotency.run(
+        user_id=user["sub"],
+        key=idempotency_key,
+        payload=req.model_dump(mode="json"),
+        work=lambda: _run_turn(req, user),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+async def _run_turn(req: ChatRequest, user: dict):
+    # Finish diagnoses already under way before starting new ones
+    ongoing = req.chat_id is not None and req.chat_id != SWAGGER_DUMMY_UUID
+    priority = PRIORITY_ONGOING_CHAT if ongoing else PRIORITY_NEW_CHAT
+
+    # Rate limit / queue before any work; the agent is blocking, so it
+    # runs in the threadpool and never stalls the event loop, one turn at a
+    # time per chat
+    try:
+        async with chat_admission.admit(user["sub"], priority):
+            return await _submit(req, user)
+    except LoadShed:
+        # Shed for load: answer from the rule engine, which needs no LLM
+        # slot, unless the degraded budget is used up too
+        if not DEGRADED_ON_SHED or _degraded_slots.locked():
+            raise
+
+    async with _degraded_slots:
+        return await _submit(req, user, degraded=True)
+
+
+async def _submit(req: ChatRequest, user: dict, degraded: bool = False):
     # ✅ CRITICAL: ensure FK-safe user record
-    ensure_user_exists(
+    await run_in_threadpool(
+        ensure_user_exists,
         user_id=user["sub"],
         email=user.get("email"),
         name=user.get("name"),
     )
 
-    return run_vehicle_agent(
+    return await chat_actors.submit(
         user_input=req.message,
         chat_id=req.chat_id,
         user_id=user["sub"],
         vehicle_id=req.vehicle_id,
         latitude=req.latitude,
         longitude=req.longitude,
+        degraded=degraded,
     )
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, Query # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
 from fastapi.security import HTTPBearer # type: ignore
 
 from app.auth.auth import verify_token
@@ -22,8 +23,9 @@ async def get_nearby_workshops(
 ):
     workshop_tool = get_workshop_tool()
 
-    result = workshop_tool.func(
-        {"latitude": latitude, "longitude": longitude}
+    # blocking HTTP (Places, Tavily); concurrent identical lookups share one search
+    result = await run_in_threadpool(
+        workshop_tool.func, {"latitude": latitude, "longitude": longitude}
     )
 
     return {
@@ -0,0 +1,211 @@
+# Admission control in front of /vehicle/chat.
+#
+# Three layers, checked in order:
+#   1. per-user token bucket - one user can't flood the service (429)
+#   2. global limit on agent turns in flight - each turn makes its LLM calls
+#      sequentially, so this caps concurrent Groq calls
+#   3. bounded priority queue for turns waiting on a slot - when it is full
+#      the lowest-priority waiter is shed, and waiters give up after
+#      queue_timeout_s, so latency stays bounded instead of growing with load
+# Rejections carry Retry-After, estimated from the measured turn duration.
+# Shed turns (layers 2-3) raise LoadShed, so the route can tell them from a
+# user's rate limit.
+#
+# All state is touched from the event loop only, so no locks are needed.
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+from fastapi import HTTPException
+
+from app.config import (
+    CHAT_BURST,
+    CHAT_QUEUE_MAX,
+    CHAT_QUEUE_TIMEOUT_S,
+    CHAT_RATE_PER_MIN,
+    LLM_MAX_CONCURRENCY,
+)
+
+# Lower value = served first
+PRIORITY_ONGOING_CHAT = 0
+PRIORITY_NEW_CHAT = 1
+
+
+class _Shed(Exception):
+    pass
+
+
+class LoadShed(HTTPException):
+    """
+    429 for a turn shed because the server is busy, as opposed to the
+    user's own rate limit; the chat route can still answer it in degraded
+    mode.
+    """
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated_at = now
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout_s: float,
+        max_users: int = 10_000,
+        initial_service_s: float = 5.0,
+    ) -> None:
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.max_users = max_users
+
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._in_flight = 0
+        # heap of (priority, seq, future); cancelled/finished futures are skipped
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._service_s = initial_service_s  # EWMA of turn duration
+
+        self.stats: Dict[str, int] = {
+            "admitted": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "shed_queue_full": 0,
+            "shed_timeout": 0,
+        }
+
+    # ---------- per-user token bucket ----------
+
+    def _take_token(self, user_id: str, now: float) -> float:
+        """
+        0 if a token was taken, otherwise seconds until one is available.
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)  # least recently active user
+        else:
+            self._buckets.move_to_end(user_id)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate_per_s)
+            bucket.updated_at = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate_per_s
+
+    # ---------- global slots + queue ----------
+
+    def _retry_after(self) -> int:
+        pending = len(self._waiters) + 1
+        return max(1, math.ceil(self._service_s * pending / self.max_concurrent))
+
+    def _reject(self, detail: str, retry_after: float) -> HTTPException:
+        return HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def _shed(self) -> LoadShed:
+        return LoadShed(
+            status_code=429,
+            detail="Server busy, please retry",
+            headers={"Retry-After": str(self._retry_after())},
+        )
+
+    def _release(self, started_at: float) -> None:
+        self._in_flight -= 1
+        self._service_s = 0.8 * self._service_s + 0.2 * (time.monotonic() - started_at)
+
+        while self._waiters and self._in_flight < self.max_concurrent:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                self._in_flight += 1
+                fut.set_result(None)
+
+    async def _wait_for_slot(self, priority: int) -> None:
+        # drop waiters that already gave up before judging the queue full
+        self._waiters = [w for w in self._waiters if not w[2].done()]
+        heapq.heapify(self._waiters)
+
+        entry = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        if len(self._waiters) >= self.max_queue:
+            worst = max(self._waiters)
+            if entry[:2] >= worst[:2]:
+                self.stats["shed_queue_full"] += 1
+                raise self._shed()
+            # the newcomer outranks the worst waiter: shed that one instead
+            self._waiters.remove(worst)
+            heapq.heapify(self._waiters)
+            worst[2].set_exception(_Shed())
+            self.stats["shed_queue_full"] += 1
+
+        fut = entry[2]
+        heapq.heappush(self._waiters, entry)
+        self.stats["queued"] += 1
+
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.stats["shed_timeout"] += 1
+            raise self._shed()
+        except _Shed:
+            raise self._shed()
+        except asyncio.CancelledError:
+            # client went away; hand back a slot granted in the meantime
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self._release(time.monotonic())
+            raise
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, priority: int = PRIORITY_NEW_CHAT) -> AsyncIterator[None]:
+        """
+        Hold a slot for one agent turn, or raise 429 with Retry-After.
+        """
+        wait = self._take_token(user_id, time.monotonic())
+        if wait:
+            self.stats["rate_limited"] += 1
+            raise self._reject("Too many messages, slow down", wait)
+
+        if self._in_flight < self.max_concurrent and not any(not w[2].done() for w in self._waiters):
+            self._in_flight += 1
+        else:
+            await self._wait_for_slot(priority)
+
+        self.stats["admitted"] += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(started_at)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+
+chat_admission = AdmissionController(
+    rate_per_s=CHAT_RATE_PER_MIN / 60,
+    burst=CHAT_BURST,
+    max_concurrent=LLM_MAX_CONCURRENCY,
+    max_queue=CHAT_QUEUE_MAX,
+    queue_timeout_s=CHAT_QUEUE_TIMEOUT_S,
+)
@@ -0,0 +1,170 @@
+# Per-chat sequencing of agent turns.
+#
+# Every chat_id gets a mailbox and a single drain task, so turns of one chat
+# never run concurrently. Before this, two messages that arrived together both
+# loaded the summary, both called the LLM and both upserted the summary, and
+# the last writer won.
+#
+# While turns are queued the drain task:
+#   - loads the chat context once and keeps it up to date in memory
+#     (vehicle_agent.TurnContext) instead of reloading it for each turn,
+#   - answers and saves each turn in order,
+#   - runs the summary / issue update once for the whole batch, when the
+#     queue is empty. Earlier turns in the batch are answered right away;
+#     the last one is answered after the update, as a single turn always was,
+#     so the update runs inside that request's admission slot.
+# The mailbox is dropped as soon as it is empty, so no context outlives the
+# batch.
+#
+# With CHAT_ADVISORY_LOCK=1 the drain task also holds a Postgres advisory lock
+# on the chat (StorageBackend.lock_chat), which serialises turns of a chat
+# across worker processes too.
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List
+from uuid import UUID, uuid4
+
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+
+from app.agent import vehicle_agent
+from app.config import CHAT_ADVISORY_LOCK
+from app.storage import get_storage
+
+
+@dataclass
+class _Turn:
+    user_input: str
+    user_id: str
+    vehicle_id: str | None
+    latitude: float | None
+    longitude: float | None
+    future: asyncio.Future
+    degraded: bool = False
+
+
+@dataclass
+class _Mailbox:
+    pending: Deque[_Turn] = field(default_factory=deque)
+
+
+class ChatActors:
+    def __init__(self, advisory_lock: bool = False) -> None:
+        self.advisory_lock = advisory_lock
+        self._mailboxes: Dict[UUID, _Mailbox] = {}
+
+        self.stats: Dict[str, int] = {"turns": 0, "context_loads": 0, "summary_updates": 0}
+
+    async def submit(
+        self,
+        user_input: str,
+        chat_id: UUID | None,
+        user_id: str,
+        vehicle_id: str | None = None,
+        latitude: float | None = None,
+        longitude: float | None = None,
+        degraded: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Queue a turn on its chat and wait for the agent's response.
+        `degraded` turns are answered by the rule engine, not the LLM.
+        """
+        if chat_id is None or chat_id == vehicle_agent.SWAGGER_DUMMY_UUID:
+            chat_id = uuid4()
+
+        turn = _Turn(
+            user_input, user_id, vehicle_id, latitude, longitude,
+            asyncio.get_running_loop().create_future(), degraded,
+        )
+        mailbox = self._mailboxes.get(chat_id)
+        if mailbox is None:
+            mailbox = self._mailboxes[chat_id] = _Mailbox()
+            asyncio.create_task(self._drain(chat_id, mailbox))
+        mailbox.pending.append(turn)
+        return await turn.future
+
+    async def _drain(self, chat_id: UUID, mailbox: _Mailbox) -> None:
+        lock = None
+        ctx = None
+        answered: List[tuple] = []  # (turn, outcome) awaiting the summary update
+
+        async def flush() -> None:
+            nonlocal answered
+            if answered:
+                batch, answered = answered, []
+                await run_in_threadpool(vehicle_agent.finish_turns, ctx, [o for _, o in batch])
+                self.stats["summary_updates"] += 1
+                _, outcome = batch[-1]
+                _resolve(batch[-1][0], outcome.response)
+
+        try:
+            if self.advisory_lock:
+                lock = await run_in_threadpool(get_storage().lock_chat, str(chat_id))
+
+            while mailbox.pending:
+                turn = mailbox.pending.popleft()
+                if turn.future.done():
+                    continue  # caller went away before the turn started
+
+                try:
+                    if ctx is None or ctx.vehicle_id != turn.vehicle_id:
+                        await flush()
+                        ctx = await run_in_threadpool(
+                            vehicle_agent.load_turn_context, chat_id, turn.vehicle_id
+                        )
+                        self.stats["context_loads"] += 1
+
+                    outcome = await run_in_threadpool(
+                        vehicle_agent.answer_turn,
+                        ctx, turn.user_input, turn.user_id, turn.latitude, turn.longitude,
+                        turn.degraded,
+                    )
+                except Exception as e:
+                    _fail(turn, e)
+                    ctx = None  # reload: the in-memory context may be off now
+                    continue
+                self.stats["turns"] += 1
+
+                if answered:
+                    # not the last turn of the batch: answer now, summarise later
+                    prev_turn, prev_outcome = answered[-1]
+                    _resolve(prev_turn, prev_outcome.response)
+                answered.append((turn, outcome))
+
+                if not mailbox.pending:
+                    await flush()  # turns queued meanwhile join the next batch
+
+            # no await between the empty check and this: a turn submitted from
+            # here on creates a fresh mailbox and drain task
+            del self._mailboxes[chat_id]
+        except BaseException as e:
+            self._mailboxes.pop(chat_id, None)
+            for turn, _ in answered:
+                _fail(turn, e)
+            for turn in mailbox.pending:
+                _fail(turn, e)
+            raise
+        finally:
+            if lock is not None:
+                await run_in_threadpool(get_storage().unlock_chat, lock)
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._mailboxes)
+
+
+def _resolve(turn: _Turn, response: Dict[str, Any]) -> None:
+    if not turn.future.done():
+        turn.future.set_result(response)
+
+
+def _fail(turn: _Turn, exc: BaseException) -> None:
+    if not turn.future.done():
+        if isinstance(exc, asyncio.CancelledError):
+            turn.future.cancel()
+        else:
+            turn.future.set_exception(exc)
+
+
+chat_actors = ChatActors(advisory_lock=CHAT_ADVISORY_LOCK)
@@ -0,0 +1,217 @@
+# Full-text search over a user's chat history (GET /chat/search).
+#
+# Each user gets an in-memory inverted index over the prompt and the agent's
+# diagnosis / explanation of every turn, ranked with BM25 (the diagnosis
+# counts double). The index is built on the user's first search by paging
+# their turns in (created_at, id) order; every later search first pulls the
+# turns saved since the last indexed one with the same keyset query, which is
+# usually empty, so turns saved by any worker are found. Indexes of the least
+# recently searching users are dropped once SEARCH_INDEX_MAX_TURNS turns are
+# held in total.
+
+import bisect
+import heapq
+import html
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import SEARCH_INDEX_MAX_TURNS
+from app.db.issue_index import stem
+from app.storage import get_storage
+
+FIELD_WEIGHTS = {"prompt": 1, "diagnosis": 2, "explanation": 1}
+K1 = 1.2
+B = 0.75
+PAGE_SIZE = 1000
+SNIPPET_CHARS = 160
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "about", "an", "and", "are", "at", "be", "but", "by", "did", "do", "does",
+    "for", "from", "had", "has", "have", "how", "i", "in", "is", "it", "its", "me",
+    "my", "of", "on", "or", "say", "said", "so", "that", "the", "this", "to", "was",
+    "what", "when", "with", "you",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        stem(w) for w in (m.lower() for m in _WORD.findall(text or "")) if w not in _STOPWORDS
+    ]
+
+
+def highlight(text: str, terms: frozenset, width: int = SNIPPET_CHARS) -> Optional[str]:
+    """
+    HTML-escaped snippet around the first match, matches wrapped in <mark>.
+    None if no term occurs in `text`.
+    """
+    matches = [m for m in _WORD.finditer(text or "") if stem(m.group().lower()) in terms]
+    if not matches:
+        return None
+
+    start = max(0, matches[0].start() - width // 3)
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < matches[0].start() else start
+    end = min(len(text), start + width)
+
+    out = ["…"] if start else []
+    pos = start
+    for m in matches:
+        if m.start() < start or m.end() > end:
+            continue
+        out.append(html.escape(text[pos:m.start()]))
+        out.append(f"<mark>{html.escape(m.group())}</mark>")
+        pos = m.end()
+    out.append(html.escape(text[pos:end]))
+    if end < len(text):
+        out.append("…")
+    return "".join(out)
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class UserIndex:
+    """
+    BM25 index over one user's turns, in (created_at, id) order.
+    """
+
+    def __init__(self) -> None:
+        self.docs: List[Dict[str, Any]] = []
+        self.times: List[datetime] = []
+        self.lengths: List[int] = []
+        self.total_length = 0
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(doc, weighted tf)]
+        self.after: Optional[Tuple[str, Any]] = None  # keyset position of the last turn
+        self.lock = threading.Lock()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        counts: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(row.get(field) or ""):
+                counts[term] += weight
+
+        doc = len(self.docs)
+        self.docs.append({
+            "chat_id": row["chat_id"],
+            "created_at": row["created_at"],
+            **{field: row.get(field) for field in FIELD_WEIGHTS},
+        })
+        self.times.append(_parse_time(row["created_at"]))
+        length = sum(counts.values())
+        self.lengths.append(length)
+        self.total_length += length
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append((doc, tf))
+        self.after = (row["created_at"], row["id"])
+
+    def catch_up(self, user_id: str) -> int:
+        """
+        Index turns saved since the last indexed one. Returns how many.
+        """
+        storage = get_storage()
+        added = 0
+        while True:
+            rows = storage.list_user_turns(user_id, self.after, PAGE_SIZE)
+            for row in rows:
+                self.add(row)
+            added += len(rows)
+            if len(rows) < PAGE_SIZE:
+                return added
+
+    def search(self, terms: List[str], limit: int, since: Optional[datetime]) -> List[Tuple[int, float]]:
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_length = self.total_length / n or 1
+        first = bisect.bisect_left(self.times, since) if since else 0
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            # docs are appended in time order, so postings are sorted by doc
+            start = bisect.bisect_left(posting, (first, 0)) if first else 0
+            for doc, tf in posting[start:]:
+                norm = K1 * (1 - B + B * self.lengths[doc] / avg_length)
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+class ChatSearch:
+    def __init__(self, max_turns: int) -> None:
+        self.max_turns = max_turns
+        self._indexes: "OrderedDict[str, UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index_for(self, user_id: str) -> UserIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = UserIndex()
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = sum(len(index) for index in self._indexes.values())
+            while total > self.max_turns and len(self._indexes) > 1:
+                _, index = self._indexes.popitem(last=False)
+                total -= len(index)
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 10,
+        since: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Best matching turns of `user_id`, highest score first.
+        Blocking (may page in the user's history): call from a thread.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        since_dt = datetime.combine(since, datetime.min.time(), timezone.utc) if since else None
+        index = self._index_for(user_id)
+        with index.lock:
+            if index.catch_up(user_id):
+                self._evict()
+            hits = index.search(terms, limit, since_dt)
+            docs = [(index.docs[doc], score) for doc, score in hits]
+
+        wanted = frozenset(terms)
+        results = []
+        for doc, score in docs:
+            highlights = {}
+            for field in FIELD_WEIGHTS:
+                snippet = highlight(doc[field], wanted)
+                if snippet:
+                    highlights[field] = snippet
+            results.append({
+                "chat_id": doc["chat_id"],
+                "created_at": doc["created_at"],
+                "score": round(score, 3),
+                "prompt": doc["prompt"],
+                "diagnosis": doc["diagnosis"],
+                "highlights": highlights,
+            })
+        return results
+
+
+chat_search = ChatSearch(SEARCH_INDEX_MAX_TURNS)
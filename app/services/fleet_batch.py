@@ -0,0 +1,467 @@
+# Batch diagnosis for fleets: many vehicle cases per request, run as a job.
+#
+# A case with trouble codes only, all of them in the OBD reference table, is
+# answered from the table without the LLM. The other cases are packed
+# FLEET_PACK_SIZE to a prompt (one call answers several vehicles, which is
+# the only batching the chat completion API offers) and at most
+# FLEET_LLM_CONCURRENCY packs are in flight per process. Batch calls also
+# step aside while interactive chat has every admission slot busy. Cases a
+# packed reply leaves out, or a whole pack that failed, are retried one by
+# one; a case that still fails gets an error result instead of sinking the
+# job.
+# While the LLM circuit is open (app/agent/degraded.py) the cases are
+# answered by the rule engine instead.
+#
+# Every result is saved as a chat turn (new chat per case) so it shows up
+# in chat history and search. Turns are written FLEET_PERSIST_CHUNK at a
+# time through StorageBackend.save_chat_turns.
+#
+# A job runs in the worker that accepted it. Its state (progress and
+# results) is checkpointed to the fleet_jobs table at start, every
+# FLEET_PERSIST_CHUNK results and at the end, so GET /fleet/jobs/{id} and
+# the NDJSON stream work on any worker: the owning worker serves its live
+# job, the others read the table (the stream polls it every FLEET_POLL_S and
+# advances a chunk at a time). A job is pollable FLEET_JOB_TTL_S after it
+# ends. FLEET_MAX_ACTIVE_JOBS is enforced per worker.
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+
+from app.agent.degraded import diagnose_codes, llm_circuit, rule_engine
+from app.agent.prompts.fleet_prompt import build_fleet_prompt
+from app.agent.tools.dtc_lookup import decode_dtcs
+from app.config import (
+    FLEET_JOB_TTL_S,
+    FLEET_LLM_CONCURRENCY,
+    FLEET_MAX_ACTIVE_JOBS,
+    FLEET_PACK_SIZE,
+    FLEET_PERSIST_CHUNK,
+    FLEET_POLL_S,
+)
+from app.metrics import metrics
+from app.models.fleet import FleetCase
+from app.services.admission import chat_admission
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = {"DIY", "CONFIRM_WORKSHOP", "ESCALATE", "ASK"}
+YIELD_POLL_S = 0.2  # how often a waiting pack looks at chat load again
+
+
+def _count(source: str) -> None:
+    metrics.counter(
+        "fleet_cases_total", "Fleet batch cases by how they were answered", {"source": source}
+    ).inc()
+
+
+def resolve_locally(case: FleetCase) -> Optional[Dict[str, Any]]:
+    """
+    Result from the OBD table alone, or None when the case needs the LLM
+    (symptoms given, no codes, or a code the table doesn't know).
+    """
+    if case.symptoms.strip() or not case.dtcs:
+        return None
+    decoded = decode_dtcs(case.dtcs)
+    if not decoded or any("system" not in info for info in decoded.values()):
+        return None
+    return diagnose_codes(decoded)
+
+
+def _llm_case(index: int, case: FleetCase) -> Dict[str, Any]:
+    return {"case": index, "symptoms": case.symptoms, "dtcs": decode_dtcs(case.dtcs)}
+
+
+def _parse_pack(text: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Case number -> answer from a packed reply; unusable entries are dropped.
+    """
+    start, end = text.find("["), text.rfind("]") + 1
+    if start == -1 or end == 0:
+        return {}
+    try:
+        items = json.loads(text[start:end])
+    except ValueError:
+        return {}
+
+    answers: Dict[int, Dict[str, Any]] = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            answers[int(item["case"])] = {
+                "diagnosis": str(item["diagnosis"]),
+                "explanation": str(item.get("explanation", "")),
+                "severity": float(item.get("severity", 0.5)),
+                "action": item["action"] if item.get("action") in ACTIONS else "ASK",
+                "confidence": float(item.get("confidence", 0.5)),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return answers
+
+
+def _ask_llm(pack: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    from app.agent.vehicle_agent import get_llm
+
+    return _parse_pack(get_llm().invoke(build_fleet_prompt(pack)).content)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+class _JobView:
+    """
+    Progress and results of a job, as served to the client.
+    """
+
+    id: str
+    user_id: str
+    status: str
+    total: int
+    results: List[Dict[str, Any]]
+    counts: Dict[str, int]
+    llm_calls: int
+    saved: int
+    finished_at: Optional[float]
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "saved": self.saved,
+            "counts": dict(self.counts),
+            "llm_calls": self.llm_calls,
+        }
+
+    def snapshot(self, offset: int = 0) -> Dict[str, Any]:
+        return {**self.progress(), "results": self.results[offset:]}
+
+
+class FleetJob(_JobView):
+    def __init__(self, user_id: str, cases: List[FleetCase]) -> None:
+        self.id = str(uuid4())
+        self.user_id = user_id
+        self.cases = cases
+        self.total = len(cases)
+        self.status = "running"
+        self.results: List[Dict[str, Any]] = []
+        self.counts = {"local": 0, "llm": 0, "rules": 0, "error": 0}
+        self.llm_calls = 0
+        self.saved = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+        self._unsaved: List[Dict[str, Any]] = []
+        self._checkpointed = 0  # results in the last stored state
+        self._changed = asyncio.Condition()
+
+    def state(self) -> Dict[str, Any]:
+        """
+        The fleet_jobs row for this job.
+        """
+        finished = self.finished_at
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "total": self.total,
+            "counts": dict(self.counts),
+            "llm_calls": self.llm_calls,
+            "saved": self.saved,
+            "results": list(self.results),
+            "finished_at": datetime.fromtimestamp(finished, timezone.utc).isoformat() if finished else None,
+        }
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Every result, as it arrives, until the job ends.
+        """
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.results) > sent or self.done)
+                batch = self.results[sent:]
+                finished = self.done
+            for result in batch:
+                yield result
+            sent += len(batch)
+            if finished:
+                return
+
+    async def _add(self, index: int, source: str, answer: Dict[str, Any]) -> None:
+        case = self.cases[index]
+        chat_id = str(uuid4())
+        result = {
+            "index": index,
+            "reference": case.reference,
+            "vehicle_id": str(case.vehicle_id),
+            "source": source,
+            "chat_id": chat_id if source != "error" else None,
+            **answer,
+        }
+        self.counts[source] += 1
+        _count(source)
+
+        if source != "error":
+            prompt = case.symptoms.strip() or "Trouble codes: " + ", ".join(case.dtcs)
+            self._unsaved.append({
+                "chat_id": chat_id,
+                "user_id": self.user_id,
+                "vehicle_id": str(case.vehicle_id),
+                "prompt": prompt,
+                "response_ai": {
+                    "steps": [],
+                    "follow_up_questions": [],
+                    "youtube_urls": [],
+                    **answer,
+                    "chat_id": chat_id,
+                },
+            })
+
+        async with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+        if len(self.results) - self._checkpointed >= FLEET_PERSIST_CHUNK:
+            await self._flush()
+            await self._persist()
+
+    async def _flush(self) -> None:
+        rows, self._unsaved = self._unsaved, []
+        if not rows:
+            return
+        try:
+            await run_in_threadpool(get_storage().save_chat_turns, rows)
+            self.saved += len(rows)
+        except Exception:
+            # the results are still served from the job; only history misses them
+            logger.exception("Saving %d fleet turns failed (job %s)", len(rows), self.id)
+            metrics.counter("fleet_save_errors_total", "Failed bulk saves of fleet turns").inc()
+
+    async def _persist(self) -> None:
+        state = self.state()
+        try:
+            await run_in_threadpool(get_storage().save_fleet_job, state)
+            self._checkpointed = len(state["results"])
+        except Exception:
+            # this worker still serves the job; other workers see an older state
+            logger.exception("Saving fleet job state failed (job %s)", self.id)
+            metrics.counter("fleet_state_save_errors_total", "Failed saves of fleet job state").inc()
+
+    async def _finish(self, status: str) -> None:
+        await self._flush()
+        async with self._changed:
+            self.status = status
+            self.finished_at = time.time()
+            self._changed.notify_all()
+        await self._persist()
+
+
+class StoredFleetJob(_JobView):
+    """
+    A job run by another worker, read from fleet_jobs.
+    """
+
+    def __init__(self, row: Dict[str, Any]) -> None:
+        self._load(row)
+
+    def _load(self, row: Dict[str, Any]) -> None:
+        self.id = str(row["id"])
+        self.user_id = row["user_id"]
+        self.status = row["status"]
+        self.total = row["total"]
+        self.results = row.get("results") or []
+        self.counts = row.get("counts") or {}
+        self.llm_calls = row.get("llm_calls") or 0
+        self.saved = row.get("saved") or 0
+        self.finished_at = _timestamp(row.get("finished_at"))
+        self.updated_at = _timestamp(row.get("updated_at")) or time.time()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Every stored result until the job ends. A running job whose state
+        hasn't changed for FLEET_JOB_TTL_S (its worker died) ends the stream.
+        """
+        sent = 0
+        while True:
+            batch = self.results[sent:]
+            for result in batch:
+                yield result
+            sent += len(batch)
+            if self.done or time.time() - self.updated_at > FLEET_JOB_TTL_S:
+                return
+            await asyncio.sleep(FLEET_POLL_S)
+            row = await run_in_threadpool(get_storage().load_fleet_job, self.id)
+            if row is None:
+                return
+            self._load(row)
+
+
+class FleetJobs:
+    def __init__(
+        self,
+        pack_size: int = FLEET_PACK_SIZE,
+        llm_concurrency: int = FLEET_LLM_CONCURRENCY,
+        max_active_per_user: int = FLEET_MAX_ACTIVE_JOBS,
+        ttl_s: float = FLEET_JOB_TTL_S,
+    ) -> None:
+        self.pack_size = max(1, pack_size)
+        self.max_active_per_user = max_active_per_user
+        self.ttl_s = ttl_s
+        self._llm_slots = asyncio.Semaphore(llm_concurrency)
+        self._jobs: Dict[str, FleetJob] = {}
+
+    def _evict(self, now: float) -> None:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at + self.ttl_s <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, user_id: str, cases: List[FleetCase]) -> FleetJob:
+        """
+        Start a job for `cases`, or raise 429 if the user already has
+        FLEET_MAX_ACTIVE_JOBS running.
+        """
+        self._evict(time.time())
+        active = sum(1 for job in self._jobs.values() if job.user_id == user_id and not job.done)
+        if active >= self.max_active_per_user:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many fleet jobs running, wait for one to finish",
+                headers={"Retry-After": "30"},
+            )
+
+        job = FleetJob(user_id, cases)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def get(self, user_id: str, job_id: str) -> _JobView:
+        """
+        The job if this worker runs it, else its stored state.
+        """
+        job: Optional[_JobView] = self._jobs.get(job_id)
+        if job is None and _is_uuid(job_id):
+            row = await run_in_threadpool(get_storage().load_fleet_job, job_id)
+            job = StoredFleetJob(row) if row else None
+            if job and job.finished_at is not None and job.finished_at + self.ttl_s <= time.time():
+                job = None
+        # other users' jobs are reported missing, not forbidden
+        if job is None or job.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Fleet job not found")
+        return job
+
+    async def _yield_to_chat(self) -> None:
+        while chat_admission.in_flight >= chat_admission.max_concurrent:
+            await asyncio.sleep(YIELD_POLL_S)
+
+    async def _call(self, job: FleetJob, pack: List[Dict[str, Any]]) -> Optional[Dict[int, Dict[str, Any]]]:
+        """
+        Answers for a pack, or None while the LLM circuit is open.
+        """
+        async with self._llm_slots:
+            await self._yield_to_chat()
+            if not llm_circuit.allow():
+                return None
+            job.llm_calls += 1
+            started = time.monotonic()
+            try:
+                answers = await run_in_threadpool(_ask_llm, pack)
+            except Exception as exc:
+                llm_circuit.record_failure(exc)
+                raise
+            finally:
+                metrics.summary(
+                    "fleet_llm_call_seconds", "LLM call duration per fleet pack"
+                ).observe(time.monotonic() - started)
+            llm_circuit.record_success()
+            return answers
+
+    async def _run_pack(self, job: FleetJob, indexes: List[int]) -> None:
+        pack = [_llm_case(i, job.cases[i]) for i in indexes]
+        try:
+            answers = await self._call(job, pack)
+        except Exception:
+            logger.warning("Fleet pack of %d failed (job %s)", len(pack), job.id, exc_info=True)
+            answers = {}
+
+        if answers is None:
+            for i in indexes:
+                case = job.cases[i]
+                answer, _ = rule_engine.diagnose(" ".join([case.symptoms, *case.dtcs]))
+                await job._add(i, "rules", answer)
+            return
+
+        missing = []
+        for i in indexes:
+            if i in answers:
+                await job._add(i, "llm", answers[i])
+            else:
+                missing.append(i)
+
+        if len(indexes) > 1:
+            # a reply that dropped cases usually answers them asked alone
+            await asyncio.gather(*(self._run_pack(job, [i]) for i in missing))
+            return
+        for i in missing:
+            await job._add(i, "error", {"error": "No diagnosis could be produced for this case"})
+
+    async def _run(self, job: FleetJob) -> None:
+        try:
+            await job._persist()  # visible to the other workers from now on
+            remote = []
+            for i, case in enumerate(job.cases):
+                answer = resolve_locally(case)
+                if answer is None:
+                    remote.append(i)
+                else:
+                    await job._add(i, "local", answer)
+
+            packs = [remote[i:i + self.pack_size] for i in range(0, len(remote), self.pack_size)]
+            await asyncio.gather(*(self._run_pack(job, pack) for pack in packs))
+            await job._finish("done")
+        except asyncio.CancelledError:
+            await job._finish("cancelled")
+            raise
+        except Exception:
+            logger.exception("Fleet job %s failed", job.id)
+            await job._finish("failed")
+        finally:
+            metrics.counter("fleet_jobs_total", "Finished fleet jobs", {"status": job.status}).inc()
+
+    async def close(self) -> None:
+        """
+        Cancel running jobs (app shutdown); finished results are flushed.
+        """
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+fleet_jobs = FleetJobs()
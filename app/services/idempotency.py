@@ -0,0 +1,115 @@
+# Idempotent chat submissions.
+#
+# Mobile clients retry POST /vehicle/chat when the network drops. Without
+# this every retry ran the whole LLM pipeline again and saved the turn twice.
+#
+# - Requests are keyed by (user, Idempotency-Key header). Clients that don't
+#   send the header are keyed by a fingerprint of the request body instead.
+# - The first request starts the turn as its own task. Identical requests
+#   arriving while it runs await the same task, and the turn keeps running
+#   if the original client disconnects, so a retry picks it up.
+# - Successful results with an explicit key are kept for IDEMPOTENCY_TTL_S.
+#   Body-keyed results are not: the same message sent again later is a new
+#   turn. Failures are never kept, so a retry after an error runs again.
+# - Reusing a key with a different body is a client bug and returns 422.
+#
+# State is per process. With several workers a retry that lands on another
+# worker runs again, as before. All state is touched from the event loop only.
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config import IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_S
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "expires_at")
+
+    def __init__(self, fingerprint: str, task: asyncio.Task) -> None:
+        self.fingerprint = fingerprint
+        self.task = task
+        self.expires_at: Optional[float] = None  # set once the task succeeds
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+
+        self.stats: Dict[str, int] = {"executed": 0, "coalesced": 0, "replayed": 0}
+
+    def _evict(self, now: float) -> None:
+        # entries are appended in creation order, so expired ones are mostly
+        # at the front; stop at the first live one
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at is not None and entry.expires_at <= now:
+                del self._entries[key]
+            elif len(self._entries) > self.max_entries and entry.task.done():
+                del self._entries[key]
+            else:
+                break
+
+    def _finished(self, key: Tuple[str, str], entry: _Entry, cache: bool, task: asyncio.Task) -> None:
+        if cache and not task.cancelled() and task.exception() is None:
+            entry.expires_at = time.monotonic() + self.ttl_s
+        elif self._entries.get(key) is entry:
+            del self._entries[key]
+
+    async def run(
+        self,
+        user_id: str,
+        key: Optional[str],
+        payload: Dict[str, Any],
+        work: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        Run `work` once per (user, key) and share its result.
+        Returns (result, replayed): replayed is True when this request did
+        not start the turn itself.
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        body = fingerprint(payload)
+        scoped = (user_id, f"key:{key}" if key else f"body:{body}")
+
+        entry = self._entries.get(scoped)
+        if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+            del self._entries[scoped]
+            entry = None
+
+        if entry is not None:
+            if entry.fingerprint != body:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request",
+                )
+            self.stats["replayed" if entry.task.done() else "coalesced"] += 1
+            return await asyncio.shield(entry.task), True
+
+        entry = _Entry(body, asyncio.ensure_future(work()))
+        self._entries[scoped] = entry
+        entry.task.add_done_callback(
+            lambda task: self._finished(scoped, entry, bool(key), task)
+        )
+        self.stats["executed"] += 1
+        return await asyncio.shield(entry.task), False
+
+
+chat_idempotency = IdempotencyStore(
+    ttl_s=IDEMPOTENCY_TTL_S,
+    max_entries=IDEMPOTENCY_MAX_ENTRIES,
+)
@@ -0,0 +1,265 @@
+# Streaming bulk import / export of vehicle_maintenance records.
+#
+# Import reads the request body incrementally (CSV or NDJSON), validates rows
+# with MaintenanceCreate in chunks (in the threadpool, as the service_type
+# check may hit the DB) and inserts each chunk with one multi-row insert. If a chunk is rejected by the DB it is retried row by row so every
+# bad row gets its own error. Export writes rows as they are read page by page.
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError  # type: ignore
+
+from app.models.maintenance import MaintenanceCreate
+from app.services.maintenance_reminders import reminder_scheduler
+from app.storage import get_storage
+from app.services.maintenance_service import (
+    MAINTENANCE_COLUMNS,
+    build_maintenance_row,
+    list_maintenance_service,
+)
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+EXPORT_PAGE_SIZE = 500
+MAX_CSV_RECORD_CHARS = 64 * 1024  # a multi-line quoted record longer than this fails its row
+
+FORMATS = ("csv", "ndjson")
+
+
+# --------------------------------------------------
+# Parsing
+# --------------------------------------------------
+
+def _decode(line: bytes, first: bool) -> tuple[Optional[str], Optional[str]]:
+    # utf-8-sig drops the BOM Excel puts in front of the header
+    try:
+        return line.decode("utf-8-sig" if first else "utf-8").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return None, f"invalid UTF-8 at byte {e.start}"
+
+
+async def _aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[Optional[str], Optional[str]]]:
+    """
+    Yields (line, decode_error); exactly one of the two is set.
+    """
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield _decode(line, first)
+            first = False
+    if pending:
+        yield _decode(pending, first)
+
+
+async def _aiter_records(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+) -> AsyncIterator[tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yields (row_number, record, parse_error). Row numbers are 1-based data rows.
+    """
+    header: Optional[List[str]] = None
+    row_no = 0
+    carry = ""
+
+    async for line, decode_error in _aiter_lines(chunks):
+        if decode_error:
+            if fmt == "csv" and header is None:
+                raise HTTPException(status_code=400, detail=f"CSV header: {decode_error}")
+            carry = ""
+            row_no += 1
+            yield row_no, None, decode_error
+            continue
+
+        if fmt == "csv":
+            # a quoted field may contain newlines: keep reading until quotes balance
+            line = f"{carry}\n{line}" if carry else line
+            if line.count('"') % 2:
+                if len(line) <= MAX_CSV_RECORD_CHARS:
+                    carry = line
+                    continue
+                # most likely a stray quote; give up on this row and resync
+                carry = ""
+                if header is None:
+                    raise HTTPException(status_code=400, detail="CSV header: unterminated quoted field")
+                row_no += 1
+                yield row_no, None, f"quoted field longer than {MAX_CSV_RECORD_CHARS} characters"
+                continue
+            carry = ""
+
+            if not line.strip():
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+
+            row_no += 1
+            # empty CSV cells mean "not provided"
+            yield row_no, {k: (v if v != "" else None) for k, v in zip(header, values)}, None
+
+        else:
+            if not line.strip():
+                continue
+            row_no += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_no, None, f"invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row_no, None, "expected a JSON object"
+                continue
+            yield row_no, record, None
+
+    if carry:
+        if header is None:
+            raise HTTPException(status_code=400, detail="CSV header: unterminated quoted field")
+        row_no += 1
+        yield row_no, None, "unterminated quoted field"
+
+
+# --------------------------------------------------
+# Import
+# --------------------------------------------------
+
+def _insert_chunk(rows: List[tuple[int, Dict[str, Any]]]) -> tuple[int, List[Dict[str, Any]]]:
+    """
+    Multi-row insert; on failure fall back to per-row inserts for error detail.
+    """
+    storage = get_storage()
+    try:
+        for row in storage.insert_maintenance([row for _, row in rows]):
+            reminder_scheduler.schedule(row)
+        return len(rows), []
+
+    except Exception:
+        inserted = 0
+        errors: List[Dict[str, Any]] = []
+        for row_no, row in rows:
+            try:
+                for inserted_row in storage.insert_maintenance([row]):
+                    reminder_scheduler.schedule(inserted_row)
+                inserted += 1
+            except Exception as e:
+                errors.append({"row": row_no, "error": str(e)})
+        return inserted, errors
+
+
+def _import_chunk(
+    user_id: str,
+    records: List[tuple[int, Dict[str, Any]]],
+) -> tuple[int, List[Dict[str, Any]]]:
+    """
+    Validate and insert one chunk. Runs in the threadpool: the service_type
+    check may (re)load the rules catalogue from the DB.
+    """
+    rows: List[tuple[int, Dict[str, Any]]] = []
+    errors: List[Dict[str, Any]] = []
+    for row_no, record in records:
+        try:
+            rows.append((row_no, build_maintenance_row(user_id, MaintenanceCreate(**record))))
+        except ValidationError as e:
+            errors.append({"row": row_no, "error": "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            )})
+        except HTTPException as e:
+            errors.append({"row": row_no, "error": str(e.detail)})
+
+    inserted, insert_errors = _insert_chunk(rows) if rows else (0, [])
+    # report in row order
+    return inserted, sorted(errors + insert_errors, key=lambda e: e["row"])
+
+
+async def import_maintenance_stream(
+    user_id: str,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+) -> Dict[str, Any]:
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    total = 0
+    inserted = 0
+    errors: List[Dict[str, Any]] = []
+    error_count = 0
+    chunk: List[tuple[int, Dict[str, Any]]] = []  # (row_no, raw record)
+
+    def add_error(row_no: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": message})
+
+    async def flush() -> None:
+        nonlocal inserted
+        if not chunk:
+            return
+        ok, chunk_errors = await run_in_threadpool(_import_chunk, user_id, list(chunk))
+        inserted += ok
+        for e in chunk_errors:
+            add_error(e["row"], e["error"])
+        chunk.clear()
+
+    async for row_no, record, parse_error in _aiter_records(chunks, fmt):
+        total += 1
+        if parse_error:
+            add_error(row_no, parse_error)
+            continue
+
+        chunk.append((row_no, record))
+        if len(chunk) >= CHUNK_SIZE:
+            await flush()
+
+    await flush()
+
+    return {
+        "rows": total,
+        "inserted": inserted,
+        "failed": error_count,
+        "errors": errors,
+    }
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+
+def iter_maintenance_export(user_id: str, fmt: str, **filters) -> Iterator[str]:
+    """
+    Yields the export page by page as it is read (fmt is checked by the caller).
+    """
+    columns = filters.get("fields") or list(MAINTENANCE_COLUMNS)
+
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        yield buf.getvalue()
+
+    cursor = None
+    while True:
+        rows, cursor = list_maintenance_service(
+            user_id, limit=EXPORT_PAGE_SIZE, cursor=cursor, **filters
+        )
+
+        if fmt == "csv":
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(rows)
+            yield buf.getvalue()
+        else:
+            yield "".join(
+                json.dumps({k: r.get(k) for k in columns}, default=str) + "\n" for r in rows
+            )
+
+        if not cursor:
+            break
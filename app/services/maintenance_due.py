@@ -0,0 +1,237 @@
+# Vectorized maintenance due-date engine.
+#
+# Computes next_due_km / next_due_date / status for many vehicles in one
+# NumPy pass from maintenance_rules intervals, service history and
+# odometer projections, without writing anything to the DB. Used for
+# dashboards and "what-if" queries (different as_of date or daily km).
+#
+# Expected maintenance_rules columns: service_type, interval_km,
+# interval_months (either interval may be null).
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np  # type: ignore
+
+
+STATUS_OK = "ok"
+STATUS_DUE_SOON = "due_soon"
+STATUS_OVERDUE = "overdue"
+STATUS_UNKNOWN = "unknown"
+
+# Used when a vehicle has too little odometer history to estimate usage
+DEFAULT_DAILY_KM = 35.0
+MIN_RATE_SPAN_DAYS = 14
+
+
+@dataclass
+class ServiceHistory:
+    """
+    Columnar service history (one entry per vehicle_maintenance row).
+    """
+    vehicle_id: np.ndarray      # str
+    service_type: np.ndarray    # str
+    service_date: np.ndarray    # datetime64[D]
+    odometer_km: np.ndarray     # float64, NaN when unknown
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ServiceHistory":
+        rows = list(records)
+        return cls(
+            vehicle_id=np.array([str(r["vehicle_id"]) for r in rows], dtype=str),
+            service_type=np.array([r["service_type"] for r in rows], dtype=str),
+            service_date=np.array(
+                [str(r["service_date"])[:10] for r in rows], dtype="datetime64[D]"
+            ),
+            odometer_km=np.array(
+                [np.nan if r.get("odometer_km") is None else r["odometer_km"] for r in rows],
+                dtype=np.float64,
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.vehicle_id)
+
+
+# --------------------------------------------------
+# Helpers
+# --------------------------------------------------
+
+def _add_months(days: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    days: datetime64[D], months: int64. Day-of-month is clamped to the
+    target month's length (31 Jan + 1 month = 28/29 Feb).
+    """
+    month_start = days.astype("datetime64[M]")
+    day_offset = (days - month_start.astype("datetime64[D]")).astype(np.int64)
+
+    target = month_start + months
+    month_len = (
+        (target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")
+    ).astype(np.int64)
+
+    return target.astype("datetime64[D]") + np.minimum(day_offset, month_len - 1)
+
+
+def _rule_columns(rules: List[Dict[str, Any]], types: np.ndarray):
+    """
+    interval_km / interval_months per unique service type (NaN if no rule).
+    """
+    by_type = {r["service_type"]: r for r in rules}
+    km = np.full(len(types), np.nan)
+    months = np.full(len(types), np.nan)
+
+    for i, t in enumerate(types):
+        rule = by_type.get(t)
+        if not rule:
+            continue
+        if rule.get("interval_km"):
+            km[i] = rule["interval_km"]
+        if rule.get("interval_months"):
+            months[i] = rule["interval_months"]
+
+    return km, months
+
+
+# --------------------------------------------------
+# Engine
+# --------------------------------------------------
+
+def compute_due_arrays(
+    history: ServiceHistory,
+    rules: List[Dict[str, Any]],
+    as_of: Optional[date] = None,
+    daily_km: Optional[float] = None,
+    due_soon_km: float = 1000,
+    due_soon_days: int = 30,
+) -> Dict[str, np.ndarray]:
+    """
+    One row per (vehicle, service_type), based on the latest service of that
+    type. `daily_km` overrides the per-vehicle usage estimate (what-if).
+    """
+    if len(history) == 0:
+        return {k: np.array([]) for k in (
+            "vehicle_id", "service_type", "last_service_date", "last_odometer_km",
+            "next_due_km", "next_due_date", "projected_odometer_km", "status",
+        )}
+
+    today = np.datetime64(as_of or date.today(), "D")
+
+    vehicles, veh = np.unique(history.vehicle_id, return_inverse=True)
+    types, typ = np.unique(history.service_type, return_inverse=True)
+    day = history.service_date.astype(np.int64).astype(np.float64)
+    odo = history.odometer_km
+
+    # sort by vehicle, then type, then date → contiguous groups
+    order = np.lexsort((day, typ, veh))
+    veh, typ, day, odo = veh[order], typ[order], day[order], odo[order]
+    service_date = history.service_date[order]
+
+    # ---------- per-vehicle usage rate ----------
+    veh_start = np.flatnonzero(np.r_[True, veh[1:] != veh[:-1]])
+    odo_day = np.where(np.isnan(odo), np.nan, day)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        max_odo = np.fmax.reduceat(odo, veh_start)
+        min_odo = np.fmin.reduceat(odo, veh_start)
+        last_odo_day = np.fmax.reduceat(odo_day, veh_start)
+        first_odo_day = np.fmin.reduceat(odo_day, veh_start)
+
+        span = last_odo_day - first_odo_day
+        rate = np.where(
+            span >= MIN_RATE_SPAN_DAYS, (max_odo - min_odo) / span, DEFAULT_DAILY_KM
+        )
+    if daily_km is not None:
+        rate = np.full(len(rate), float(daily_km))
+    rate = np.where(np.isfinite(rate) & (rate > 0), rate, DEFAULT_DAILY_KM)
+
+    # ---------- latest service per (vehicle, type) ----------
+    group_end = np.flatnonzero(np.r_[(veh[1:] != veh[:-1]) | (typ[1:] != typ[:-1]), True])
+    g_veh = veh[group_end]
+    g_typ = typ[group_end]
+    g_day = day[group_end]
+    g_odo = odo[group_end]
+
+    # every vehicle code 0..V-1 has at least one row, so codes index the per-vehicle arrays
+    v_pos = g_veh
+    ref_odo = max_odo[v_pos]
+    ref_day = last_odo_day[v_pos]
+    v_rate = rate[v_pos]
+
+    # service without an odometer reading: project it from the vehicle's usage
+    g_odo = np.where(np.isnan(g_odo), ref_odo + v_rate * (g_day - ref_day), g_odo)
+
+    interval_km, interval_months = _rule_columns(rules, types)
+    i_km = interval_km[g_typ]
+    i_months = interval_months[g_typ]
+
+    # ---------- km-based due ----------
+    next_due_km = g_odo + i_km
+    projected_km = ref_odo + v_rate * (today.astype(np.int64) - ref_day)
+    km_due_day = ref_day + (next_due_km - ref_odo) / v_rate
+
+    # ---------- time-based due ----------
+    has_months = ~np.isnan(i_months)
+    next_due_date = np.full(len(g_day), np.datetime64("NaT"), dtype="datetime64[D]")
+    next_due_date[has_months] = _add_months(
+        service_date[group_end][has_months], i_months[has_months].astype(np.int64)
+    )
+    date_due_day = np.where(has_months, next_due_date.astype(np.int64), np.nan)
+
+    # ---------- status ----------
+    due_day = np.fmin(date_due_day, km_due_day)
+    days_left = due_day - today.astype(np.int64)
+    km_left = next_due_km - projected_km
+
+    with np.errstate(invalid="ignore"):
+        overdue = (days_left < 0) | (km_left <= 0)
+        due_soon = (days_left <= due_soon_days) | (km_left <= due_soon_km)
+
+    status = np.select(
+        [np.isnan(due_day), overdue, due_soon],
+        [STATUS_UNKNOWN, STATUS_OVERDUE, STATUS_DUE_SOON],
+        default=STATUS_OK,
+    )
+
+    return {
+        "vehicle_id": vehicles[g_veh],
+        "service_type": types[g_typ],
+        "last_service_date": service_date[group_end],
+        "last_odometer_km": g_odo,
+        "next_due_km": next_due_km,
+        "next_due_date": next_due_date,
+        "projected_odometer_km": projected_km,
+        "status": status,
+    }
+
+
+def compute_due(
+    records: Iterable[Dict[str, Any]],
+    rules: List[Dict[str, Any]],
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """
+    Row-oriented wrapper around compute_due_arrays for API responses.
+    """
+    cols = compute_due_arrays(ServiceHistory.from_records(records), rules, **kwargs)
+
+    def _km(v: float) -> Optional[int]:
+        return None if np.isnan(v) else int(round(v))
+
+    def _date(v: np.datetime64) -> Optional[str]:
+        return None if np.isnat(v) else str(v)
+
+    return [
+        {
+            "vehicle_id": str(cols["vehicle_id"][i]),
+            "service_type": str(cols["service_type"][i]),
+            "last_service_date": _date(cols["last_service_date"][i]),
+            "last_odometer_km": _km(cols["last_odometer_km"][i]),
+            "next_due_km": _km(cols["next_due_km"][i]),
+            "next_due_date": _date(cols["next_due_date"][i]),
+            "projected_odometer_km": _km(cols["projected_odometer_km"][i]),
+            "status": str(cols["status"][i]),
+        }
+        for i in range(len(cols["status"]))
+    ]
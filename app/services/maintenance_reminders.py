@@ -0,0 +1,450 @@
+# Fleet-wide maintenance reminder scheduler.
+#
+# Due dates are loaded once (earliest first, up to a fixed cap) into a
+# min-heap keyed by reminder time. The loop sleeps until the next reminder
+# is due, pops everything that is due and hands it to the sink in batches.
+# create/update/delete_maintenance_service keep the heap in sync
+# incrementally, so vehicle_maintenance is never polled per user. When the
+# scheduler isn't running (MAINTENANCE_REMINDERS_ENABLED=0) those calls are
+# no-ops.
+#
+# Only one process may run the scheduler, or every reminder is sent once
+# per worker. run() first takes the "maintenance_reminders" job lock
+# (StorageBackend.try_lock_job, a Postgres advisory lock); workers that
+# don't get it stand by and retry every LEADER_RETRY_S, taking over if the
+# runner dies. Backends without session locks (supabase) can't elect a
+# runner, so there the API never runs it and a single
+# `python -m app.jobs.maintenance_reminders` process does. Changes made on
+# other workers reach the runner through a window reload every
+# MAINTENANCE_REMINDERS_RELOAD_S; a due reminder is checked against the
+# current records before it is sent.
+#
+# Memory stays bounded: only the earliest `max_items` reminders are held.
+# Anything later than `loaded_until` is picked up by the next window load.
+# A window is paged in by (next_due_date, id) keyset into a new heap that is
+# swapped in at the end; changes made meanwhile are replayed onto it.
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import MAINTENANCE_REMINDERS_RELOAD_S
+from app.db.db import supabase
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+Reminder = Dict[str, Any]
+Sink = Callable[[List[Reminder]], Awaitable[None]]
+
+PAGE_SIZE = 1000
+SUPERSEDE_CHUNK = 50  # reminders per supersede query; keeps its or= filter a few KB
+LEADER_RETRY_S = 60
+LOCK_NAME = "maintenance_reminders"
+
+
+async def log_sink(batch: List[Reminder]) -> None:
+    logger.info("Maintenance reminders due: %d", len(batch))
+
+
+def _reminder_key(record: Dict[str, Any]) -> str:
+    # one live reminder per vehicle + service type; a newer service replaces it
+    return f"{record['vehicle_id']}:{record['service_type']}"
+
+
+def _quoted(value: str) -> str:
+    # PostgREST filter value, safe for commas / parentheses in it
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _current_filter(batch: List[Reminder]) -> str:
+    """
+    or= filter matching each reminder's own service and any newer one of
+    the same vehicle and type.
+    """
+    clauses = []
+    for r in batch:
+        parts = [f"vehicle_id.eq.{r['vehicle_id']}", f"service_type.eq.{_quoted(r['service_type'])}"]
+        if r["service_date"]:
+            parts.append(f"service_date.gte.{r['service_date']}")
+        clauses.append(f"and({','.join(parts)})")
+    return ",".join(clauses)
+
+
+def _due_date(record: Dict[str, Any]) -> Optional[date]:
+    due = record.get("next_due_date")
+    if not due:
+        return None
+    if isinstance(due, str):
+        due = date.fromisoformat(due[:10])
+    return due
+
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        sink: Sink = log_sink,
+        lead_days: int = 7,
+        remind_hour_utc: int = 9,
+        max_items: int = 1_000_000,
+        batch_size: int = 500,
+        reload_s: float = MAINTENANCE_REMINDERS_RELOAD_S,
+        single_process: bool = False,
+    ) -> None:
+        self.sink = sink
+        self.lead_days = lead_days
+        self.remind_hour_utc = remind_hour_utc
+        self.max_items = max_items
+        self.batch_size = batch_size
+        self.reload_s = reload_s
+        self.single_process = single_process  # skip the job lock: the caller guarantees it
+
+        # heap of (remind_ts, seq, key); _live[key] holds the current entry,
+        # anything in the heap that doesn't match it is stale and skipped
+        self._heap: List[Tuple[float, int, str]] = []
+        self._live: Dict[str, Tuple[float, int, Tuple[Any, ...]]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        self.loaded_until: Optional[float] = None   # remind_ts of the last loaded item
+        # changes made while a window load is running, replayed onto the new window
+        self._pending: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self._loaded_at = 0.0
+        self._leader = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- time helpers ----------
+
+    def _remind_ts(self, due: date) -> float:
+        remind_day = due - timedelta(days=self.lead_days)
+        return datetime(
+            remind_day.year, remind_day.month, remind_day.day,
+            self.remind_hour_utc, tzinfo=timezone.utc,
+        ).timestamp()
+
+    # ---------- heap maintenance ----------
+
+    def _push_into(
+        self,
+        heap: List[Tuple[float, int, str]],
+        live: Dict[str, Tuple[float, int, Tuple[Any, ...]]],
+        record: Dict[str, Any],
+        ts: float,
+        due: date,
+    ) -> bool:
+        key = _reminder_key(record)
+        service_date = str(record.get("service_date") or "")
+        current = live.get(key)
+        if current and current[2][3] > service_date:
+            return False  # an older service record never replaces a newer one
+
+        seq = next(self._seq)
+        payload = (
+            record.get("user_id"),
+            str(record["vehicle_id"]),
+            record["service_type"],
+            service_date,
+            due.isoformat(),
+        )
+        live[key] = (ts, seq, payload)
+        heapq.heappush(heap, (ts, seq, key))
+        return True
+
+    def _push(self, record: Dict[str, Any]) -> bool:
+        due = _due_date(record)
+        if due is None:
+            return False
+
+        ts = self._remind_ts(due)
+        if self.loaded_until is not None and ts > self.loaded_until:
+            return False  # outside the loaded window; the next window load picks it up
+
+        changed = self._push_into(self._heap, self._live, record, ts, due)
+        self._maybe_compact()
+        return changed
+
+    def _drop(self, record: Dict[str, Any]) -> None:
+        current = self._live.get(_reminder_key(record))
+        if current and current[2][3] == str(record.get("service_date") or ""):
+            del self._live[_reminder_key(record)]
+
+    def _maybe_compact(self) -> None:
+        # stale entries accumulate with updates; rebuild when they dominate
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._heap = [(ts, seq, key) for key, (ts, seq, _) in self._live.items()]
+            heapq.heapify(self._heap)
+
+    def _notify(self) -> None:
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ---------- incremental updates (thread-safe) ----------
+
+    @property
+    def running(self) -> bool:
+        # a standing-by worker doesn't track changes; the runner reloads them
+        return self._leader and self._task is not None and not self._task.done()
+
+    def schedule(self, record: Optional[Dict[str, Any]]) -> None:
+        """
+        Add or move the reminder for a created/updated maintenance record.
+        No-op unless the scheduler is running.
+        """
+        if not self.running:
+            return
+        if not record or not record.get("vehicle_id") or not record.get("service_type"):
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("schedule", record))
+            changed = self._push(record)
+        if changed:
+            self._notify()
+
+    def unschedule(self, record: Optional[Dict[str, Any]]) -> None:
+        """
+        Drop the reminder for a deleted record and fall back to the
+        previous service of the same type, if any. No-op unless the
+        scheduler is running.
+        """
+        if not self.running:
+            return
+        if not record or not record.get("vehicle_id") or not record.get("service_type"):
+            return
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("unschedule", record))
+            self._drop(record)
+
+        res = (
+            supabase
+            .table("vehicle_maintenance")
+            .select("user_id, vehicle_id, service_type, service_date, next_due_date")
+            .eq("vehicle_id", str(record["vehicle_id"]))
+            .eq("service_type", record["service_type"])
+            .order("service_date", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if res.data:
+            self.schedule(res.data[0])
+
+    # ---------- window loading ----------
+
+    def _fetch_page(self, first_due: date, after: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        query = (
+            supabase
+            .table("vehicle_maintenance")
+            .select("id, user_id, vehicle_id, service_type, service_date, next_due_date")
+            .gte("next_due_date", first_due.isoformat())
+        )
+        if after is not None:
+            # keyset: strictly after the last row seen, in (next_due_date, id) order
+            due, row_id = after["next_due_date"], after["id"]
+            query = query.or_(f"next_due_date.gt.{due},and(next_due_date.eq.{due},id.gt.{row_id})")
+        res = query.order("next_due_date").order("id").limit(PAGE_SIZE).execute()
+        return res.data or []
+
+    def load_window(self) -> int:
+        """
+        (Re)load the earliest upcoming reminders, at most `max_items`.
+        Pages through vehicle_maintenance by (next_due_date, id) into a new
+        heap, then swaps it in; the lock is only held for the swap.
+        """
+        first_due = date.today() + timedelta(days=self.lead_days)
+        heap: List[Tuple[float, int, str]] = []
+        live: Dict[str, Tuple[float, int, Tuple[Any, ...]]] = {}
+        loaded_until: Optional[float] = None
+        last: Optional[Dict[str, Any]] = None
+
+        with self._lock:
+            self._pending = []
+        try:
+            while len(live) < self.max_items:
+                rows = self._fetch_page(first_due, last)
+                for row in rows:
+                    due = _due_date(row)
+                    if due is not None:
+                        self._push_into(heap, live, row, self._remind_ts(due), due)
+                if len(rows) < PAGE_SIZE:
+                    break
+                last = rows[-1]
+            else:
+                # cap reached: later reminders wait for the next window
+                loaded_until = self._remind_ts(_due_date(last))
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending or [], None
+            self._heap, self._live, self.loaded_until = heap, live, loaded_until
+            self._loaded_at = time.monotonic()
+            for op, record in pending:
+                if op == "schedule":
+                    self._push(record)
+                else:
+                    self._drop(record)
+            loaded = len(self._live)
+
+        logger.info("Maintenance reminders loaded: %d", loaded)
+        self._notify()
+        return loaded
+
+    # ---------- firing ----------
+
+    def _pop_due(self, now: float) -> List[Reminder]:
+        batch: List[Reminder] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                ts, seq, key = heapq.heappop(self._heap)
+                current = self._live.get(key)
+                if not current or current[1] != seq:
+                    continue  # stale entry
+                del self._live[key]
+                user_id, vehicle_id, service_type, service_date, due = current[2]
+                batch.append({
+                    "user_id": user_id,
+                    "vehicle_id": vehicle_id,
+                    "service_type": service_type,
+                    "service_date": service_date or None,
+                    "next_due_date": due,
+                })
+        return batch
+
+    def _drop_superseded(self, batch: List[Reminder]) -> List[Reminder]:
+        """
+        Keep the reminders whose record is still current: it still exists
+        with the same due date (it may have been edited or deleted on another
+        worker) and no newer service of the same type exists. Only those
+        rows are read, SUPERSEDE_CHUNK reminders per query.
+        """
+        rows: List[Dict[str, Any]] = []
+        for i in range(0, len(batch), SUPERSEDE_CHUNK):
+            res = (
+                supabase
+                .table("vehicle_maintenance")
+                .select("vehicle_id, service_type, service_date, next_due_date")
+                .or_(_current_filter(batch[i:i + SUPERSEDE_CHUNK]))
+                .execute()
+            )
+            rows += res.data or []
+
+        current: Dict[str, set] = {}
+        newer = set()
+        dates = {_reminder_key(r): r["service_date"] or "" for r in batch}
+        for row in rows:
+            key = _reminder_key(row)
+            service_date = str(row.get("service_date") or "")
+            if service_date > dates.get(key, ""):
+                newer.add(key)
+            current.setdefault(key, set()).add((service_date, str(row.get("next_due_date") or "")[:10]))
+
+        return [
+            r for r in batch
+            if _reminder_key(r) not in newer
+            and (r["service_date"] or "", r["next_due_date"]) in current.get(_reminder_key(r), set())
+        ]
+
+    def _next_wakeup(self, now: float) -> float:
+        with self._lock:
+            next_ts = self._heap[0][0] if self._heap else None
+        if next_ts is None:
+            # nothing loaded: check again once the window is exhausted or daily
+            wait = self.loaded_until - now if self.loaded_until else 24 * 3600
+        else:
+            wait = max(0.0, next_ts - now)
+        return min(wait, max(0.0, self._loaded_at + self.reload_s - time.monotonic()))
+
+    async def _become_leader(self) -> Any:
+        """
+        Job lock handle once this process is the runner (None with
+        single_process), or False if the backend can't elect one.
+        """
+        if self.single_process:
+            return None
+        storage = get_storage()
+        if not storage.session_locks:
+            logger.error(
+                "Maintenance reminders need a cross-process lock (STORAGE_BACKEND=postgres) "
+                "to run in the API; run `python -m app.jobs.maintenance_reminders` as a "
+                "single process instead"
+            )
+            return False
+        while True:
+            handle = await asyncio.to_thread(storage.try_lock_job, LOCK_NAME)
+            if handle is not None:
+                logger.info("Maintenance reminders: this process is the runner")
+                return handle
+            await asyncio.sleep(LEADER_RETRY_S)
+
+    async def run(self) -> None:
+        handle = await self._become_leader()
+        if handle is False:
+            return
+        self._leader = True
+        try:
+            await self._run()
+        finally:
+            self._leader = False
+            if handle is not None:
+                await asyncio.to_thread(get_storage().unlock_job, handle)
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+
+        await asyncio.to_thread(self.load_window)
+
+        while True:
+            now = time.time()
+            batch = self._pop_due(now)
+            if batch:
+                try:
+                    batch = await asyncio.to_thread(self._drop_superseded, batch)
+                    if batch:
+                        await self.sink(batch)
+                except Exception:
+                    logger.exception("Reminder sink failed")
+                continue
+
+            with self._lock:
+                exhausted = not self._live and self.loaded_until is not None
+            stale = time.monotonic() - self._loaded_at >= self.reload_s
+            if stale or (exhausted and now >= self.loaded_until):
+                await asyncio.to_thread(self.load_window)
+                continue
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._next_wakeup(now))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+
+reminder_scheduler = ReminderScheduler()
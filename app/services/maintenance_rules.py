@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import MAINTENANCE_RULES_TTL_S
+from app.db.db import supabase
+
+
+# Don't refetch more often than this when an unknown service_type shows up
+MIN_REFRESH_INTERVAL_S = 30
+
+
+class _RulesCache:
+    """
+    In-process copy of the maintenance_rules table.
+    The table almost never changes, so it is loaded once per TTL.
+    """
+
+    def __init__(self, ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self.rules: List[Dict[str, Any]] = []
+        self.by_type: Dict[str, Dict[str, Any]] = {}
+        self.version = ""
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        res = (
+            supabase
+            .table("maintenance_rules")
+            .select("*")
+            .order("display_name")
+            .execute()
+        )
+        rules = res.data or []
+
+        self.rules = rules
+        self.by_type = {r["service_type"]: r for r in rules}
+        self.version = hashlib.sha1(
+            json.dumps(rules, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+    def age(self) -> float:
+        if self.loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def get(self, force: bool = False) -> Tuple[List[Dict[str, Any]], str]:
+        if force or self.age() > self.ttl_s:
+            with self._lock:
+                # another thread may have refreshed while we waited
+                if force or self.age() > self.ttl_s:
+                    self._load()
+        return self.rules, self.version
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+
+_cache = _RulesCache(MAINTENANCE_RULES_TTL_S)
+
+
+# --------------------------------------------------
+# Public helpers
+# --------------------------------------------------
+
+def get_rules_catalogue() -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Returns (rules, version). `version` changes whenever the table content does.
+    """
+    return _cache.get()
+
+
+def get_rule(service_type: str) -> Optional[Dict[str, Any]]:
+    _cache.get()
+    return _cache.by_type.get(service_type)
+
+
+def is_known_service_type(service_type: str) -> bool:
+    """
+    Validate against the cached catalogue. An unknown type triggers at most
+    one early refresh per MIN_REFRESH_INTERVAL_S in case a rule was just added.
+    An empty catalogue accepts everything rather than blocking inserts.
+    """
+    rules, _ = _cache.get()
+    if not rules or service_type in _cache.by_type:
+        return True
+
+    if _cache.age() > MIN_REFRESH_INTERVAL_S:
+        _cache.get(force=True)
+
+    return service_type in _cache.by_type
+
+
+def invalidate_rules_cache() -> None:
+    """
+    Drop the cached catalogue; the next read reloads it.
+    """
+    _cache.invalidate()
@@ -1,6 +1,11 @@
+import base64
+import json
 from datetime import date
 from uuid import UUID
-from app.db.db import supabase
+from fastapi import HTTPException
+from app.storage import MaintenanceFilters, get_storage
+from app.services.maintenance_rules import get_rules_catalogue, is_known_service_type
+from app.services.maintenance_reminders import reminder_scheduler
 
 
 def _serialize_for_json(data: dict) -> dict:
@@ -15,9 +20,17 @@ def _serialize_for_json(data: dict) -> dict:
     return data
 
 
-def create_maintenance_service(user_id: str, payload):
+def build_maintenance_row(user_id: str, payload) -> dict:
+    """
+    Validate + normalize a MaintenanceCreate into an insertable row.
+    Shared by single and bulk inserts.
+    """
     data = payload.dict()
 
+    # Validated against the cached rules catalogue, no DB round-trip
+    if not is_known_service_type(data["service_type"]):
+        raise HTTPException(status_code=422, detail="Unknown service_type")
+
     # Ensure NOT NULL safety
     if data.get("service_date") is None:
         data["service_date"] = date.today()
@@ -33,28 +46,142 @@ def create_maintenance_service(user_id: str, payload):
     data.pop("status", None)
 
     # 🔴 REQUIRED: serialize UUID + date
-    data = _serialize_for_json(data)
+    return _serialize_for_json(data)
+
+
+def create_maintenance_service(user_id: str, payload):
+    data = build_maintenance_row(user_id, payload)
+
+    rows = get_storage().insert_maintenance([data])
+
+    row = rows[0] if rows else None
+    reminder_scheduler.schedule(row)
+    return row
+
+
+# Columns returned by the listing unless the caller asks for fewer
+MAINTENANCE_COLUMNS = (
+    "id", "vehicle_id", "service_type", "service_date", "odometer_km",
+    "next_due_km", "next_due_date", "status", "notes", "created_at",
+)
+
+# Page size used to read the whole unpaginated listing
+LIST_ALL_PAGE_SIZE = 500
+
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _select_columns(fields: list[str] | None, required: tuple[str, ...]) -> list[str]:
+    if not fields:
+        return list(MAINTENANCE_COLUMNS)
+
+    unknown = set(fields) - set(MAINTENANCE_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
 
-    res = (
-        supabase
-        .table("vehicle_maintenance")
-        .insert(data)
-        .execute()
+    return list(dict.fromkeys([*required, *fields]))
+
+
+def _filters(vehicle_id, status, date_from, date_to) -> MaintenanceFilters:
+    return {
+        "vehicle_id": str(vehicle_id) if vehicle_id else None,
+        "status": status,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+
+
+def list_maintenance_service(
+    user_id: str,
+    vehicle_id: UUID | None = None,
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    fields: list[str] | None = None,
+) -> tuple[list, str | None]:
+    """
+    One page of records, newest first.
+    Keyset pagination on (created_at, id); returns (rows, next_cursor).
+    """
+    rows = get_storage().list_maintenance(
+        user_id,
+        _select_columns(fields, required=("id", "created_at")),
+        _filters(vehicle_id, status, date_from, date_to),
+        after=_decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,  # one extra row tells us whether there is a next page
     )
 
-    return res.data[0] if res.data else None
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def list_all_maintenance_service(user_id: str, **filters) -> list:
+    """
+    Every matching record, newest first, read page by page. Backs the
+    unpaginated list for clients that don't send limit/cursor.
+    """
+    rows: list = []
+    cursor = None
+    while True:
+        page, cursor = list_maintenance_service(
+            user_id, limit=LIST_ALL_PAGE_SIZE, cursor=cursor, **filters
+        )
+        rows += page
+        if not cursor:
+            return rows
+
+
+def maintenance_summary_service(
+    user_id: str,
+    vehicle_id: UUID | None = None,
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    fields: list[str] | None = None,
+) -> list:
+    """
+    Latest record per (vehicle_id, service_type), computed server-side
+    instead of shipping full histories to the app.
+    """
+    return get_storage().latest_maintenance(
+        user_id,
+        _select_columns(fields, required=("vehicle_id", "service_type")),
+        _filters(vehicle_id, status, date_from, date_to),
+    )
 
 
-def list_maintenance_service(user_id: str):
-    res = (
-        supabase
-        .table("vehicle_maintenance")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .execute()
+def maintenance_due_service(
+    user_id: str,
+    as_of: date | None = None,
+    daily_km: float | None = None,
+):
+    """
+    Due dates / statuses computed in-process (no DB writes).
+    `as_of` and `daily_km` allow what-if projections.
+    """
+    # whole history in keyset pages: one select is cut off at PostgREST's max-rows
+    rows = list_all_maintenance_service(
+        user_id, fields=["vehicle_id", "service_type", "service_date", "odometer_km"]
     )
-    return res.data
+    rules, _ = get_rules_catalogue()
+
+    # numpy is only needed here; keep it out of app start-up
+    from app.services.maintenance_due import compute_due
+
+    return compute_due(rows, rules, as_of=as_of, daily_km=daily_km)
 
 
 def update_maintenance_service(user_id: str, maintenance_id: str, payload):
@@ -66,16 +193,18 @@ def update_maintenance_service(user_id: str, maintenance_id: str, payload):
     # 🔴 Serialize here too
     data = _serialize_for_json(data)
 
-    res = (
-        supabase
-        .table("vehicle_maintenance")
-        .update(data)
-        .eq("id", maintenance_id)
-        .eq("user_id", user_id)
-        .execute()
-    )
+    storage = get_storage()
+    # the old reminder is keyed by the old type/date; read it only if reminders run
+    before = storage.get_maintenance(user_id, maintenance_id) if reminder_scheduler.running else None
 
-    return res.data[0] if res.data else None
+    row = storage.update_maintenance(user_id, maintenance_id, data)
+    if before and row and (
+        before["service_type"] != row["service_type"]
+        or str(before["service_date"]) != str(row["service_date"])
+    ):
+        reminder_scheduler.unschedule(before)
+    reminder_scheduler.schedule(row)
+    return row
 
 
 # def delete_maintenance_service(user_id: str, maintenance_id: str):
@@ -89,13 +218,10 @@ def update_maintenance_service(user_id: str, maintenance_id: str, payload):
 
 
 def delete_maintenance_service(user_id: str, maintenance_id: str):
-    res = (
-        supabase
-        .table("vehicle_maintenance")
-        .delete()
-        .eq("id", maintenance_id)
-        .execute()
-    )
+    rows = get_storage().delete_maintenance(user_id, maintenance_id)
+
+    for row in rows:
+        reminder_scheduler.unschedule(row)
 
-    print("DELETE RESULT:", res)  # 👈 DEBUG LOG (Railway logs)
-    return res
+    # same body as the PostgREST response this endpoint always returned
+    return {"data": rows, "count": None}
@@ -0,0 +1,77 @@
+# Pluggable storage for the hot tables.
+#
+# STORAGE_BACKEND=supabase (default) goes through the PostgREST client,
+# STORAGE_BACKEND=postgres talks to Postgres directly with an asyncpg pool
+# (needs DATABASE_URL and the `postgres` extra).
+
+import threading
+from typing import Optional
+
+from app.config import (
+    CHAT_LOCK_ACQUIRE_TIMEOUT_S,
+    CHAT_LOCK_POOL_SIZE,
+    CHAT_LOCK_WAIT_S,
+    DATABASE_URL,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+    STORAGE_BACKEND,
+)
+from app.storage.base import MaintenanceFilters, StorageBackend
+
+BACKENDS = ("supabase", "postgres")
+
+_storage: Optional[StorageBackend] = None
+_lock = threading.Lock()
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    if backend == "supabase":
+        from app.storage.supabase_backend import SupabaseBackend
+        return SupabaseBackend()
+
+    if backend == "postgres":
+        if not DATABASE_URL:
+            raise RuntimeError("STORAGE_BACKEND=postgres requires DATABASE_URL")
+        from app.storage.asyncpg_backend import AsyncpgBackend
+        return AsyncpgBackend(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            lock_pool_size=CHAT_LOCK_POOL_SIZE,
+            lock_acquire_timeout=CHAT_LOCK_ACQUIRE_TIMEOUT_S,
+            lock_wait_timeout=CHAT_LOCK_WAIT_S,
+        )
+
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {backend!r}, expected one of {BACKENDS}")
+
+
+def get_storage() -> StorageBackend:
+    """
+    Process-wide backend, created on first use.
+    """
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def close_storage() -> None:
+    global _storage
+    with _lock:
+        if _storage is not None:
+            _storage.close()
+            _storage = None
+
+
+__all__ = [
+    "BACKENDS",
+    "MaintenanceFilters",
+    "StorageBackend",
+    "close_storage",
+    "create_storage",
+    "get_storage",
+]
@@ -0,0 +1,491 @@
+# Storage backend talking to Postgres directly through an asyncpg pool.
+#
+# The pool lives on a private event loop in a daemon thread; the sync API
+# submits coroutines to it, so it works the same from route handlers,
+# threadpool workers and background jobs. Every query is a fixed SQL string
+# (or one built from a whitelisted column list), so asyncpg's per-connection
+# statement cache prepares each one once and reuses it afterwards.
+#
+# Writes go through jsonb_populate_record(set): rows are sent as one jsonb
+# parameter and Postgres casts every field to the column type, which keeps
+# the PostgREST-style string payloads (ISO dates, UUID strings) working and
+# turns a multi-row insert into a single statement.
+
+import asyncio
+import json
+import re
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.storage.base import MaintenanceFilters, StorageBackend
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _ident(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name {name!r}")
+    return f'"{name}"'
+
+
+def _columns(names: Iterable[str]) -> str:
+    return ", ".join(_ident(n) for n in names)
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _row(record) -> Dict[str, Any]:
+    """
+    asyncpg Record -> dict with the same JSON types PostgREST returns.
+    """
+    return {k: _to_json_value(v) for k, v in record.items()}
+
+
+# --------------------------------------------------
+# Fixed statements
+# --------------------------------------------------
+
+SQL_SAVE_CHAT_TURN = """
+INSERT INTO ai_chat_history (chat_id, user_id, vehicle_id, prompt, response_ai)
+VALUES ($1, $2, $3, $4, $5)
+"""
+
+SQL_SAVE_CHAT_TURNS = """
+INSERT INTO ai_chat_history (chat_id, user_id, vehicle_id, prompt, response_ai)
+SELECT chat_id, user_id, vehicle_id, prompt, response_ai
+FROM jsonb_populate_recordset(NULL::ai_chat_history, $1::jsonb)
+"""
+
+SQL_LOAD_CHAT_TURNS = """
+SELECT prompt, response_ai
+FROM ai_chat_history
+WHERE chat_id = $1
+ORDER BY created_at DESC
+LIMIT $2
+"""
+
+# Session-level advisory lock on a 64-bit hash of the chat id; held on a
+# connection from the separate lock pool for as long as the chat's turns are running
+SQL_LOCK_CHAT = "SELECT pg_advisory_lock(hashtextextended($1, 0))"
+SQL_UNLOCK_CHAT = "SELECT pg_advisory_unlock(hashtextextended($1, 0))"
+SQL_TRY_LOCK_JOB = "SELECT pg_try_advisory_lock(hashtextextended($1, 0))"
+
+SQL_LIST_USER_TURNS = """
+SELECT id, chat_id, created_at, prompt,
+       response_ai->>'diagnosis' AS diagnosis,
+       response_ai->>'explanation' AS explanation
+FROM ai_chat_history
+WHERE user_id = $1
+ORDER BY created_at, id
+LIMIT $2
+"""
+
+SQL_LIST_USER_TURNS_AFTER = """
+SELECT id, chat_id, created_at, prompt,
+       response_ai->>'diagnosis' AS diagnosis,
+       response_ai->>'explanation' AS explanation
+FROM ai_chat_history
+WHERE user_id = $1 AND (created_at, id) > ($2, $3)
+ORDER BY created_at, id
+LIMIT $4
+"""
+
+SQL_LOAD_CHAT_SUMMARY = """
+SELECT summary FROM ai_chat_summary WHERE chat_id = $1 LIMIT 1
+"""
+
+SQL_UPSERT_CHAT_SUMMARY = """
+INSERT INTO ai_chat_summary (chat_id, vehicle_id, summary)
+VALUES ($1, $2, $3)
+ON CONFLICT (chat_id) DO UPDATE
+SET vehicle_id = EXCLUDED.vehicle_id, summary = EXCLUDED.summary
+"""
+
+SQL_LOAD_OPEN_ISSUES = """
+SELECT id, chat_id, issue_key, title, summary, severity
+FROM issues_summary
+WHERE vehicle_id = $1 AND resolved_at IS NULL
+ORDER BY updated_at DESC
+"""
+
+SQL_LIST_OPEN_ISSUE_VEHICLES = """
+SELECT DISTINCT vehicle_id
+FROM issues_summary
+WHERE resolved_at IS NULL AND vehicle_id IS NOT NULL
+ORDER BY vehicle_id
+"""
+
+SQL_LIST_RESOLVED_ISSUES = """
+SELECT id, vehicle_id, title, summary, severity, resolved_at
+FROM issues_summary
+WHERE resolved_at IS NOT NULL AND merged_into IS NULL
+ORDER BY resolved_at, id
+LIMIT $1
+"""
+
+SQL_LIST_RESOLVED_ISSUES_AFTER = """
+SELECT id, vehicle_id, title, summary, severity, resolved_at
+FROM issues_summary
+WHERE resolved_at IS NOT NULL AND merged_into IS NULL AND (resolved_at, id) > ($1, $2)
+ORDER BY resolved_at, id
+LIMIT $3
+"""
+
+SQL_LOAD_CHAT_ISSUE = """
+SELECT id, vehicle_id, summary, resolved_at FROM issues_summary WHERE chat_id = $1 LIMIT 1
+"""
+
+SQL_SAVE_FLEET_JOB = """
+INSERT INTO fleet_jobs (id, user_id, status, total, counts, llm_calls, saved, results, finished_at)
+SELECT id, user_id, status, total, counts, llm_calls, saved, results, finished_at
+FROM jsonb_populate_record(NULL::fleet_jobs, $1::jsonb)
+ON CONFLICT (id) DO UPDATE
+SET status = EXCLUDED.status, counts = EXCLUDED.counts, llm_calls = EXCLUDED.llm_calls,
+    saved = EXCLUDED.saved, results = EXCLUDED.results, finished_at = EXCLUDED.finished_at,
+    updated_at = now()
+"""
+
+SQL_LOAD_FLEET_JOB = """
+SELECT * FROM fleet_jobs WHERE id = $1
+"""
+
+SQL_DELETE_MAINTENANCE = """
+DELETE FROM vehicle_maintenance WHERE id = $1 AND user_id = $2 RETURNING *
+"""
+
+
+class AsyncpgBackend(StorageBackend):
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        statement_cache_size: int = 100,
+        command_timeout: float = 30.0,
+        lock_pool_size: int = 4,
+        lock_acquire_timeout: float = 5.0,
+        lock_wait_timeout: float = 120.0,
+    ) -> None:
+        try:
+            import asyncpg  # type: ignore
+        except ImportError as e:
+            raise RuntimeError(
+                "STORAGE_BACKEND=postgres needs asyncpg (install the `postgres` extra)"
+            ) from e
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="asyncpg-storage", daemon=True
+        )
+        self._thread.start()
+
+        async def open_pool():
+            # the pool binds to the running loop, so it is created on it
+            return await asyncpg.create_pool(
+                dsn,
+                min_size=min_size,
+                max_size=max_size,
+                statement_cache_size=statement_cache_size,
+                command_timeout=command_timeout,
+                init=self._init_connection,
+            )
+
+        async def open_lock_pool():
+            # advisory locks are held for a whole chat drain (LLM calls
+            # included), so they get their own connections and don't starve
+            # the query pool; min_size=0 opens none until a lock is taken.
+            # No command_timeout: lock_chat bounds its own wait.
+            return await asyncpg.create_pool(
+                dsn,
+                min_size=0,
+                max_size=max(1, lock_pool_size),
+                statement_cache_size=statement_cache_size,
+                command_timeout=None,
+            )
+
+        self._pool = self._run(open_pool())
+        self._lock_pool = self._run(open_lock_pool())
+        self._lock_acquire_timeout = lock_acquire_timeout
+        self._lock_wait_timeout = lock_wait_timeout
+
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        for typename in ("json", "jsonb"):
+            await conn.set_type_codec(
+                typename,
+                encoder=lambda v: json.dumps(v, default=str),
+                decoder=json.loads,
+                schema="pg_catalog",
+            )
+
+    # ---------- plumbing ----------
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _fetch(self, sql: str, *args) -> List[Dict[str, Any]]:
+        async def go():
+            async with self._pool.acquire() as conn:
+                return await conn.fetch(sql, *args)
+        return [_row(r) for r in self._run(go())]
+
+    def _fetchrow(self, sql: str, *args) -> Optional[Dict[str, Any]]:
+        rows = self._fetch(sql, *args)
+        return rows[0] if rows else None
+
+    def _execute(self, sql: str, *args) -> None:
+        async def go():
+            async with self._pool.acquire() as conn:
+                await conn.execute(sql, *args)
+        self._run(go())
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._run(self._pool.close())
+        self._run(self._lock_pool.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    # ---------- ai_chat_history ----------
+
+    def save_chat_turn(self, row: Dict[str, Any]) -> None:
+        self._execute(
+            SQL_SAVE_CHAT_TURN,
+            row["chat_id"],
+            row["user_id"],
+            row.get("vehicle_id"),
+            row["prompt"],
+            row.get("response_ai"),
+        )
+
+    def save_chat_turns(self, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            self._execute(SQL_SAVE_CHAT_TURNS, rows)
+
+    def load_chat_turns(self, chat_id: str, limit: int) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_LOAD_CHAT_TURNS, chat_id, limit)
+
+    def list_user_turns(
+        self, user_id: str, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        if after is None:
+            return self._fetch(SQL_LIST_USER_TURNS, user_id, limit)
+        created_at, row_id = after
+        return self._fetch(
+            SQL_LIST_USER_TURNS_AFTER, user_id, datetime.fromisoformat(created_at), row_id, limit
+        )
+
+    # ---------- cross-process chat lock ----------
+
+    def lock_chat(self, chat_id: str) -> Any:
+        """
+        Raises asyncio.TimeoutError when no lock connection frees up within
+        lock_acquire_timeout, or another worker holds the chat for longer
+        than lock_wait_timeout.
+        """
+        async def go():
+            conn = await self._lock_pool.acquire(timeout=self._lock_acquire_timeout)
+            try:
+                await conn.execute(SQL_LOCK_CHAT, chat_id, timeout=self._lock_wait_timeout)
+            except BaseException:
+                await self._lock_pool.release(conn)
+                raise
+            return conn, chat_id
+        return self._run(go())
+
+    def unlock_chat(self, handle: Any) -> None:
+        conn, chat_id = handle
+
+        async def go():
+            try:
+                await conn.execute(SQL_UNLOCK_CHAT, chat_id, timeout=self._lock_acquire_timeout)
+            finally:
+                # release() resets the session, which drops any lock left behind
+                await self._lock_pool.release(conn)
+        self._run(go())
+
+    # ---------- single-runner background jobs ----------
+
+    session_locks = True
+
+    def try_lock_job(self, name: str) -> Any:
+        key = f"job:{name}"  # apart from chat ids
+
+        async def go():
+            conn = await self._lock_pool.acquire(timeout=self._lock_acquire_timeout)
+            try:
+                locked = await conn.fetchval(SQL_TRY_LOCK_JOB, key, timeout=self._lock_acquire_timeout)
+            except BaseException:
+                await self._lock_pool.release(conn)
+                raise
+            if not locked:
+                await self._lock_pool.release(conn)
+                return None
+            return conn, key
+        return self._run(go())
+
+    def unlock_job(self, handle: Any) -> None:
+        self.unlock_chat(handle)
+
+    # ---------- ai_chat_summary ----------
+
+    def load_chat_summary(self, chat_id: str) -> Optional[str]:
+        row = self._fetchrow(SQL_LOAD_CHAT_SUMMARY, chat_id)
+        return row["summary"] if row else None
+
+    def upsert_chat_summary(self, chat_id: str, vehicle_id: str, summary: str) -> None:
+        self._execute(SQL_UPSERT_CHAT_SUMMARY, chat_id, vehicle_id, summary)
+
+    # ---------- issues_summary ----------
+
+    def load_open_issues(self, vehicle_id: str) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_LOAD_OPEN_ISSUES, vehicle_id)
+
+    def load_chat_issue(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        return self._fetchrow(SQL_LOAD_CHAT_ISSUE, chat_id)
+
+    def list_open_issue_vehicles(self) -> List[str]:
+        return [row["vehicle_id"] for row in self._fetch(SQL_LIST_OPEN_ISSUE_VEHICLES)]
+
+    def list_resolved_issues(
+        self, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        if after is None:
+            return self._fetch(SQL_LIST_RESOLVED_ISSUES, limit)
+        resolved_at, row_id = after
+        return self._fetch(
+            SQL_LIST_RESOLVED_ISSUES_AFTER, datetime.fromisoformat(resolved_at), row_id, limit
+        )
+
+    def insert_issue(self, fields: Dict[str, Any]) -> None:
+        cols = _columns(fields)
+        self._execute(
+            f"INSERT INTO issues_summary ({cols}) "
+            f"SELECT {cols} FROM jsonb_populate_record(NULL::issues_summary, $1::jsonb)",
+            fields,
+        )
+
+    def update_issue(self, issue_id: Any, fields: Dict[str, Any]) -> None:
+        cols = _columns(fields)
+        self._execute(
+            f"UPDATE issues_summary SET ({cols}, updated_at) = "
+            f"(SELECT {cols}, now() FROM jsonb_populate_record(NULL::issues_summary, $2::jsonb)) "
+            f"WHERE id = $1",
+            issue_id,
+            fields,
+        )
+
+    # ---------- vehicle_maintenance ----------
+
+    def insert_maintenance(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        # union of keys, like PostgREST's bulk insert; missing keys insert NULL
+        cols = _columns(dict.fromkeys(k for row in rows for k in row))
+        return self._fetch(
+            f"INSERT INTO vehicle_maintenance ({cols}) "
+            f"SELECT {cols} FROM jsonb_populate_recordset(NULL::vehicle_maintenance, $1::jsonb) "
+            f"RETURNING *",
+            rows,
+        )
+
+    def get_maintenance(self, user_id: str, maintenance_id: str) -> Optional[Dict[str, Any]]:
+        return self._fetchrow(
+            "SELECT * FROM vehicle_maintenance WHERE id = $1 AND user_id = $2",
+            maintenance_id,
+            user_id,
+        )
+
+    def update_maintenance(
+        self, user_id: str, maintenance_id: str, data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        if not data:
+            return self.get_maintenance(user_id, maintenance_id)
+        cols = _columns(data)
+        return self._fetchrow(
+            f"UPDATE vehicle_maintenance SET ({cols}) = "
+            f"(SELECT {cols} FROM jsonb_populate_record(NULL::vehicle_maintenance, $3::jsonb)) "
+            f"WHERE id = $1 AND user_id = $2 RETURNING *",
+            maintenance_id,
+            user_id,
+            data,
+        )
+
+    def delete_maintenance(self, user_id: str, maintenance_id: str) -> List[Dict[str, Any]]:
+        return self._fetch(SQL_DELETE_MAINTENANCE, maintenance_id, user_id)
+
+    @staticmethod
+    def _where(user_id: str, filters: MaintenanceFilters) -> Tuple[List[str], List[Any]]:
+        clauses = ["user_id = $1"]
+        args: List[Any] = [user_id]
+
+        for key, clause in (
+            ("vehicle_id", "vehicle_id = ${}"),
+            ("status", "status = ${}"),
+            ("date_from", "service_date >= ${}"),
+            ("date_to", "service_date <= ${}"),
+        ):
+            value = filters.get(key)
+            if value:
+                args.append(str(value) if key == "vehicle_id" else value)
+                clauses.append(clause.format(len(args)))
+
+        return clauses, args
+
+    def list_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+        after: Optional[Tuple[str, str]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        clauses, args = self._where(user_id, filters)
+
+        if after:
+            created_at, row_id = after
+            args += [datetime.fromisoformat(created_at), row_id]
+            clauses.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+
+        args.append(limit)
+        return self._fetch(
+            f"SELECT {_columns(columns)} FROM vehicle_maintenance "
+            f"WHERE {' AND '.join(clauses)} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ${len(args)}",
+            *args,
+        )
+
+    def latest_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+    ) -> List[Dict[str, Any]]:
+        clauses, args = self._where(user_id, filters)
+        return self._fetch(
+            f"SELECT DISTINCT ON (vehicle_id, service_type) {_columns(columns)} "
+            f"FROM vehicle_maintenance WHERE {' AND '.join(clauses)} "
+            f"ORDER BY vehicle_id, service_type, service_date DESC, created_at DESC",
+            *args,
+        )
+
+    # ---------- fleet_jobs ----------
+
+    def save_fleet_job(self, job: Dict[str, Any]) -> None:
+        self._execute(SQL_SAVE_FLEET_JOB, job)
+
+    def load_fleet_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._fetchrow(SQL_LOAD_FLEET_JOB, UUID(job_id))
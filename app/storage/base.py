@@ -0,0 +1,180 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+
+class MaintenanceFilters(TypedDict, total=False):
+    vehicle_id: Optional[str]
+    status: Optional[str]
+    date_from: Optional[date]
+    date_to: Optional[date]
+
+
+class StorageBackend(ABC):
+    """
+    Data access for the hot tables: ai_chat_history, ai_chat_summary,
+    issues_summary and vehicle_maintenance.
+
+    Methods are synchronous (callers are sync route handlers and the agent)
+    and return plain JSON-friendly dicts shaped like PostgREST rows, so
+    backends can be swapped without touching callers.
+    """
+
+    # ---------- ai_chat_history ----------
+
+    @abstractmethod
+    def save_chat_turn(self, row: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def save_chat_turns(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert several turns in one statement (batch jobs).
+        """
+
+    @abstractmethod
+    def load_chat_turns(self, chat_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Latest turns (prompt, response_ai), newest first.
+        """
+
+    @abstractmethod
+    def list_user_turns(
+        self, user_id: str, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        A user's turns as (id, chat_id, created_at, prompt, diagnosis,
+        explanation), ordered by (created_at, id) ascending, strictly after
+        the `after` keyset position when given.
+        """
+
+    # ---------- ai_chat_summary ----------
+
+    @abstractmethod
+    def load_chat_summary(self, chat_id: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def upsert_chat_summary(self, chat_id: str, vehicle_id: str, summary: str) -> None: ...
+
+    # ---------- issues_summary ----------
+
+    @abstractmethod
+    def load_open_issues(self, vehicle_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def load_chat_issue(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The chat's issue row (id, vehicle_id, summary, resolved_at) or None.
+        """
+
+    @abstractmethod
+    def list_open_issue_vehicles(self) -> List[str]:
+        """
+        Every vehicle_id with at least one open issue (batch jobs only).
+        """
+
+    @abstractmethod
+    def list_resolved_issues(
+        self, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolved issues (id, vehicle_id, title, summary, severity,
+        resolved_at) of every vehicle, ordered by (resolved_at, id)
+        ascending, strictly after the `after` keyset position when given.
+        Duplicates merged into another issue (merged_into set) are left out.
+        """
+
+    @abstractmethod
+    def insert_issue(self, fields: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def update_issue(self, issue_id: Any, fields: Dict[str, Any]) -> None:
+        """
+        Update fields and bump updated_at.
+        """
+
+    # ---------- vehicle_maintenance ----------
+
+    @abstractmethod
+    def insert_maintenance(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Multi-row insert in one statement; all-or-nothing. Returns inserted rows.
+        """
+
+    @abstractmethod
+    def get_maintenance(self, user_id: str, maintenance_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def update_maintenance(
+        self, user_id: str, maintenance_id: str, data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def delete_maintenance(self, user_id: str, maintenance_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def list_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+        after: Optional[Tuple[str, str]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Filtered rows ordered by (created_at, id) descending, strictly after
+        the `after` keyset position when given.
+        """
+
+    @abstractmethod
+    def latest_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+    ) -> List[Dict[str, Any]]:
+        """
+        Latest row per (vehicle_id, service_type).
+        """
+
+    # ---------- fleet_jobs ----------
+
+    @abstractmethod
+    def save_fleet_job(self, job: Dict[str, Any]) -> None:
+        """
+        Insert or overwrite a batch job's state (id, user_id, status, total,
+        counts, llm_calls, saved, results, finished_at).
+        """
+
+    @abstractmethod
+    def load_fleet_job(self, job_id: str) -> Optional[Dict[str, Any]]: ...
+
+    # ---------- cross-process chat lock ----------
+
+    def lock_chat(self, chat_id: str) -> Any:
+        """
+        Block until this process owns `chat_id`'s turns; returns a handle for
+        unlock_chat. Backends without session locks return None (no-op).
+        """
+        return None
+
+    def unlock_chat(self, handle: Any) -> None:
+        pass
+
+    # ---------- single-runner background jobs ----------
+
+    # whether try_lock_job can tell processes apart
+    session_locks = False
+
+    def try_lock_job(self, name: str) -> Any:
+        """
+        Become the one process running background job `name`: a handle for
+        unlock_job, or None while another process holds it. Backends
+        without session locks (session_locks False) always return None.
+        """
+        return None
+
+    def unlock_job(self, handle: Any) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,296 @@
+# Storage backend on the supabase-py (PostgREST) client.
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.db.db import supabase
+from app.storage.base import MaintenanceFilters, StorageBackend
+
+LATEST_PAGE_SIZE = 1000
+
+
+def _filtered(query, user_id: str, filters: MaintenanceFilters):
+    query = query.eq("user_id", user_id)
+    if filters.get("vehicle_id"):
+        query = query.eq("vehicle_id", str(filters["vehicle_id"]))
+    if filters.get("status"):
+        query = query.eq("status", filters["status"])
+    if filters.get("date_from"):
+        query = query.gte("service_date", filters["date_from"].isoformat())
+    if filters.get("date_to"):
+        query = query.lte("service_date", filters["date_to"].isoformat())
+    return query
+
+
+class SupabaseBackend(StorageBackend):
+
+    # ---------- ai_chat_history ----------
+
+    def save_chat_turn(self, row: Dict[str, Any]) -> None:
+        supabase.table("ai_chat_history").insert(row).execute()
+
+    def save_chat_turns(self, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            supabase.table("ai_chat_history").insert(rows).execute()
+
+    def load_chat_turns(self, chat_id: str, limit: int) -> List[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("ai_chat_history")
+            .select("prompt, response_ai")
+            .eq("chat_id", chat_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return res.data or []
+
+    def list_user_turns(
+        self, user_id: str, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        query = (
+            supabase
+            .table("ai_chat_history")
+            .select(
+                "id, chat_id, created_at, prompt, "
+                "diagnosis:response_ai->>diagnosis, explanation:response_ai->>explanation"
+            )
+            .eq("user_id", user_id)
+        )
+
+        if after:
+            created_at, row_id = after
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.gt.{row_id})'
+            )
+
+        res = query.order("created_at").order("id").limit(limit).execute()
+        return res.data or []
+
+    # ---------- ai_chat_summary ----------
+
+    def load_chat_summary(self, chat_id: str) -> Optional[str]:
+        res = (
+            supabase
+            .table("ai_chat_summary")
+            .select("summary")
+            .eq("chat_id", chat_id)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0]["summary"] if res.data else None
+
+    def upsert_chat_summary(self, chat_id: str, vehicle_id: str, summary: str) -> None:
+        supabase.table("ai_chat_summary").upsert(
+            {
+                "chat_id": chat_id,
+                "vehicle_id": vehicle_id,
+                "summary": summary,
+            },
+            on_conflict="chat_id",
+        ).execute()
+
+    # ---------- issues_summary ----------
+
+    def load_open_issues(self, vehicle_id: str) -> List[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("issues_summary")
+            .select("id, chat_id, issue_key, title, summary, severity")
+            .eq("vehicle_id", vehicle_id)
+            .is_("resolved_at", None)
+            .order("updated_at", desc=True)
+            .execute()
+        )
+        return res.data or []
+
+    def load_chat_issue(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("issues_summary")
+            .select("id, vehicle_id, summary, resolved_at")
+            .eq("chat_id", chat_id)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0] if res.data else None
+
+    def list_open_issue_vehicles(self) -> List[str]:
+        vehicles = set()
+        offset = 0
+        while True:
+            res = (
+                supabase
+                .table("issues_summary")
+                .select("vehicle_id")
+                .is_("resolved_at", None)
+                .order("id")
+                .range(offset, offset + LATEST_PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = res.data or []
+            vehicles.update(row["vehicle_id"] for row in rows if row["vehicle_id"])
+
+            offset += len(rows)
+            if len(rows) < LATEST_PAGE_SIZE:
+                break
+        return sorted(vehicles)
+
+    def list_resolved_issues(
+        self, after: Optional[Tuple[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        query = (
+            supabase
+            .table("issues_summary")
+            .select("id, vehicle_id, title, summary, severity, resolved_at")
+            .not_.is_("resolved_at", "null")
+            .is_("merged_into", None)
+        )
+
+        if after:
+            resolved_at, row_id = after
+            query = query.or_(
+                f'resolved_at.gt."{resolved_at}",'
+                f'and(resolved_at.eq."{resolved_at}",id.gt.{row_id})'
+            )
+
+        res = query.order("resolved_at").order("id").limit(limit).execute()
+        return res.data or []
+
+    def insert_issue(self, fields: Dict[str, Any]) -> None:
+        supabase.table("issues_summary").insert(fields).execute()
+
+    def update_issue(self, issue_id: Any, fields: Dict[str, Any]) -> None:
+        supabase.table("issues_summary").update({
+            **fields,
+            "updated_at": "now()",
+        }).eq("id", issue_id).execute()
+
+    # ---------- vehicle_maintenance ----------
+
+    def insert_maintenance(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("vehicle_maintenance")
+            .insert(rows)
+            .execute()
+        )
+        return res.data or []
+
+    def get_maintenance(self, user_id: str, maintenance_id: str) -> Optional[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("vehicle_maintenance")
+            .select("*")
+            .eq("id", maintenance_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0] if res.data else None
+
+    def update_maintenance(
+        self, user_id: str, maintenance_id: str, data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("vehicle_maintenance")
+            .update(data)
+            .eq("id", maintenance_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return res.data[0] if res.data else None
+
+    def delete_maintenance(self, user_id: str, maintenance_id: str) -> List[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("vehicle_maintenance")
+            .delete()
+            .eq("id", maintenance_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return res.data or []
+
+    def list_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+        after: Optional[Tuple[str, str]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        query = _filtered(
+            supabase.table("vehicle_maintenance").select(", ".join(columns)),
+            user_id,
+            filters,
+        )
+
+        if after:
+            created_at, row_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+            )
+
+        res = (
+            query
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return res.data or []
+
+    def latest_maintenance(
+        self,
+        user_id: str,
+        columns: Sequence[str],
+        filters: MaintenanceFilters,
+    ) -> List[Dict[str, Any]]:
+        # PostgREST has no DISTINCT ON: the latest_maintenance function
+        # (supabase/migrations) reduces the groups in the database, and only
+        # their rows are paged out, one per (vehicle_id, service_type)
+        params: Dict[str, Any] = {"p_user_id": user_id}
+        for key in ("vehicle_id", "status", "date_from", "date_to"):
+            value = filters.get(key)
+            if value:
+                params[f"p_{key}"] = value.isoformat() if key.startswith("date_") else str(value)
+
+        latest: List[Dict[str, Any]] = []
+        while True:
+            res = (
+                supabase
+                .rpc("latest_maintenance", params)
+                .select(", ".join(columns))
+                .order("vehicle_id")
+                .order("service_type")
+                .range(len(latest), len(latest) + LATEST_PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = res.data or []
+            latest += rows
+            if len(rows) < LATEST_PAGE_SIZE:
+                break
+
+        return latest
+
+    # ---------- fleet_jobs ----------
+
+    def save_fleet_job(self, job: Dict[str, Any]) -> None:
+        supabase.table("fleet_jobs").upsert(
+            {**job, "updated_at": "now()"},
+            on_conflict="id",
+        ).execute()
+
+    def load_fleet_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        res = (
+            supabase
+            .table("fleet_jobs")
+            .select("*")
+            .eq("id", job_id)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0] if res.data else None
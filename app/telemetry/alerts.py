@@ -0,0 +1,246 @@
+# Alert stage for the telemetry pipeline.
+# Turns per-packet threshold checks into debounced alert episodes so that
+# downstream consumers (notifications, agent context, DB writes) only see
+# state transitions instead of one alert per packet.
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+OPEN = "OPEN"
+ONGOING = "ONGOING"
+CLEARED = "CLEARED"
+
+
+# --------------------------------------------------
+# Rules
+# --------------------------------------------------
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    Threshold rule with hysteresis.
+
+    The alert raises once `field` crosses `raise_at` for `trigger_samples`
+    consecutive packets and only clears once it is back past `clear_at`.
+    `above=False` flips the comparison (e.g. low battery voltage).
+    """
+    name: str
+    field: str
+    raise_at: float
+    clear_at: float
+    above: bool = True
+    severity: str = "MEDIUM"
+    trigger_samples: int = 3
+
+    def is_raised(self, value: float) -> bool:
+        return value >= self.raise_at if self.above else value <= self.raise_at
+
+    def is_clear(self, value: float) -> bool:
+        return value <= self.clear_at if self.above else value >= self.clear_at
+
+
+DEFAULT_RULES: List[AlertRule] = [
+    AlertRule("engine_overheat", "coolant_temp", raise_at=110, clear_at=100, severity="HIGH"),
+    AlertRule("over_rev", "rpm", raise_at=6000, clear_at=5500),
+    AlertRule("low_battery", "battery_voltage", raise_at=11.8, clear_at=12.2, above=False),
+    AlertRule("engine_overload", "engine_load", raise_at=95, clear_at=85, severity="LOW"),
+]
+
+
+# --------------------------------------------------
+# Per-(vehicle, rule) episode state
+# --------------------------------------------------
+
+class _Episode:
+    """
+    Fixed-size state for one (vehicle, rule) pair.
+    Dropped again once the pair is back to idle.
+    """
+    __slots__ = (
+        "open", "hits", "opened_at", "last_event_at",
+        "clearing_since", "peak", "samples", "last_value",
+    )
+
+    def __init__(self) -> None:
+        self.open = False
+        self.hits = 0
+        self.opened_at = 0.0
+        self.last_event_at = 0.0
+        self.clearing_since: Optional[float] = None
+        self.peak = 0.0
+        self.samples = 0
+        self.last_value = 0.0
+
+
+class AlertStage:
+    """
+    Debounces and aggregates threshold alerts.
+
+    - OPEN is emitted when a rule has been raised for `trigger_samples` packets.
+    - ONGOING is emitted at most every `ongoing_every_s` while an episode is open.
+    - CLEARED is emitted only after the value has stayed clear for `cooldown_s`;
+      re-raising inside that window silently continues the same episode.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[AlertRule]] = None,
+        cooldown_s: float = 60.0,
+        ongoing_every_s: float = 300.0,
+    ) -> None:
+        self.cooldown_s = cooldown_s
+        self.ongoing_every_s = ongoing_every_s
+
+        self._rules_by_field: Dict[str, List[AlertRule]] = {}
+        for rule in rules if rules is not None else DEFAULT_RULES:
+            self._rules_by_field.setdefault(rule.field, []).append(rule)
+
+        self._episodes: Dict[Tuple[str, str], _Episode] = {}
+        self._rules: Dict[str, AlertRule] = {
+            r.name: r for rs in self._rules_by_field.values() for r in rs
+        }
+
+    # ---------- public API ----------
+
+    def process(
+        self,
+        vehicle_id: str,
+        decoded: Dict[str, Any],
+        ts: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Feed one decoded packet, return the transitions it caused (usually none).
+        """
+        now = time.time() if ts is None else ts
+        events: List[Dict[str, Any]] = []
+
+        for field, value in decoded.items():
+            rules = self._rules_by_field.get(field)
+            if not rules or not isinstance(value, (int, float)):
+                continue
+
+            for rule in rules:
+                event = self._observe(vehicle_id, rule, float(value), now)
+                if event:
+                    events.append(event)
+
+        return events
+
+    def flush(self, ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Finalize episodes whose cooldown has elapsed without further packets.
+        Call periodically when streams may go quiet.
+        """
+        now = time.time() if ts is None else ts
+        events: List[Dict[str, Any]] = []
+
+        for key, ep in list(self._episodes.items()):
+            if (
+                ep.open
+                and ep.clearing_since is not None
+                and now - ep.clearing_since >= self.cooldown_s
+            ):
+                vehicle_id, rule_name = key
+                events.append(self._close(vehicle_id, self._rules[rule_name], ep, now))
+
+        return events
+
+    def active(self, vehicle_id: str) -> List[Dict[str, Any]]:
+        """
+        Currently open episodes for one vehicle.
+        """
+        return [
+            self._event(vid, self._rules[rule_name], ep, ONGOING, ep.last_event_at)
+            for (vid, rule_name), ep in self._episodes.items()
+            if vid == vehicle_id and ep.open
+        ]
+
+    # ---------- state machine ----------
+
+    def _observe(
+        self,
+        vehicle_id: str,
+        rule: AlertRule,
+        value: float,
+        now: float,
+    ) -> Optional[Dict[str, Any]]:
+        key = (vehicle_id, rule.name)
+        ep = self._episodes.get(key)
+        raised = rule.is_raised(value)
+
+        if ep is None:
+            if not raised:
+                return None
+            ep = self._episodes[key] = _Episode()
+
+        ep.last_value = value
+
+        if not ep.open:
+            if not raised:
+                # trigger streak broken before the episode opened
+                del self._episodes[key]
+                return None
+
+            ep.hits += 1
+            if ep.hits < rule.trigger_samples:
+                return None
+
+            ep.open = True
+            ep.opened_at = now
+            ep.last_event_at = now
+            ep.peak = value
+            ep.samples = ep.hits
+            return self._event(vehicle_id, rule, ep, OPEN, now)
+
+        # episode is open
+        ep.samples += 1
+        if raised:
+            ep.clearing_since = None
+            ep.peak = max(ep.peak, value) if rule.above else min(ep.peak, value)
+        elif rule.is_clear(value):
+            if ep.clearing_since is None:
+                ep.clearing_since = now
+            elif now - ep.clearing_since >= self.cooldown_s:
+                return self._close(vehicle_id, rule, ep, now)
+        else:
+            # inside the hysteresis band: neither raised nor clear
+            ep.clearing_since = None
+
+        if now - ep.last_event_at >= self.ongoing_every_s:
+            ep.last_event_at = now
+            return self._event(vehicle_id, rule, ep, ONGOING, now)
+
+        return None
+
+    def _close(
+        self,
+        vehicle_id: str,
+        rule: AlertRule,
+        ep: _Episode,
+        now: float,
+    ) -> Dict[str, Any]:
+        del self._episodes[(vehicle_id, rule.name)]
+        return self._event(vehicle_id, rule, ep, CLEARED, now)
+
+    @staticmethod
+    def _event(
+        vehicle_id: str,
+        rule: AlertRule,
+        ep: _Episode,
+        state: str,
+        now: float,
+    ) -> Dict[str, Any]:
+        return {
+            "vehicle_id": vehicle_id,
+            "rule": rule.name,
+            "field": rule.field,
+            "state": state,
+            "severity": rule.severity,
+            "value": ep.last_value,
+            "peak": ep.peak,
+            "samples": ep.samples,
+            "opened_at": ep.opened_at,
+            "ts": now,
+        }
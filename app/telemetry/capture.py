@@ -0,0 +1,137 @@
+# Recorded OBD telemetry: capture files and replay.
+#
+# File layout: 8-byte magic followed by frames from app.telemetry.frames
+# (<u32 payload length><f64 timestamp><payload>). Frames are appended as they
+# arrive, so a capture that was cut off mid-write is still readable up to the
+# last complete frame.
+
+import asyncio
+import mmap
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from app.telemetry.frames import FRAME_HEADER, decode_packet, encode_packet
+
+MAGIC = b"OBDCAP01"
+
+
+# --------------------------------------------------
+# Recording
+# --------------------------------------------------
+
+class CaptureWriter:
+    """
+    Append-only writer for capture files.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._fh = open(self.path, "ab", buffering=64 * 1024)
+        if new_file:
+            self._fh.write(MAGIC)
+        self.frames = 0
+
+    def write(self, packet: Dict[str, Any]) -> None:
+        if packet.get("ts") is None:
+            packet = {**packet, "ts": time.time()}
+        self._fh.write(encode_packet(packet))
+        self.frames += 1
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def record(
+    stream: AsyncIterator[Dict[str, Any]],
+    path: str | Path,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Tee an OBD stream into a capture file:
+
+        async for packet in record(obd_stream(), "drive.obdcap"):
+            ...
+    """
+    with CaptureWriter(path) as writer:
+        async for packet in stream:
+            writer.write(packet)
+            yield packet
+
+
+# --------------------------------------------------
+# Replay
+# --------------------------------------------------
+
+def _scan(path: str | Path) -> Iterator[tuple[mmap.mmap, int, int, float]]:
+    """
+    (mmap, frame offset, payload length, ts) for every complete frame.
+    """
+    with open(path, "rb") as fh:
+        if Path(path).stat().st_size < len(MAGIC):
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an OBD capture file")
+
+            offset = len(MAGIC)
+            end = len(mm)
+            while offset + FRAME_HEADER.size <= end:
+                length, ts = FRAME_HEADER.unpack_from(mm, offset)
+                start = offset + FRAME_HEADER.size
+                if start + length > end:
+                    break  # truncated tail from an interrupted recording
+                yield mm, offset, length, ts
+                offset = start + length
+
+
+def iter_capture(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read every packet of a capture through a read-only mmap.
+    """
+    for mm, offset, length, ts in _scan(path):
+        start = offset + FRAME_HEADER.size
+        yield decode_packet(mm[start:start + length], ts)
+
+
+def iter_capture_frames(path: str | Path) -> Iterator[bytes]:
+    """
+    Every frame of a capture as raw bytes, for ShardedPipeline.submit_frame:
+    the ingest process never decodes or re-encodes the JSON.
+    """
+    for mm, offset, length, _ in _scan(path):
+        yield mm[offset:offset + FRAME_HEADER.size + length]
+
+
+async def replay(
+    path: str | Path,
+    speed: Optional[float] = 1.0,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Feed a capture back as an async stream shaped like obd_stream().
+
+    speed=1.0 replays in real time, speed=N replays N× faster and
+    speed=None (or 0) replays as fast as the consumer can take packets.
+    Packets keep their recorded `ts`, so detectors see the original timing.
+    """
+    first_ts: Optional[float] = None
+    started = time.monotonic()
+
+    for i, packet in enumerate(iter_capture(path)):
+        if speed:
+            if first_ts is None:
+                first_ts = packet["ts"]
+            due = started + (packet["ts"] - first_ts) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % 1024 == 0:
+            await asyncio.sleep(0)  # let other tasks run at max speed
+
+        yield packet
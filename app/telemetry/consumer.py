@@ -0,0 +1,83 @@
+# Feeds live_state from a telemetry stream inside the API process.
+#
+# Each packet goes through one AlertStage and then into live_state with the
+# alert transitions it produced, which is what build_live_data_block reads
+# for the agent. The source is TELEMETRY_SOURCE: the live OBD listener, or
+# a capture file replayed at TELEMETRY_REPLAY_SPEED (demo / load tests).
+# Runs as a startup task; a stream that ends or fails is logged and the
+# task stops.
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.config import TELEMETRY_REPLAY_SPEED, TELEMETRY_SOURCE
+from app.telemetry.alerts import AlertStage
+from app.telemetry.live_state import LiveStateCache, live_state
+
+logger = logging.getLogger(__name__)
+
+YIELD_EVERY = 256  # packets between yields to the event loop
+
+
+def open_stream(source: str, speed: float = TELEMETRY_REPLAY_SPEED) -> AsyncIterator[Dict[str, Any]]:
+    if source == "obd":
+        from app.obd.ws_listener import obd_stream  # type: ignore
+
+        return obd_stream()
+
+    from app.telemetry.capture import replay
+
+    return replay(source, speed=speed or None)
+
+
+async def consume(
+    stream: AsyncIterator[Dict[str, Any]],
+    cache: LiveStateCache = live_state,
+    stage: Optional[AlertStage] = None,
+) -> int:
+    """
+    Run every packet of `stream` into `cache`. Returns the packet count.
+    """
+    stage = stage or AlertStage()
+    count = 0
+    async for packet in stream:
+        events = stage.process(
+            packet.get("vehicle_id") or "unknown", packet.get("decoded") or {}, packet.get("ts")
+        )
+        cache.feed(packet, events)
+        count += 1
+        if count % YIELD_EVERY == 0:
+            await asyncio.sleep(0)  # a max-speed replay never awaits on its own
+    return count
+
+
+class TelemetryConsumer:
+    def __init__(self, source: str = TELEMETRY_SOURCE) -> None:
+        self.source = source
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.source and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            count = await consume(open_stream(self.source))
+            logger.info("Telemetry stream %s ended after %d packets", self.source, count)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Telemetry stream %s failed", self.source)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+telemetry_consumer = TelemetryConsumer()
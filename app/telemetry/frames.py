@@ -0,0 +1,79 @@
+# Binary framing for telemetry packets.
+#
+# One frame = <u32 payload length><f64 timestamp><payload>
+# where payload is the compact JSON of {"vehicle_id", "pid", "decoded"}.
+# Frames are concatenated back to back to form batches.
+
+import json
+import struct
+import time
+from typing import Any, Dict, Iterator, List
+
+FRAME_HEADER = struct.Struct("<Id")
+
+
+def encode_packet(packet: Dict[str, Any]) -> bytes:
+    """
+    Encode one packet as a single frame.
+    """
+    ts = packet.get("ts")
+    payload = json.dumps(
+        {
+            "vehicle_id": packet.get("vehicle_id"),
+            "pid": packet.get("pid"),
+            "decoded": packet.get("decoded") or {},
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    return FRAME_HEADER.pack(len(payload), time.time() if ts is None else ts) + payload
+
+
+def decode_packet(payload: bytes | memoryview, ts: float) -> Dict[str, Any]:
+    packet = json.loads(bytes(payload))
+    packet["ts"] = ts
+    return packet
+
+
+def pack_batch(packets: List[Dict[str, Any]]) -> bytes:
+    return b"".join(encode_packet(p) for p in packets)
+
+
+_VEHICLE_PREFIX = b'{"vehicle_id":"'
+
+
+def frame_vehicle_id(frame: bytes | memoryview) -> str:
+    """
+    vehicle_id of an encoded frame without decoding the whole payload.
+    encode_packet writes it as the first key, so it is usually a prefix scan.
+    """
+    payload = bytes(frame[FRAME_HEADER.size:FRAME_HEADER.size + 128])
+    if payload.startswith(_VEHICLE_PREFIX):
+        end = payload.find(b'"', len(_VEHICLE_PREFIX))
+        if end != -1 and b"\\" not in payload[:end]:
+            return payload[len(_VEHICLE_PREFIX):end].decode("utf-8")
+    length, _ = FRAME_HEADER.unpack_from(frame, 0)
+    packet = json.loads(bytes(frame[FRAME_HEADER.size:FRAME_HEADER.size + length]))
+    return str(packet.get("vehicle_id") or "unknown")
+
+
+def iter_frames(buf: bytes | memoryview, offset: int = 0) -> Iterator[tuple[float, memoryview]]:
+    """
+    Yield (timestamp, payload) for every complete frame in `buf`.
+    Payloads are zero-copy views into `buf`.
+    """
+    view = memoryview(buf)
+    end = len(view)
+
+    while offset + FRAME_HEADER.size <= end:
+        length, ts = FRAME_HEADER.unpack_from(view, offset)
+        start = offset + FRAME_HEADER.size
+        if start + length > end:
+            break  # truncated tail
+        yield ts, view[start:start + length]
+        offset = start + length
+
+
+def iter_batch(buf: bytes | memoryview) -> Iterator[Dict[str, Any]]:
+    for ts, payload in iter_frames(buf):
+        yield decode_packet(payload, ts)
@@ -0,0 +1,117 @@
+# Per-vehicle latest telemetry state.
+# Fed by the telemetry pipeline, read in O(1) by the diagnostic agent.
+#
+# The cache lives in the process that feeds it: app/telemetry/consumer.py
+# runs the telemetry stream inside the API process (TELEMETRY_SOURCE) so
+# the agent sees live data.
+#
+# Freshness is judged by when a packet was received, not by its own `ts`,
+# so replayed captures and devices with a skewed clock still count as live.
+
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from app.telemetry.alerts import CLEARED
+
+
+class VehicleLiveState:
+    __slots__ = ("readings", "updated_at", "dtcs", "anomalies", "active_alerts")
+
+    def __init__(self, max_anomalies: int) -> None:
+        self.readings: Dict[str, Any] = {}
+        self.updated_at = 0.0
+        self.dtcs: Dict[str, float] = {}            # code -> first seen
+        self.anomalies: Deque[Dict[str, Any]] = deque(maxlen=max_anomalies)
+        self.active_alerts: Dict[str, Dict[str, Any]] = {}
+
+
+class LiveStateCache:
+    """
+    Bounded LRU of VehicleLiveState keyed by vehicle_id.
+    """
+
+    def __init__(
+        self,
+        max_vehicles: int = 50_000,
+        max_anomalies: int = 5,
+        max_age_s: float = 15 * 60,
+    ) -> None:
+        self.max_vehicles = max_vehicles
+        self.max_anomalies = max_anomalies
+        self.max_age_s = max_age_s
+        self._states: "OrderedDict[str, VehicleLiveState]" = OrderedDict()
+
+    def _state(self, vehicle_id: str) -> VehicleLiveState:
+        state = self._states.get(vehicle_id)
+        if state is None:
+            state = self._states[vehicle_id] = VehicleLiveState(self.max_anomalies)
+            if len(self._states) > self.max_vehicles:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(vehicle_id)
+        return state
+
+    # ---------- writers (telemetry pipeline) ----------
+
+    def update_packet(self, packet: Dict[str, Any]) -> None:
+        vehicle_id = packet.get("vehicle_id")
+        if not vehicle_id:
+            return
+
+        state = self._state(vehicle_id)
+        decoded = packet.get("decoded") or {}
+        received_at = time.time()
+
+        for key, value in decoded.items():
+            if key == "dtcs":
+                self.set_dtcs(vehicle_id, value or [], packet.get("ts") or received_at)
+            else:
+                state.readings[key] = value
+
+        state.updated_at = received_at
+
+    def set_dtcs(self, vehicle_id: str, codes: Iterable[str], ts: Optional[float] = None) -> None:
+        """
+        Replace the active DTC set (mode 03 reports the full list each time).
+        """
+        state = self._state(vehicle_id)
+        now = ts or time.time()
+        codes = {c.strip().upper() for c in codes if c}
+        state.dtcs = {c: state.dtcs.get(c, now) for c in codes}
+
+    def record_event(self, event: Dict[str, Any]) -> None:
+        """
+        Track alert transitions from AlertStage.
+        """
+        vehicle_id = event.get("vehicle_id")
+        if not vehicle_id:
+            return
+
+        state = self._state(vehicle_id)
+        if event["state"] == CLEARED:
+            state.active_alerts.pop(event["rule"], None)
+        else:
+            state.active_alerts[event["rule"]] = event
+        state.anomalies.append(event)
+
+    def feed(self, packet: Dict[str, Any], events: List[Dict[str, Any]]) -> None:
+        self.update_packet(packet)
+        for event in events:
+            self.record_event(event)
+
+    # ---------- readers (agent) ----------
+
+    def get(self, vehicle_id: Optional[str]) -> Optional[VehicleLiveState]:
+        """
+        Latest state, or None if unknown or older than max_age_s.
+        """
+        if not vehicle_id:
+            return None
+        state = self._states.get(vehicle_id)
+        if state is None or time.time() - state.updated_at > self.max_age_s:
+            return None
+        return state
+
+
+live_state = LiveStateCache()
@@ -0,0 +1,158 @@
+# Single-producer / single-consumer byte ring on top of
+# multiprocessing.shared_memory. Used to hand packet batches from the
+# ingest process to shard workers without pickling.
+#
+# Layout:
+#   [u64 write_pos][u64 read_pos][u64 closed][u64 reserved][data ...]
+# Positions are monotonic byte counters; the offset in the data area is
+# pos % capacity. Each record is <u32 length><bytes>. A length of
+# WRAP_MARKER means "skip to the start of the data area".
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+_HEADER = struct.Struct("<QQQQ")
+_LEN = struct.Struct("<I")
+WRAP_MARKER = 0xFFFFFFFF
+
+
+class RingClosed(Exception):
+    pass
+
+
+class SharedRing:
+    """
+    Bounded SPSC ring buffer in shared memory.
+
+    Create it in the parent with `SharedRing.create(capacity)` and attach in
+    the worker with `SharedRing.attach(name)`. Only one process may push and
+    only one may pop.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        self.capacity = shm.size - _HEADER.size
+
+    # ---------- lifecycle ----------
+
+    @classmethod
+    def create(cls, capacity: int) -> "SharedRing":
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedRing":
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        """
+        Mark the ring closed; the consumer drains what is left and stops.
+        """
+        struct.pack_into("<Q", self._buf, 16, 1)
+
+    def release(self) -> None:
+        self._buf = None  # drop the exported view before closing
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    # ---------- header access ----------
+
+    def _positions(self) -> tuple[int, int, int]:
+        write_pos, read_pos, closed, _ = _HEADER.unpack_from(self._buf, 0)
+        return write_pos, read_pos, closed
+
+    def _set_write(self, pos: int) -> None:
+        struct.pack_into("<Q", self._buf, 0, pos)
+
+    def _set_read(self, pos: int) -> None:
+        struct.pack_into("<Q", self._buf, 8, pos)
+
+    # ---------- producer ----------
+
+    def push(self, data: bytes, timeout: Optional[float] = None) -> None:
+        """
+        Append one record, waiting for space if the consumer is behind.
+        """
+        need = _LEN.size + len(data)
+        # a record may need padding up to its own size to wrap, so anything
+        # over half the ring could wait for space that never comes
+        if need > self.capacity // 2:
+            raise ValueError("record larger than half the ring capacity")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.00005
+
+        while True:
+            write_pos, read_pos, _ = self._positions()
+            offset = write_pos % self.capacity
+            tail_room = self.capacity - offset
+
+            # records never straddle the end; pad and wrap instead
+            pad = tail_room if tail_room < need else 0
+            if self.capacity - (write_pos - read_pos) >= need + pad:
+                break
+
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("ring full")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.002)
+
+        base = _HEADER.size
+        if pad:
+            if tail_room >= _LEN.size:
+                _LEN.pack_into(self._buf, base + offset, WRAP_MARKER)
+            write_pos += pad
+            offset = 0
+
+        _LEN.pack_into(self._buf, base + offset, len(data))
+        start = base + offset + _LEN.size
+        self._buf[start:start + len(data)] = data
+
+        # publish only after the payload is in place
+        self._set_write(write_pos + need)
+
+    # ---------- consumer ----------
+
+    def pop(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Take the next record. Returns None on timeout,
+        raises RingClosed once the ring is closed and drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.00005
+
+        while True:
+            write_pos, read_pos, closed = self._positions()
+            if write_pos != read_pos:
+                break
+            if closed:
+                raise RingClosed()
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.002)
+
+        base = _HEADER.size
+        offset = read_pos % self.capacity
+        tail_room = self.capacity - offset
+
+        if tail_room < _LEN.size or _LEN.unpack_from(self._buf, base + offset)[0] == WRAP_MARKER:
+            read_pos += tail_room
+            offset = 0
+
+        (length,) = _LEN.unpack_from(self._buf, base + offset)
+        start = base + offset + _LEN.size
+        data = bytes(self._buf[start:start + length])
+
+        self._set_read(read_pos + _LEN.size + length)
+        return data
@@ -0,0 +1,234 @@
+# Multi-process sharded telemetry pipeline.
+#
+# The ingest process hashes vehicle_id onto N worker processes. Packets are
+# batched per shard and moved through a SharedRing (shared memory) instead of
+# a pickled multiprocessing.Queue. Each worker owns the detector and
+# recent-reading buffer for the vehicles hashed to it, so no state is shared
+# between workers.
+#
+# Batches are concatenated frames (app/telemetry/frames.py). Sources that
+# already hold encoded frames, such as capture replay, pass them with
+# submit_frame so the single ingest process does no JSON work; only
+# submit() encodes.
+
+import logging
+import multiprocessing as mp
+import queue
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.telemetry.alerts import AlertStage
+from app.telemetry.frames import encode_packet, frame_vehicle_id, iter_batch
+from app.telemetry.ring import RingClosed, SharedRing
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(vehicle_id: str, shards: int) -> int:
+    """
+    Stable vehicle → shard mapping (same answer in every process).
+    """
+    return zlib.crc32(vehicle_id.encode("utf-8")) % shards
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+
+class VehicleShard:
+    """
+    Per-worker state: one alert stage for the shard plus a bounded buffer of
+    recent decoded readings per vehicle.
+    """
+
+    def __init__(self, buffer_len: int = 64) -> None:
+        self.alerts = AlertStage()
+        self.buffer_len = buffer_len
+        self.buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+
+    def handle(self, packet: Dict[str, Any]) -> List[Dict[str, Any]]:
+        vehicle_id = packet.get("vehicle_id") or "unknown"
+        decoded = packet.get("decoded") or {}
+
+        buf = self.buffers.get(vehicle_id)
+        if buf is None:
+            buf = self.buffers[vehicle_id] = deque(maxlen=self.buffer_len)
+        buf.append(decoded)
+
+        return self.alerts.process(vehicle_id, decoded, packet.get("ts"))
+
+
+def _worker_main(
+    shard_id: int,
+    ring_name: str,
+    events: "mp.Queue",
+    handler_factory: Callable[[], Any],
+) -> None:
+    ring = SharedRing.attach(ring_name)
+    handler = handler_factory()
+    processed = 0
+
+    try:
+        while True:
+            try:
+                batch = ring.pop(timeout=0.5)
+            except RingClosed:
+                break
+            if batch is None:
+                continue
+
+            for packet in iter_batch(batch):
+                processed += 1
+                for event in handler.handle(packet) or ():
+                    # transitions are rare after debouncing, so pickling is fine here
+                    events.put(event)
+    finally:
+        events.put({"shard": shard_id, "processed": processed, "done": True})
+        ring.release()
+
+
+# --------------------------------------------------
+# Ingest side
+# --------------------------------------------------
+
+class ShardedPipeline:
+    """
+    Usage:
+
+        with ShardedPipeline(workers=4) as pipeline:
+            async for packet in obd_stream():
+                pipeline.submit(packet)
+                for event in pipeline.poll_events():
+                    ...
+
+    `handler_factory` builds the per-worker handler; it must be importable
+    (module-level) because workers are spawned.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        batch_size: int = 256,
+        ring_bytes: int = 8 * 1024 * 1024,
+        handler_factory: Callable[[], Any] = VehicleShard,
+    ) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.handler_factory = handler_factory
+        self.ring_bytes = ring_bytes
+
+        self._ctx = mp.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._rings: List[SharedRing] = []
+        self._procs: List[Any] = []
+        self._pending: List[List[bytes]] = [[] for _ in range(workers)]
+        self.stats: Dict[int, int] = {}
+        self._started = False
+
+    def start(self) -> "ShardedPipeline":
+        for shard_id in range(self.workers):
+            ring = SharedRing.create(self.ring_bytes)
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(shard_id, ring.name, self._events, self.handler_factory),
+                daemon=True,
+            )
+            proc.start()
+            self._rings.append(ring)
+            self._procs.append(proc)
+
+        self._started = True
+        return self
+
+    def submit(self, packet: Dict[str, Any]) -> None:
+        self.submit_frame(encode_packet(packet), str(packet.get("vehicle_id") or "unknown"))
+
+    def submit_frame(self, frame: bytes, vehicle_id: Optional[str] = None) -> None:
+        """
+        Queue one already encoded frame (frames.encode_packet layout).
+        """
+        if vehicle_id is None:
+            vehicle_id = frame_vehicle_id(frame)
+        shard = shard_for(vehicle_id, self.workers)
+        pending = self._pending[shard]
+        pending.append(frame)
+        if len(pending) >= self.batch_size:
+            self._send(shard)
+
+    def flush(self) -> None:
+        for shard in range(self.workers):
+            if self._pending[shard]:
+                self._send(shard)
+
+    def _send(self, shard: int) -> None:
+        self._rings[shard].push(b"".join(self._pending[shard]))
+        self._pending[shard] = []
+
+    def poll_events(self, max_items: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Non-blocking drain of alert transitions emitted by workers.
+        """
+        out: List[Dict[str, Any]] = []
+        while len(out) < max_items:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event.get("done"):
+                self.stats[event["shard"]] = event["processed"]
+            else:
+                out.append(event)
+        return out
+
+    def close(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Flush, stop workers and return any events still queued. A worker
+        that died without reporting is logged and left out of `stats`.
+        """
+        if not self._started:
+            return []
+
+        self.flush()
+        for ring in self._rings:
+            ring.close()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        events: List[Dict[str, Any]] = []
+        while len(self.stats) < self.workers:
+            try:
+                event = self._events.get(timeout=0.5)
+            except queue.Empty:
+                missing = [s for s in range(self.workers) if s not in self.stats]
+                if all(not self._procs[s].is_alive() for s in missing):
+                    # a dead worker's "done" never arrives; give it a moment
+                    # in case it was still in flight, then give up on it
+                    try:
+                        event = self._events.get(timeout=0.5)
+                    except queue.Empty:
+                        logger.error("Telemetry shards %s exited without reporting", missing)
+                        break
+                elif deadline is not None and time.monotonic() > deadline:
+                    logger.error("Telemetry shards %s did not stop in time", missing)
+                    break
+                else:
+                    continue
+            if event.get("done"):
+                self.stats[event["shard"]] = event["processed"]
+            else:
+                events.append(event)
+
+        for proc in self._procs:
+            proc.join(timeout)
+        for ring in self._rings:
+            ring.release()
+
+        self._started = False
+        return events
+
+    def __enter__(self) -> "ShardedPipeline":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
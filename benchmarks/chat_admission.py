@@ -0,0 +1,147 @@
+"""
+Load test for /vehicle/chat admission control, with a stubbed agent.
+
+    python -m benchmarks.chat_admission --rate 80 --duration 10
+
+The stub models an LLM provider that serves `--capacity` concurrent calls
+at `--latency-ms`. Past that, every call slows down in proportion (shared
+throughput), which is what a rate-limited upstream looks like from here.
+Requests arrive open-loop (Poisson) from many users plus one user who
+floods. The same load runs with admission control off and on.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import httpx  # type: ignore
+from fastapi import Request  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+
+from app.auth.auth import verify_token
+from app.main import create_app
+from app.routers import vehicle_chat
+from app.services.admission import AdmissionController
+
+
+class StubProvider:
+    def __init__(self, capacity: int, latency_s: float) -> None:
+        self.capacity = capacity
+        self.latency_s = latency_s
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def run_agent(self, user_input: str, chat_id, user_id: str, **_) -> Dict:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            load = self.in_flight
+        try:
+            time.sleep(self.latency_s * max(1.0, load / self.capacity))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return {
+            "diagnosis": "stub", "explanation": "stub", "severity": 0.1,
+            "action": "ASK", "steps": [], "follow_up_questions": [],
+            "confidence": 0.5, "chat_id": chat_id or uuid.uuid4(), "youtube_urls": [],
+        }
+
+    async def submit(self, **turn) -> Dict:
+        # stands in for chat_actors: every request uses its own chat here
+        return await run_in_threadpool(self.run_agent, **turn)
+
+
+async def drive(app, rate: float, duration: float, users: int, flood_share: float) -> List[Tuple[int, float]]:
+    rng = random.Random(7)
+    results: List[Tuple[int, float]] = []
+
+    async def one(client: httpx.AsyncClient, user: str, ongoing: bool) -> None:
+        body = {"message": "engine makes a ticking noise"}
+        if ongoing:
+            body["chat_id"] = str(uuid.uuid4())
+        t0 = time.perf_counter()
+        res = await client.post(
+            "/vehicle/chat",
+            json=body,
+            headers={"Authorization": "Bearer x", "X-User": user},
+        )
+        results.append((res.status_code, time.perf_counter() - t0))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        tasks = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            user = "flooder" if rng.random() < flood_share else f"user-{rng.randrange(users)}"
+            tasks.append(asyncio.create_task(one(client, user, rng.random() < 0.5)))
+            await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def report(label: str, results: List[Tuple[int, float]], provider: StubProvider) -> None:
+    ok = sorted(lat for status, lat in results if status == 200)
+    rejected = [lat for status, lat in results if status == 429]
+    other = len(results) - len(ok) - len(rejected)
+    assert not other, f"{other} responses were neither 200 nor 429"
+    p = lambda q: ok[min(len(ok) - 1, int(len(ok) * q))] * 1000 if ok else float("nan")  # noqa: E731
+    print(
+        f"{label:<16}{len(results):>7}{len(ok):>7}{len(rejected):>7}"
+        f"{p(0.5):>10.0f}{p(0.99):>10.0f}"
+        f"{(statistics.median(rejected) * 1000 if rejected else 0):>12.0f}{provider.peak:>8}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=80, help="offered requests/s")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--flood-share", type=float, default=0.1)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+
+    def fake_user(request: Request) -> Dict:
+        return {"sub": request.headers["X-User"]}
+
+    app.dependency_overrides[verify_token] = fake_user
+    vehicle_chat.ensure_user_exists = lambda **_: None
+
+    print(f"offered {args.rate:g} req/s for {args.duration:g}s; provider capacity "
+          f"{args.capacity} x {args.latency_ms:g} ms = {args.capacity / args.latency_ms * 1000:g} req/s")
+    print(f"{'admission':<16}{'sent':>7}{'200':>7}{'429':>7}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'429 p50 ms':>12}{'peak':>8}")
+
+    controllers = {
+        "off": AdmissionController(
+            rate_per_s=1e9, burst=10**9, max_concurrent=10**9,
+            max_queue=10**9, queue_timeout_s=1e9,
+        ),
+        "on": AdmissionController(
+            rate_per_s=0.5, burst=5, max_concurrent=args.capacity,
+            max_queue=2 * args.capacity, queue_timeout_s=2 * args.latency_ms / 1000,
+            initial_service_s=args.latency_ms / 1000,
+        ),
+    }
+    for label, controller in controllers.items():
+        provider = StubProvider(args.capacity, args.latency_ms / 1000)
+        vehicle_chat.chat_actors = provider
+        vehicle_chat.chat_admission = controller
+        results = asyncio.run(drive(app, args.rate, args.duration, args.users, args.flood_share))
+        report(label, results, provider)
+        if label == "on":
+            print("admission stats:", controller.stats)
+
+
+if __name__ == "__main__":
+    main()
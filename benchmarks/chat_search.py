@@ -0,0 +1,161 @@
+"""
+Chat history search: index backfill and query latency for one heavy user.
+
+    python -m benchmarks.chat_search --turns 30000 --queries 200
+    python -m benchmarks.chat_search --dsn postgresql://localhost/bench
+
+Generates `--turns` synthetic turns (symptom prompts with a diagnosis and
+explanation) for one user. Without `--dsn` they are served from memory in
+keyset pages, which isolates the indexing cost; with `--dsn` they are
+inserted into the benchmark schema and read through AsyncpgBackend. Prints
+the first-search (backfill) time and the p50/p99 of later searches, over
+all turns and with a `since` filter.
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services import chat_search as search_module
+from app.services.chat_search import ChatSearch
+
+USER = "bench-user"
+
+SYMPTOMS = [
+    "squealing noise when braking", "engine misfire at idle", "clutch slipping uphill",
+    "battery drains overnight", "steering wheel vibrates at speed", "coolant leak under the car",
+    "check engine light with rough idle", "gear shifts are jerky", "AC blows warm air",
+    "headlights flicker at night", "car pulls to the left", "smell of burning oil",
+]
+DIAGNOSES = [
+    "Worn brake pads", "Faulty ignition coil", "Worn clutch plate", "Parasitic battery drain",
+    "Unbalanced front wheels", "Leaking radiator hose", "Dirty throttle body",
+    "Low transmission fluid", "Low refrigerant", "Failing alternator", "Wheel misalignment",
+    "Valve cover gasket leak",
+]
+QUERIES = [
+    "brake squeal", "misfire", "clutch", "battery drain", "vibration steering", "coolant leak",
+    "rough idle", "transmission", "AC warm", "alternator", "alignment pulls left", "oil smell",
+    "ignition coil misfire idle", "radiator hose",
+]
+
+
+def make_turns(n: int, start: datetime) -> List[Dict[str, Any]]:
+    rng = random.Random(7)
+    turns = []
+    for i in range(n):
+        k = rng.randrange(len(SYMPTOMS))
+        diagnosis = DIAGNOSES[k]
+        turns.append({
+            "id": i + 1,
+            "chat_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "prompt": f"My car has a {SYMPTOMS[k]}, started about {rng.randint(1, 9)} days ago",
+            "diagnosis": diagnosis,
+            "explanation": f"{diagnosis} is the most likely cause of the {SYMPTOMS[k]}. "
+                           f"Inspect it before driving long distances.",
+        })
+    return turns
+
+
+class MemoryTurns:
+    def __init__(self, turns: List[Dict[str, Any]]) -> None:
+        self.turns = turns
+
+    def list_user_turns(self, user_id: str, after: Optional[Tuple[str, Any]], limit: int):
+        start = after[1] if after else 0  # ids are positions + 1
+        return self.turns[start:start + limit]
+
+
+def insert_turns(dsn: str, turns: List[Dict[str, Any]]) -> None:
+    import asyncio
+    import json
+
+    import asyncpg  # type: ignore
+
+    from benchmarks.storage_backends import create_schema
+
+    create_schema(dsn)
+
+    async def go():
+        conn = await asyncpg.connect(dsn)
+        try:
+            await conn.execute("DELETE FROM ai_chat_history WHERE user_id = $1", USER)
+            await conn.executemany(
+                "INSERT INTO ai_chat_history (chat_id, user_id, prompt, response_ai, created_at) "
+                "VALUES ($1, $2, $3, $4::jsonb, $5)",
+                [
+                    (t["chat_id"], USER, t["prompt"],
+                     json.dumps({"diagnosis": t["diagnosis"], "explanation": t["explanation"]}),
+                     datetime.fromisoformat(t["created_at"]))
+                    for t in turns
+                ],
+            )
+        finally:
+            await conn.close()
+
+    asyncio.run(go())
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dsn")
+    args = parser.parse_args()
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    turns = make_turns(args.turns, start)
+
+    if args.dsn:
+        from app.storage.asyncpg_backend import AsyncpgBackend
+
+        insert_turns(args.dsn, turns)
+        storage = AsyncpgBackend(args.dsn)
+    else:
+        storage = MemoryTurns(turns)
+    search_module.get_storage = lambda: storage
+    search = ChatSearch(max_turns=10 * args.turns)
+
+    t0 = time.perf_counter()
+    search.search(USER, QUERIES[0])
+    backfill_ms = (time.perf_counter() - t0) * 1000
+
+    rng = random.Random(3)
+    latencies = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        search.search(USER, rng.choice(QUERIES), limit=10)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    since = (start + timedelta(minutes=args.turns * 3 // 4)).date()
+    since_ms = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        search.search(USER, rng.choice(QUERIES), limit=10, since=since)
+        since_ms.append((time.perf_counter() - t0) * 1000)
+
+    source = "postgres" if args.dsn else "memory"
+    print(f"{args.turns} turns for one user, served from {source}")
+    print(f"first search (backfill + query): {backfill_ms:,.0f} ms")
+    print(f"{'search':<24}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, samples in (("all time", latencies), ("last quarter (since)", since_ms)):
+        print(f"{name:<24}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}"
+              f"{statistics.mean(samples):>10.2f}")
+
+    results = search.search(USER, "ignition coil misfire", limit=1)
+    if results:
+        print("top hit:", results[0]["highlights"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Degraded mode: rule engine latency and LLM calls during an outage.
+
+    python -m benchmarks.degraded --messages 20000 --outage-turns 500
+
+Times RuleEngine.diagnose over `--messages` synthetic user messages
+(symptoms, trouble codes, follow-ups like "yes it does") next to a loop
+that checks every guard keyword with `in` (the straightforward way to
+match guards). Then replays `--outage-turns` turns against a model that
+fails after `--timeout-ms` (a provider outage), with and without the LLM
+circuit breaker, counting the calls that reached the model and the time
+spent waiting on them.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import List
+
+from app.agent import degraded
+from app.agent.degraded import CircuitBreaker, RuleEngine
+from app.agent.vehicle_symptom import SYMPTOM_GUARDS
+from app.metrics import Registry
+
+MESSAGES = [
+    "my car makes a grinding noise when I change gear",
+    "brake pedal feels spongy and there is squealing",
+    "engine won't start, just a clicking sound",
+    "check engine light is on, code P0301",
+    "white smoke and a burning smell after driving",
+    "car feels sluggish, slow acceleration uphill",
+    "got P0171 and P0420 on the scanner",
+    "yes it does",
+    "it started yesterday",
+    "whining sound when accelerating",
+]
+
+
+def naive_match(text: str) -> str | None:
+    text = text.lower()
+    best, best_hits = None, 0
+    for name, guard in SYMPTOM_GUARDS.items():
+        hits = sum(k in text for k in guard["keywords"])
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+def time_calls(func, messages: List[str]) -> List[float]:
+    out = []
+    for m in messages:
+        t0 = time.perf_counter()
+        func(m)
+        out.append((time.perf_counter() - t0) * 1e6)
+    return sorted(out)
+
+
+class Outage(Exception):
+    pass
+
+
+def replay_outage(turns: int, timeout_s: float, breaker: CircuitBreaker | None) -> dict:
+    calls, waited = 0, 0.0
+    for _ in range(turns):
+        if breaker is not None and not breaker.allow():
+            continue  # answered from the rules
+        calls += 1
+        waited += timeout_s  # the call fails after the client timeout
+        if breaker is not None:
+            breaker.record_failure(Outage())
+    return {"calls": calls, "waited_s": waited}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--outage-turns", type=int, default=500)
+    parser.add_argument("--timeout-ms", type=float, default=30000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    messages = [rng.choice(MESSAGES) for _ in range(args.messages)]
+    degraded.metrics = Registry()
+
+    t0 = time.perf_counter()
+    engine = RuleEngine(SYMPTOM_GUARDS)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    rules = time_calls(lambda m: engine.diagnose(m, context="Agent: Unusual engine noise"), messages)
+    match = time_calls(engine.match, messages)
+    naive = time_calls(naive_match, messages)
+
+    print(f"{args.messages} messages, {sum(len(g['keywords']) for g in SYMPTOM_GUARDS.values())} "
+          f"guard keywords, regex compiled in {build_ms:.1f} ms")
+    print(f"{'':<22}{'p50 us':>9}{'p99 us':>9}{'per s':>11}")
+    for name, samples in (("diagnose (codes+rules)", rules), ("match (regex)", match), ("match (keyword loop)", naive)):
+        print(f"{name:<22}{statistics.median(samples):>9.1f}{samples[int(0.99 * (len(samples) - 1))]:>9.1f}"
+              f"{1e6 / statistics.mean(samples):>11,.0f}")
+
+    # the replay is instantaneous, so the breaker never reaches its cooldown
+    timeout_s = args.timeout_ms / 1000
+    without = replay_outage(args.outage_turns, timeout_s, None)
+    with_breaker = replay_outage(args.outage_turns, timeout_s, CircuitBreaker("llm", 3, 30))
+    print(f"\n{args.outage_turns} turns during an outage, model calls fail after {args.timeout_ms:g} ms")
+    print(f"no breaker:   {without['calls']} model calls, {without['waited_s']:,.0f} s waited")
+    print(f"with breaker: {with_breaker['calls']} model calls, {with_breaker['waited_s']:,.0f} s waited")
+
+
+if __name__ == "__main__":
+    main()
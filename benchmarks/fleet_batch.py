@@ -0,0 +1,128 @@
+"""
+Fleet batch jobs: LLM calls and wall time with and without request packing.
+
+    python -m benchmarks.fleet_batch --cases 500 --llm-ms 1500
+
+Runs FleetJobs over `--cases` synthetic vehicle cases against a stub model
+that sleeps `--llm-ms` per call plus `--per-case-ms` per case in the prompt
+(longer replies), and drops a case from a packed reply now and then, as
+real models do. `--dtc-only` of the cases carry known trouble codes and no
+symptoms, so the OBD table answers them. Turns and job state are "saved"
+to an in-memory storage stub that counts the bulk writes.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage  # type: ignore
+
+from app.agent import vehicle_agent
+from app.data import OBD_CODES
+from app.metrics import Registry
+from app.models.fleet import FleetCase
+from app.services import fleet_batch
+from app.services.fleet_batch import FleetJobs
+
+SYMPTOMS = ["rough idle when cold", "squealing when braking", "AC blows warm air",
+            "battery dead every morning", "car pulls to the left", "clutch slipping uphill"]
+
+
+class StubLLM:
+    def __init__(self, latency_s: float, per_case_s: float, drop_rate: float) -> None:
+        self.latency_s = latency_s
+        self.per_case_s = per_case_s
+        self.drop_rate = drop_rate
+        self.calls = 0
+        self.rng = random.Random(3)
+
+    def invoke(self, messages):
+        self.calls += 1
+        cases = json.loads(messages[-1].content)
+        time.sleep(self.latency_s + self.per_case_s * len(cases))
+        answers = [
+            {"case": c["case"], "diagnosis": "Worn part", "explanation": "Stub.",
+             "severity": 0.5, "action": "CONFIRM_WORKSHOP", "confidence": 0.7}
+            for c in cases
+            if len(cases) == 1 or self.rng.random() >= self.drop_rate
+        ]
+        return AIMessage(content=json.dumps(answers))
+
+
+class MemoryTurns:
+    def __init__(self) -> None:
+        self.rows: List[Dict[str, Any]] = []
+        self.writes = 0
+        self.job_writes = 0
+
+    def save_chat_turns(self, rows: List[Dict[str, Any]]) -> None:
+        self.writes += 1
+        self.rows += rows
+
+    def save_fleet_job(self, job: Dict[str, Any]) -> None:
+        self.job_writes += 1
+
+
+def make_cases(n: int, dtc_only: float, rng: random.Random) -> List[FleetCase]:
+    known = [code for code in OBD_CODES if code.startswith("P0")]
+    cases = []
+    for i in range(n):
+        if rng.random() < dtc_only:
+            cases.append(FleetCase(vehicle_id=uuid.uuid4(), dtcs=rng.sample(known, 2), reference=f"v{i}"))
+        else:
+            cases.append(FleetCase(vehicle_id=uuid.uuid4(), symptoms=rng.choice(SYMPTOMS), reference=f"v{i}"))
+    return cases
+
+
+async def run(args, cases: List[FleetCase], pack_size: int) -> dict:
+    llm = StubLLM(args.llm_ms / 1000, args.per_case_ms / 1000, args.drop_rate)
+    storage = MemoryTurns()
+    vehicle_agent.get_llm = lambda: llm
+    fleet_batch.get_storage = lambda: storage
+    fleet_batch.metrics = Registry()
+
+    jobs = FleetJobs(pack_size=pack_size, llm_concurrency=args.concurrency)
+    t0 = time.perf_counter()
+    job = jobs.submit("bench-user", cases)
+    first_s = None
+    async for _ in job.follow():
+        if first_s is None:
+            first_s = time.perf_counter() - t0
+    return {
+        "wall_s": time.perf_counter() - t0,
+        "first_s": first_s,
+        "llm_calls": llm.calls,
+        "counts": job.counts,
+        "saved": len(storage.rows),
+        "writes": storage.writes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--dtc-only", type=float, default=0.3)
+    parser.add_argument("--llm-ms", type=float, default=1500)
+    parser.add_argument("--per-case-ms", type=float, default=150)
+    parser.add_argument("--drop-rate", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    cases = make_cases(args.cases, args.dtc_only, random.Random(7))
+    print(f"{args.cases} cases, {args.dtc_only:.0%} codes only, model call {args.llm_ms:g} ms "
+          f"+ {args.per_case_ms:g} ms/case, {args.concurrency} calls in flight")
+    print(f"{'pack':>5}{'LLM calls':>11}{'local':>7}{'llm':>6}{'error':>7}"
+          f"{'saved':>7}{'writes':>8}{'first s':>9}{'wall s':>8}")
+    for pack_size in (1, 4, 8, 16):
+        r = asyncio.run(run(args, cases, pack_size))
+        c = r["counts"]
+        print(f"{pack_size:>5}{r['llm_calls']:>11}{c['local']:>7}{c['llm']:>6}{c['error']:>7}"
+              f"{r['saved']:>7}{r['writes']:>8}{r['first_s']:>9.2f}{r['wall_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Import-time benchmark for app start-up, with a regression budget.
+
+Each run imports the target in a fresh interpreter with `-X importtime`
+and reads its cumulative time from the report. Exits non-zero when the
+median exceeds the budget or when a module that must load lazily shows up.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 800 --runs 7 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Must not be imported by `import app.main`; they load on first use / warm-up
+LAZY_MODULES = (
+    "langchain_core",
+    "langchain_groq",
+    "langchain_community",
+    "tavily",
+    "supabase",
+    "numpy",
+    "asyncpg",
+)
+
+# Settings app.config requires at import; dummy values are enough here
+DUMMY_ENV = {
+    "CLERK_ISSUER": "https://example.clerk.accounts.dev",
+    "SUPABASE_URL": "https://example.supabase.co",
+    "SUPABASE_SERVICE_KEY": "dummy",
+    "GROQ_API_KEY": "dummy",
+    "TAVILY_WEB_SEARCH": "dummy",
+}
+
+
+def import_report(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    {module: (self_us, cumulative_us)} for one fresh-interpreter import.
+    """
+    env = {**DUMMY_ENV, **os.environ}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    report: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        report[name.strip()] = (int(self_us), int(cumulative_us))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    import_report(args.module)  # warm the bytecode / OS file cache
+
+    totals: List[float] = []
+    report: Dict[str, Tuple[int, int]] = {}
+    for _ in range(args.runs):
+        report = import_report(args.module)
+        totals.append(report[args.module][1] / 1000)
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), budget {args.budget_ms:.0f} ms")
+
+    print("\nheaviest top-level packages (last run):")
+    packages: Dict[str, int] = {}
+    for name, (_, cumulative) in report.items():
+        if "." not in name and name != args.module:
+            packages[name] = max(packages.get(name, 0), cumulative)
+    for name, cumulative in sorted(packages.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = [m for m in LAZY_MODULES if m in report]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if median > args.budget_ms:
+        failures.append(f"median {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
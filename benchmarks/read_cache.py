@@ -0,0 +1,133 @@
+"""
+Per-turn context reads with and without the read cache.
+
+    python -m benchmarks.read_cache --turns 500 --latency-ms 15
+    python -m benchmarks.read_cache --redis-url redis://localhost:6379/0
+
+Replays chat turns through app.db.ai_memory against a storage stub that
+costs `--latency-ms` per round trip (a PostgREST call from the app host).
+Each turn reads the chat summary, the chat's issue summary and the
+vehicle's open issues, then writes the summary. Every `--issue-every`
+turns it also upserts an issue, which invalidates that chat's and vehicle's
+issue entries.
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from app.cache import KINDS, ReadCache
+from app.cache.memory_backend import MemoryBackend
+from app.db import ai_memory
+from app.metrics import Registry
+
+
+class SlowStorage:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.round_trips = 0
+        self.summaries: Dict[str, str] = {}
+        self.issues: Dict[str, Dict] = {}
+
+    def _trip(self) -> None:
+        self.round_trips += 1
+        time.sleep(self.latency_s)
+
+    def load_chat_summary(self, chat_id: str):
+        self._trip()
+        return self.summaries.get(chat_id)
+
+    def upsert_chat_summary(self, chat_id: str, vehicle_id: str, summary: str) -> None:
+        self._trip()
+        self.summaries[chat_id] = summary
+
+    def load_chat_issue(self, chat_id: str):
+        self._trip()
+        return self.issues.get(chat_id)
+
+    def load_open_issues(self, vehicle_id: str) -> List[Dict]:
+        self._trip()
+        return [
+            {"title": i["title"], "severity": i["severity"]}
+            for i in self.issues.values() if i["vehicle_id"] == vehicle_id
+        ]
+
+    def insert_issue(self, fields: Dict) -> None:
+        self._trip()
+        self.issues[fields["chat_id"]] = dict(fields, id=fields["chat_id"])
+
+    def update_issue(self, issue_id, fields: Dict) -> None:
+        self._trip()
+        self.issues[issue_id].update(fields)
+
+
+def run(cache: ReadCache, args) -> Dict:
+    storage = SlowStorage(args.latency_ms / 1000)
+    registry = Registry()
+    ai_memory.get_storage = lambda: storage
+    ai_memory.get_read_cache = lambda: cache
+    import app.cache as cache_module
+    cache_module.metrics = registry
+
+    rng = random.Random(1)
+    chats = [(f"chat-{i}", f"vehicle-{i % args.vehicles}") for i in range(args.chats)]
+
+    read_s = 0.0
+    for turn in range(args.turns):
+        chat_id, vehicle_id = rng.choice(chats)
+
+        t0 = time.perf_counter()
+        summary = ai_memory.load_chat_summary(chat_id) or ""
+        ai_memory.load_chat_issue_summary(chat_id)
+        ai_memory.load_open_issues(vehicle_id)
+        read_s += time.perf_counter() - t0
+
+        ai_memory.upsert_chat_summary(chat_id, vehicle_id, summary + f"\n- turn {turn}")
+        if turn % args.issue_every == 0:
+            ai_memory.upsert_issue_from_summary(
+                vehicle_id, chat_id, {"title": f"Issue {turn}", "summary": "s", "severity": 0.5}
+            )
+
+    rates = cache.hit_rates() if cache.backend else {k: None for k in KINDS}
+    return {
+        "trips": storage.round_trips / args.turns,
+        "read_ms": read_s / args.turns * 1000,
+        "rates": rates,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--vehicles", type=int, default=80)
+    parser.add_argument("--issue-every", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=15)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    caches = {
+        "off": ReadCache(None, 60),
+        "memory": ReadCache(MemoryBackend(10_000), 60),
+    }
+    if args.redis_url:
+        from app.cache.redis_backend import RedisBackend
+
+        backend = RedisBackend(args.redis_url, prefix=f"bench:{time.time()}:")
+        caches["redis"] = ReadCache(backend, 60)
+
+    print(f"{args.turns} turns over {args.chats} chats / {args.vehicles} vehicles, "
+          f"{args.latency_ms:g} ms per storage round trip")
+    print(f"{'cache':<8}{'trips/turn':>11}{'read ms/turn':>14}" + "".join(f"{k + ' hit':>18}" for k in KINDS))
+    for name, cache in caches.items():
+        r = run(cache, args)
+        rates = "".join(
+            f"{'-' if r['rates'][k] is None else format(r['rates'][k], '.0%'):>18}" for k in KINDS
+        )
+        print(f"{name:<8}{r['trips']:>11.2f}{r['read_ms']:>14.1f}{rates}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Similar-case retrieval: indexing cost, query latency and IVF recall.
+
+    python -m benchmarks.retrieval --cases 20000 --queries 300
+
+Builds CaseIndex over `--cases` synthetic resolved issues (a cause, its
+symptoms and a fix, worded a few different ways) served from an in-memory
+storage stub, then asks for similar cases from symptom-only user messages
+that never mention the cause. Reports how often the top hit has the cause
+that produced the symptoms, p50/p99 query latency next to an exact scan,
+and recall@10 of the IVF lists against that exact scan.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agent import retrieval
+from app.agent.retrieval import CaseIndex
+
+# cause -> (symptoms, fix)
+CAUSES = {
+    "Worn brake pads": (["squealing when braking", "grinding noise when stopping", "longer braking distance"], "replaced brake pads"),
+    "Faulty ignition coil": (["engine misfire at idle", "rough idle and shaking", "check engine light flashing"], "replaced ignition coil on cylinder 2"),
+    "Worn clutch plate": (["clutch slipping uphill", "revs rise but car does not speed up", "burning smell after climbing"], "replaced clutch plate and pressure plate"),
+    "Parasitic battery drain": (["battery dead every morning", "car will not start after a night", "battery drains overnight"], "found glovebox light staying on"),
+    "Unbalanced front wheels": (["steering wheel vibrates at highway speed", "shaking above 80 km/h", "vibration through the steering"], "balanced front wheels"),
+    "Leaking radiator hose": (["coolant puddle under the car", "temperature gauge rising in traffic", "sweet smell from the engine bay"], "replaced the upper radiator hose"),
+    "Failing alternator": (["headlights dim and flicker", "battery warning light on while driving", "electrics cutting out at night"], "replaced the alternator"),
+    "Low refrigerant": (["AC blows warm air", "air conditioning not cold anymore", "AC cold only at speed"], "recharged refrigerant and fixed a leaking valve"),
+    "Wheel misalignment": (["car pulls to the left", "steering wheel off centre on straight road", "inner tyre edge wearing fast"], "four wheel alignment"),
+    "Valve cover gasket leak": (["smell of burning oil", "oil on the exhaust manifold", "smoke from the engine bay when hot"], "replaced valve cover gasket"),
+    "Failing fuel pump": (["car sputters at high speed", "hard to start when warm", "loss of power going uphill"], "replaced the fuel pump"),
+    "Worn CV joint": (["clicking noise when turning", "clunk when accelerating out of a corner", "knocking while turning at low speed"], "replaced the outer CV joint"),
+}
+FILLER = ["started last week", "happens every day", "worse in the morning", "after a long drive",
+          "since the last service", "only sometimes", "on my way to work"]
+
+
+def make_cases(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    names = list(CAUSES)
+    cases = []
+    for i in range(n):
+        cause = rng.choice(names)
+        symptoms, fix = CAUSES[cause]
+        seen = rng.sample(symptoms, 2)
+        cases.append({
+            "id": i + 1,
+            "vehicle_id": f"vehicle-{rng.randrange(n // 3 + 1)}",
+            "title": rng.choice([cause, f"{cause} suspected", f"Possible {cause.lower()}"]),
+            "summary": f"Driver reported {seen[0]} and {seen[1]}, {rng.choice(FILLER)}. "
+                       f"Diagnosed {cause.lower()}; {fix}.",
+            "severity": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            "resolved_at": (start + timedelta(minutes=i)).isoformat(),
+            "cause": cause,
+        })
+    return cases
+
+
+class MemoryIssues:
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self.rows = rows
+
+    def list_resolved_issues(self, after: Optional[Tuple[str, Any]], limit: int):
+        start = after[1] if after else 0  # ids are positions + 1
+        return self.rows[start:start + limit]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    rows = make_cases(args.cases, rng)
+    retrieval.get_storage = lambda: MemoryIssues(rows)
+    index = CaseIndex(refresh_s=3600)
+
+    t0 = time.perf_counter()
+    index.refresh()
+    build_s = time.perf_counter() - t0
+
+    queries = []
+    for _ in range(args.queries):
+        cause = rng.choice(list(CAUSES))
+        queries.append((cause, f"{rng.choice(CAUSES[cause][0])}, {rng.choice(FILLER)}"))
+
+    latencies, exact_ms, correct, answered = [], [], 0, 0
+    recall_hits = recall_total = 0
+    for cause, text in queries:
+        t0 = time.perf_counter()
+        cases = index.similar(text, args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if cases:
+            answered += 1
+            correct += rows[cases[0]["id"] - 1]["cause"] == cause
+
+        query = index._query_vector(text)
+        if query is not None:
+            # many synthetic cases tie, so a hit counts if it scores as well
+            # as the exact 10th best rather than by identity
+            exact = index.vectors.search(query, 10, exact=True)
+            approx = index.vectors.search(query, 10)
+            recall_hits += sum(score >= exact[-1][1] - 1e-6 for _, score in approx)
+            recall_total += len(exact)
+
+            t0 = time.perf_counter()
+            index.vectors.search(query, args.k, exact=True)
+            exact_ms.append((time.perf_counter() - t0) * 1000)
+
+    mode = "IVF" if index.vectors._centroids is not None else "exact scan"
+    print(f"{len(index)} resolved cases, {mode}, {args.queries} symptom-only queries")
+    print(f"build: {build_s:.2f} s ({len(index) / build_s:,.0f} cases/s)")
+    print(f"query: p50 {percentile(latencies, 0.5):.2f} ms, p99 {percentile(latencies, 0.99):.2f} ms")
+    print(f"exact scan of the vectors alone: p50 {percentile(exact_ms, 0.5):.2f} ms")
+    print(f"queries with a case above the score floor: {answered / len(queries):.0%}")
+    print(f"top case has the right cause: {correct / max(answered, 1):.0%}")
+    print(f"recall@10 vs exact scan: {recall_hits / max(recall_total, 1):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Tavily calls and latency with and without the search cache.
+
+    python -m benchmarks.search_cache --requests 2000 --threads 16 --latency-ms 1500
+
+Replays `--requests` web searches from `--threads` concurrent callers
+through CachedTavilyClient against a stub client that sleeps
+`--latency-ms` per call (an advanced-depth Tavily search). Queries follow a
+Zipf-like popularity over `--distinct` automotive queries, with the
+casing / spacing differences users type. "restart" reopens the SQLite file
+with an empty memory LRU, as a redeployed worker would.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from app.agent.services import tavily as tavily_module
+from app.agent.services.tavily import CachedTavilyClient
+from app.cache import search_cache as cache_module
+from app.cache.search_cache import SearchCache
+from app.metrics import Registry
+
+CODES = ["P0300", "P0301", "P0171", "P0420", "P0128", "P0442", "P0700", "P0113"]
+TOPICS = ["brake pads squeal", "clutch slipping", "battery drain overnight",
+          "coolant leak", "AC blowing warm", "steering vibration", "alternator failing"]
+MODELS = ["", "maruti swift", "hyundai i20", "honda city", "tata nexon", "toyota innova",
+          "mahindra xuv500", "kia seltos", "renault kwid", "ford ecosport", "vw polo"]
+
+
+class StubTavily:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, **params) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        return {"query": query, "results": [{"url": f"https://example.com/{abs(hash(query))}", "content": query}]}
+
+
+def make_queries(n: int, distinct: int, rng: random.Random) -> List[str]:
+    base = [f"{c} meaning and fix" for c in CODES] + [f"how to fix {t}" for t in TOPICS]
+    base = [f"{q} {model}".strip() for model in MODELS for q in base][:distinct]
+    weights = [1 / (rank + 1) for rank in range(len(base))]
+    out = []
+    for q in rng.choices(base, weights, k=n):
+        if rng.random() < 0.3:
+            q = q.upper() if rng.random() < 0.5 else "  " + q.replace(" ", "  ")
+        out.append(q)
+    return out
+
+
+def run(cache, queries: List[str], threads: int, latency_s: float) -> dict:
+    stub = StubTavily(latency_s)
+    if cache is None:
+        client = stub
+    else:
+        cache_module.metrics = Registry()
+        tavily_module.get_search_cache = lambda: cache
+        client = CachedTavilyClient(stub)
+
+    def one(query: str) -> float:
+        t0 = time.perf_counter()
+        client.search(query=query, max_results=5, search_depth="advanced")
+        return (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = sorted(pool.map(one, queries))
+    return {
+        "calls": stub.calls,
+        "wall_s": time.perf_counter() - t0,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=150)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    queries = make_queries(args.requests, args.distinct, rng)
+    latency_s = args.latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tavily.sqlite3")
+        results = {"off": run(None, queries, args.threads, latency_s)}
+
+        cache = SearchCache(path=path)
+        results["cache"] = run(cache, queries, args.threads, latency_s)
+        cache.close()
+
+        cache = SearchCache(path=path)
+        results["restart"] = run(cache, queries, args.threads, latency_s)
+        cache.close()
+
+    print(f"{args.requests} searches ({args.distinct} distinct), {args.threads} threads, "
+          f"{args.latency_ms:g} ms per Tavily call")
+    print(f"{'cache':<9}{'Tavily calls':>13}{'wall s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:<9}{r['calls']:>13}{r['wall_s']:>9.1f}{r['p50']:>9.1f}{r['p99']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Per-worker memory cost of OBD_CODES across worker models.
+
+    python -m benchmarks.shared_data --workers 4
+
+Every scenario runs in a fresh master process that starts N workers the
+way the server would: spawned (uvicorn --workers) or forked after preloading
+(gunicorn --preload with app.preload). Each worker looks up every code and
+runs a GC pass, as a long-running worker eventually would. Memory is read
+while all workers are alive and compared with a control scenario that never
+loads OBD_CODES.
+
+RSS counts shared pages in full. PSS divides them between the processes that
+share them, so the sum of PSS is the real footprint. Private pages are never
+shared.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+SCENARIOS = {
+    # name: (start method, load OBD_CODES, shared table, preload + gc.freeze)
+    "spawn-control": ("spawn", False, False, False),
+    "spawn-dict": ("spawn", True, False, False),
+    "spawn-shared": ("spawn", True, True, False),
+    "fork-control": ("fork", False, False, True),
+    "fork-dict": ("fork", True, False, False),
+    "fork-dict-freeze": ("fork", True, False, True),
+    "fork-shared-freeze": ("fork", True, True, True),
+}
+
+
+def _memory_kb() -> Dict[str, int]:
+    fields = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in fields:
+                fields[name] = int(rest.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _base_imports() -> None:
+    # what every worker has loaded anyway, so only the data itself is measured
+    # (not app.data.*: importing the package loads OBD_CODES)
+    import mmap, struct, tempfile, zlib  # noqa: F401,E401
+    import app.config  # noqa: F401
+
+
+def _worker(load: bool, barrier, results) -> None:
+    _base_imports()
+    if load:
+        from app.data import OBD_CODES
+
+        sum(len(OBD_CODES[code]["description"]) for code in list(OBD_CODES))
+    gc.collect()  # after fork this dirties every tracked object page, unless frozen
+
+    barrier.wait()  # measure while every worker is alive
+    results.put(_memory_kb())
+    barrier.wait()
+
+
+def run_scenario(name: str, workers: int) -> List[Dict[str, int]]:
+    """
+    Master side; runs in a fresh interpreter per scenario.
+    """
+    start_method, load, shared, freeze = SCENARIOS[name]
+    os.environ["OBD_CODES_SHARED"] = "1" if shared else "0"
+
+    _base_imports()
+    if start_method == "fork" and load:
+        import app.data  # noqa: F401  (built once in the master)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    ctx = mp.get_context(start_method)
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(load, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args.workers)))
+        return
+
+    averages: Dict[str, Dict[str, int]] = {}
+    for name in SCENARIOS:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.shared_data",
+             "--scenario", name, "--workers", str(args.workers)],
+            capture_output=True, text=True, check=True,
+        )
+        rows = json.loads(proc.stdout.strip().splitlines()[-1])
+        averages[name] = {k: sum(r[k] for r in rows) // len(rows) for k in rows[0]}
+
+    print(f"{args.workers} workers; KiB per worker above the control of the same start method")
+    print(f"{'scenario':<22}{'RSS':>10}{'PSS':>10}{'private':>10}{'all workers PSS':>18}")
+    for name, avg in averages.items():
+        if name.endswith("control"):
+            continue
+        control = averages[f"{SCENARIOS[name][0]}-control"]
+        delta = {k: avg[k] - control[k] for k in avg}
+        print(f"{name:<22}{delta['rss']:>10,}{delta['pss']:>10,}{delta['private']:>10,}"
+              f"{delta['pss'] * args.workers:>18,}")
+
+
+if __name__ == "__main__":
+    main()
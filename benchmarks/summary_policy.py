@@ -0,0 +1,102 @@
+"""
+Summary LLM calls and prompt sizes: summarise every turn vs summary_policy.
+
+    python -m benchmarks.summary_policy --turns 40
+
+Replays a scripted diagnosis through vehicle_agent.finish_turns with a stub
+LLM and storage. The diagnosis is reworded from turn to turn, as the model
+does, and really changes a few times. "every turn" is the old behaviour
+(SummaryPolicy with every_n_turns=1).
+"""
+
+import argparse
+from typing import List
+
+from app.agent import summary_policy as policy_module
+from app.agent import vehicle_agent
+from app.agent.summary_policy import SummaryPolicy, estimate_tokens
+from app.agent.vehicle_agent import TurnContext, TurnOutcome, finish_turns
+from app.metrics import Registry
+
+DIAGNOSES = [
+    (0, "ASK", ["Possible worn brake pads", "Worn brake pads likely", "Brake pads possibly worn"]),
+    (12, "ASK", ["Warped brake rotor", "Brake rotor likely warped", "Possible warped brake rotor"]),
+    (25, "DIY", ["Warped front brake rotor", "Front brake rotor warped", "Front rotor warped"]),
+    (33, "CONFIRM_WORKSHOP", ["Warped front brake rotor", "Front brake rotor warped"]),
+]
+
+
+class StubLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.prompt_tokens: List[int] = []
+
+    def invoke(self, messages):
+        self.calls += 1
+        text = "\n".join(m.content for m in messages)
+        self.prompt_tokens.append(estimate_tokens(text))
+
+        class Reply:
+            # a summary that grows a little and then stays bounded
+            content = "Summary: " + " ".join(["brake noise when stopping"] * min(40, 4 + self.calls))
+        return Reply()
+
+
+def script(turns: int) -> List[tuple]:
+    out = []
+    for i in range(turns):
+        start, action, wordings = max(d for d in DIAGNOSES if d[0] <= i)
+        out.append((f"turn {i}: it still squeals, a bit worse when braking downhill", action,
+                    wordings[i % len(wordings)]))
+    return out
+
+
+def run(policy: SummaryPolicy, turns: int) -> dict:
+    llm = StubLLM()
+    vehicle_agent.get_llm = lambda: llm
+    vehicle_agent.upsert_chat_summary = lambda **_: None
+    vehicle_agent.upsert_issue_from_summary = lambda **_: None
+    vehicle_agent.summary_policy = policy
+    vehicle_agent.metrics = Registry()
+
+    ctx = TurnContext(None, None, "", [], "", None, [])
+    reply_context = []
+    previous = None
+    for user_input, action, diagnosis in script(turns):
+        parsed = {"diagnosis": diagnosis, "action": action, "severity": 0.6,
+                  "explanation": f"{diagnosis}. Check the pads and rotor surface for scoring."}
+        outcome = TurnOutcome(
+            parsed,
+            new_turn=f"User: {user_input}\nAgent: {parsed['explanation']}",
+            delta=policy_module.delta_line(user_input, parsed),
+            changed=policy_module.diagnosis_changed(previous, parsed),
+        )
+        previous = parsed
+        finish_turns(ctx, [outcome])
+        reply_context.append(estimate_tokens(ctx.chat_summary))
+
+    return {
+        "calls": llm.calls,
+        "prompt_tokens": sum(llm.prompt_tokens),
+        "reply_summary_tokens": sum(reply_context) / len(reply_context),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+
+    configured = policy_module.summary_policy
+    results = {
+        "every turn": run(SummaryPolicy(every_n_turns=1, delta_token_limit=10**9), args.turns),
+        "policy": run(configured, args.turns),
+    }
+    print(f"{args.turns} turns")
+    print(f"{'mode':<12}{'LLM calls':>11}{'summary prompt tokens':>23}{'avg summary in reply prompt':>29}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['calls']:>11}{r['prompt_tokens']:>23,}{r['reply_summary_tokens']:>29.0f}")
+
+
+if __name__ == "__main__":
+    main()
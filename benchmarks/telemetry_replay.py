@@ -0,0 +1,110 @@
+"""
+Telemetry throughput / latency benchmark driven by a recorded capture.
+
+    # synthesize a capture (or record one with `python tele.py --record ...`)
+    python -m benchmarks.telemetry_replay --generate 200000 --capture /tmp/fleet.obdcap
+
+    # max-speed throughput through the alert stage
+    python -m benchmarks.telemetry_replay --capture /tmp/fleet.obdcap --speed 0
+
+    # 50x real time, reports how late packets were delivered vs. schedule
+    python -m benchmarks.telemetry_replay --capture /tmp/fleet.obdcap --speed 50
+
+    # through the sharded pipeline
+    python -m benchmarks.telemetry_replay --capture /tmp/fleet.obdcap --speed 0 --workers 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.telemetry.alerts import AlertStage
+from app.telemetry.capture import CaptureWriter, iter_capture_frames, replay
+from app.telemetry.sharding import ShardedPipeline
+from benchmarks.telemetry_sharding import make_packets
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_frames(args) -> None:
+    # capture frames go to the workers as they are, nothing decoded here
+    pipeline = ShardedPipeline(workers=args.workers).start()
+    started = time.monotonic()
+    count = 0
+    for frame in iter_capture_frames(args.capture):
+        pipeline.submit_frame(frame)
+        count += 1
+    transitions = len(pipeline.poll_events(10**9)) + len(pipeline.close())
+    elapsed = time.monotonic() - started
+
+    print(f"packets      {count:,}")
+    print(f"elapsed      {elapsed:.2f}s  ({count / elapsed:,.0f} packets/s)")
+    print(f"transitions  {transitions:,}  ({transitions / max(count, 1):.4%} of packets)")
+
+
+async def run(args) -> None:
+    stage = None if args.workers else AlertStage()
+    pipeline = ShardedPipeline(workers=args.workers).start() if args.workers else None
+
+    lateness_ms = []
+    handle_us = []
+    transitions = 0
+    count = 0
+    first_ts = None
+
+    started = time.monotonic()
+    async for packet in replay(args.capture, speed=args.speed or None):
+        count += 1
+
+        if args.speed:
+            first_ts = first_ts if first_ts is not None else packet["ts"]
+            due = started + (packet["ts"] - first_ts) / args.speed
+            lateness_ms.append((time.monotonic() - due) * 1000)
+
+        t0 = time.perf_counter()
+        if pipeline:
+            pipeline.submit(packet)
+        else:
+            transitions += len(stage.process(packet["vehicle_id"], packet["decoded"], packet["ts"]))
+        handle_us.append((time.perf_counter() - t0) * 1e6)
+
+    if pipeline:
+        transitions += len(pipeline.poll_events(10**9)) + len(pipeline.close())
+    elapsed = time.monotonic() - started
+
+    print(f"packets      {count:,}")
+    print(f"elapsed      {elapsed:.2f}s  ({count / elapsed:,.0f} packets/s)")
+    print(f"transitions  {transitions:,}  ({transitions / max(count, 1):.4%} of packets)")
+    print(f"handle p50   {percentile(handle_us, 50):.1f}µs  p99 {percentile(handle_us, 99):.1f}µs")
+    if lateness_ms:
+        print(f"late   p50   {percentile(lateness_ms, 50):.2f}ms  p99 {percentile(lateness_ms, 99):.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capture", required=True)
+    parser.add_argument("--generate", type=int, help="write N synthetic packets first")
+    parser.add_argument("--vehicles", type=int, default=2_000)
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = max speed")
+    parser.add_argument("--workers", type=int, default=0, help="0 = single process")
+    args = parser.parse_args()
+
+    if args.generate:
+        with CaptureWriter(args.capture) as writer:
+            for packet in make_packets(args.generate, args.vehicles):
+                writer.write(packet)
+        print(f"wrote {args.generate:,} packets to {args.capture}")
+
+    if args.workers and not args.speed:
+        run_frames(args)
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Scaling benchmark for the sharded telemetry pipeline.
+
+Reports end-to-end packets/s (submit → decode → alert evaluation in the
+workers) for an increasing number of worker processes, once submitting
+packet dicts (the ingest process JSON-encodes each one) and once submitting
+pre-encoded frames as capture replay does (iter_capture_frames).
+
+    python -m benchmarks.telemetry_sharding --packets 400000 --vehicles 5000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from app.telemetry.frames import encode_packet
+from app.telemetry.sharding import ShardedPipeline
+
+
+def make_packets(n: int, vehicles: int, seed: int = 7):
+    rnd = random.Random(seed)
+    ids = [f"veh-{i:06d}" for i in range(vehicles)]
+    base = time.time()
+
+    for i in range(n):
+        yield {
+            "vehicle_id": ids[i % vehicles],
+            "pid": "01 05",
+            "ts": base + i * 0.001,
+            "decoded": {
+                "coolant_temp": rnd.uniform(80, 118),
+                "rpm": rnd.uniform(700, 6500),
+                "battery_voltage": rnd.uniform(11.5, 14.4),
+            },
+        }
+
+
+def run(workers: int, packets: list, batch_size: int, frames: bool) -> float:
+    pipeline = ShardedPipeline(workers=workers, batch_size=batch_size).start()
+    submit = pipeline.submit_frame if frames else pipeline.submit
+
+    started = time.perf_counter()
+    for packet in packets:
+        submit(packet)
+    pipeline.close()
+    elapsed = time.perf_counter() - started
+
+    assert sum(pipeline.stats.values()) == len(packets)
+    return len(packets) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packets", type=int, default=200_000)
+    parser.add_argument("--vehicles", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    packets = list(make_packets(args.packets, args.vehicles))
+    frames = [encode_packet(p) for p in packets]
+
+    counts = [1]
+    while counts[-1] * 2 <= args.max_workers:
+        counts.append(counts[-1] * 2)
+
+    print(f"{args.packets} packets, {args.vehicles} vehicles, batch={args.batch_size}")
+    print(f"{'workers':>8} {'dicts/s':>12} {'speedup':>8} {'frames/s':>12} {'speedup':>8}")
+
+    base_dicts = base_frames = None
+    for workers in counts:
+        dicts = run(workers, packets, args.batch_size, frames=False)
+        framed = run(workers, frames, args.batch_size, frames=True)
+        base_dicts = base_dicts or dicts
+        base_frames = base_frames or framed
+        print(f"{workers:>8} {dicts:>12,.0f} {dicts / base_dicts:>7.2f}x "
+              f"{framed:>12,.0f} {framed / base_frames:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Tool-calling turn latency: sequential vs parallel tools, deadline, cache.
+
+    python -m benchmarks.tool_loop --turns 20 --llm-ms 400
+
+Runs tool_loop.run_with_tools with a scripted stub model. Step 1 asks for
+a web search (`--search-ms`), a DTC decode and a workshop lookup
+(`--workshop-ms`) at once; step 2 asks for the same web search again plus
+a second DTC decode; step 3 answers. "sequential" runs the calls on a
+one-thread pool, like calling them in a loop. "hung search" makes the web
+search never return, to show the per-turn deadline.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage  # type: ignore
+from langchain_core.tools import StructuredTool  # type: ignore
+
+from app.agent import tool_loop
+from app.agent.tools.dtc_lookup import get_dtc_lookup_tool
+from app.metrics import Registry
+
+ANSWER = '{"diagnosis": "Cylinder 1 misfire", "action": "DIY", "confidence": 0.8}'
+
+
+class ScriptedLLM:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.calls = 0
+        self.answer_now = False
+
+    def bind_tools(self, tools, tool_choice=None):
+        # the loop binds tool_choice="none" only for its last step
+        self.answer_now = tool_choice == "none"
+        return self
+
+    def invoke(self, messages):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        if self.answer_now:
+            return AIMessage(content=ANSWER)
+        step = sum(isinstance(m, AIMessage) for m in messages)
+        if step == 0:
+            return AIMessage(content="", tool_calls=[
+                {"name": "tavily_search_results_json", "args": {"query": "P0301 swift"}, "id": "a"},
+                {"name": "lookup_dtc", "args": {"codes": ["P0301"]}, "id": "b"},
+                {"name": "find_nearby_workshops", "args": {}, "id": "c"},
+            ])
+        if step == 1:
+            return AIMessage(content="", tool_calls=[
+                {"name": "tavily_search_results_json", "args": {"query": "P0301 swift"}, "id": "d"},
+                {"name": "lookup_dtc", "args": {"codes": ["P0300"]}, "id": "e"},
+            ])
+        return AIMessage(content=ANSWER)
+
+
+# set at exit, so "hung" calls return and the pool threads can be joined
+release = threading.Event()
+
+
+def sleeping_tool(name: str, seconds: float, calls: List[int]):
+    def func(query: str = "") -> str:
+        calls[0] += 1
+        release.wait(seconds)
+        return f"{name} result"
+    return StructuredTool.from_function(func=func, name=name, description=name)
+
+
+def run(args, pool, search_s: float) -> dict:
+    tool_loop._pool = pool
+    tool_loop.metrics = Registry()
+    tool_calls = [0]
+    tools = [
+        sleeping_tool("tavily_search_results_json", search_s, tool_calls),
+        get_dtc_lookup_tool(),
+        sleeping_tool("find_nearby_workshops", args.workshop_ms / 1000, tool_calls),
+    ]
+    messages = [SystemMessage(content="system"), HumanMessage(content="P0301 on my swift")]
+
+    latencies = []
+    for _ in range(args.turns):
+        llm = ScriptedLLM(args.llm_ms / 1000)
+        t0 = time.perf_counter()
+        text = tool_loop.run_with_tools(llm, messages, tools, deadline_s=args.deadline_s)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert text == ANSWER, text
+    return {
+        "p50": statistics.median(latencies),
+        "max": max(latencies),
+        "slow_calls": tool_calls[0] / args.turns,
+        "llm_calls": llm.calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--search-ms", type=float, default=1200)
+    parser.add_argument("--workshop-ms", type=float, default=600)
+    parser.add_argument("--deadline-s", type=float, default=3)
+    args = parser.parse_args()
+
+    modes = {
+        "sequential": (ThreadPoolExecutor(1), args.search_ms / 1000),
+        "parallel": (ThreadPoolExecutor(8), args.search_ms / 1000),
+        "hung search": (ThreadPoolExecutor(64), 3600),
+    }
+    print(f"{args.turns} turns, model step {args.llm_ms:g} ms, search {args.search_ms:g} ms, "
+          f"workshops {args.workshop_ms:g} ms, deadline {args.deadline_s:g} s")
+    print(f"{'tools':<13}{'p50 ms':>9}{'max ms':>9}{'slow tool calls/turn':>22}{'model steps':>13}")
+    for name, (pool, search_s) in modes.items():
+        r = run(args, pool, search_s)
+        print(f"{name:<13}{r['p50']:>9.0f}{r['max']:>9.0f}{r['slow_calls']:>22.1f}{r['llm_calls']:>13}")
+        pool.shutdown(wait=False, cancel_futures=True)
+    release.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+-- Latest service of every (vehicle_id, service_type) for a user, computed
+-- in the database. Called by SupabaseBackend.latest_maintenance through
+-- PostgREST; the postgres backend runs the same DISTINCT ON inline.
+
+CREATE INDEX IF NOT EXISTS vehicle_maintenance_latest_idx
+    ON vehicle_maintenance (user_id, vehicle_id, service_type, service_date DESC, created_at DESC);
+
+CREATE OR REPLACE FUNCTION latest_maintenance(
+    p_user_id text,
+    p_vehicle_id uuid DEFAULT NULL,
+    p_status text DEFAULT NULL,
+    p_date_from date DEFAULT NULL,
+    p_date_to date DEFAULT NULL
+) RETURNS SETOF vehicle_maintenance
+LANGUAGE sql STABLE
+AS $$
+    SELECT DISTINCT ON (vehicle_id, service_type) *
+    FROM vehicle_maintenance
+    WHERE user_id = p_user_id
+      AND (p_vehicle_id IS NULL OR vehicle_id = p_vehicle_id)
+      AND (p_status IS NULL OR status = p_status)
+      AND (p_date_from IS NULL OR service_date >= p_date_from)
+      AND (p_date_to IS NULL OR service_date <= p_date_to)
+    ORDER BY vehicle_id, service_type, service_date DESC, created_at DESC
+$$;
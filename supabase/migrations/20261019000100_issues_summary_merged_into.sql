@@ -0,0 +1,5 @@
+-- Duplicate issues merged by app/jobs/dedupe_issues.py point at the issue
+-- they were merged into; retrieval leaves them out (merged_into IS NULL).
+
+ALTER TABLE issues_summary
+    ADD COLUMN IF NOT EXISTS merged_into bigint REFERENCES issues_summary (id) ON DELETE SET NULL;
@@ -0,0 +1,16 @@
+-- Progress of fleet batch jobs (app/services/fleet_batch.py), checkpointed
+-- by the worker running the job so any worker can serve its status.
+
+CREATE TABLE IF NOT EXISTS fleet_jobs (
+    id uuid PRIMARY KEY,
+    user_id text NOT NULL,
+    status text NOT NULL,
+    total integer NOT NULL,
+    counts jsonb NOT NULL DEFAULT '{}',
+    llm_calls integer NOT NULL DEFAULT 0,
+    saved integer NOT NULL DEFAULT 0,
+    results jsonb NOT NULL DEFAULT '[]',
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    finished_at timestamptz
+);
@@ -1,30 +1,51 @@
+import argparse
 import asyncio
 
-from app.obd.ws_listener import obd_stream
-from app.telemetry.processor import TelemetryProcessor
+from app.telemetry.alerts import AlertStage
+from app.telemetry.capture import record, replay
 
 
-async def run_test():
+alert_stage = AlertStage()
+
+
+def build_stream(args):
+    # Replay does not need a live OBD connection
+    if args.replay:
+        return replay(args.replay, speed=args.speed or None)
+
+    from app.obd.ws_listener import obd_stream
+
+    stream = obd_stream()
+    if args.record:
+        stream = record(stream, args.record)
+    return stream
+
+
+async def run_test(args):
     print("\n🚗 Starting OBD → Telemetry test...\n")
 
-    async for packet in obd_stream():
+    async for packet in build_stream(args):
         pid = packet["pid"]
         decoded = packet["decoded"]
 
         print(f"📡 OBD PID: {pid}")
         print(f"🔎 Decoded Data: {decoded}")
 
-        alerts = TelemetryProcessor.process(decoded)
-
-        if alerts:
-            print("🚨 ALERTS:")
-            for alert in alerts:
-                print(alert)
-        else:
-            print("✅ No alerts")
+        # Only state transitions (OPEN / ONGOING / CLEARED) leave the pipeline
+        events = alert_stage.process(
+            packet.get("vehicle_id") or "local", decoded, packet.get("ts")
+        )
+        for event in events:
+            print(f"🔔 {event['state']}: {event['rule']} ({event['value']})")
+        if not events:
+            print("✅ No alert changes")
 
         print("-" * 50)
 
 
 if __name__ == "__main__":
-    asyncio.run(run_test())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="append the live stream to this capture file")
+    parser.add_argument("--replay", help="replay a capture file instead of the live stream")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 = max")
+    asyncio.run(run_test(parser.parse_args()))
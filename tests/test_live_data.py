@@ -0,0 +1,51 @@
+import asyncio
+
+from app.agent.prompts import live_data_prompt
+from app.telemetry.alerts import AlertStage
+from app.telemetry.consumer import consume
+from app.telemetry.live_state import LiveStateCache
+
+# recorded long ago: a replayed capture
+OLD_TS = 1_600_000_000.0
+
+
+def _packets(vehicle_id, n, **decoded):
+    for i in range(n):
+        yield {"vehicle_id": vehicle_id, "pid": "01 05", "ts": OLD_TS + i, "decoded": dict(decoded)}
+
+
+async def _stream(packets):
+    for packet in packets:
+        yield packet
+
+
+def _feed(monkeypatch, packets):
+    cache = LiveStateCache()
+    monkeypatch.setattr(live_data_prompt, "live_state", cache)
+    count = asyncio.run(consume(_stream(packets), cache, AlertStage()))
+    return cache, count
+
+
+def test_replayed_packets_reach_the_prompt_block(monkeypatch):
+    packets = list(_packets("veh-1", 5, coolant_temp=118.0, rpm=2000.0))
+    packets.append({"vehicle_id": "veh-1", "pid": "03", "ts": OLD_TS + 9, "decoded": {"dtcs": ["p0301"]}})
+    cache, count = _feed(monkeypatch, packets)
+
+    assert count == 6
+    assert cache.get("veh-1") is not None  # old `ts`, but received just now
+
+    block = live_data_prompt.build_live_data_block("veh-1")
+    assert block.startswith("Live data:")
+    assert "DTC P0301" in block
+    assert "open alert engine_overheat: coolant_temp=118" in block
+    assert "readings: coolant_temp=118, rpm=2000" in block
+
+
+def test_other_and_stale_vehicles_get_no_block(monkeypatch):
+    cache, _ = _feed(monkeypatch, _packets("veh-1", 2, rpm=900.0))
+
+    assert live_data_prompt.build_live_data_block("veh-2") == ""
+    assert live_data_prompt.build_live_data_block(None) == ""
+
+    cache._states["veh-1"].updated_at -= cache.max_age_s + 1
+    assert live_data_prompt.build_live_data_block("veh-1") == ""
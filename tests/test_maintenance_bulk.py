@@ -0,0 +1,32 @@
+import asyncio
+
+from app.services import maintenance_bulk
+
+
+def _records(body: bytes, fmt="csv", chunk=7):
+    async def chunks():
+        for i in range(0, len(body), chunk):
+            yield body[i:i + chunk]
+
+    async def collect():
+        return [r async for r in maintenance_bulk._aiter_records(chunks(), fmt)]
+
+    return asyncio.run(collect())
+
+
+def test_quoted_newlines_stay_in_one_row():
+    rows = _records(b'vehicle_id,service_type,notes\n1,oil,"two\nlines"\n2,oil,ok\n')
+    assert [(n, r["notes"], e) for n, r, e in rows] == [(1, "two\nlines", None), (2, "ok", None)]
+
+
+def test_unterminated_quote_is_reported_at_end_of_stream():
+    rows = _records(b'vehicle_id,service_type,notes\n1,oil,"bad note\n2,oil,ok\n3,oil,ok\n')
+    assert rows == [(1, None, "unterminated quoted field")]
+
+
+def test_oversized_quoted_field_fails_its_row_and_resyncs(monkeypatch):
+    monkeypatch.setattr(maintenance_bulk, "MAX_CSV_RECORD_CHARS", 20)
+    rows = _records(b'vehicle_id,service_type,notes\n1,oil,"bad note\n2,oil,ok\n3,oil,ok\n4,oil,ok\n')
+
+    assert rows[0] == (1, None, "quoted field longer than 20 characters")
+    assert [(n, r["vehicle_id"]) for n, r, _ in rows[1:]] == [(2, "3"), (3, "4")]
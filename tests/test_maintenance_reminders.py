@@ -0,0 +1,221 @@
+import re
+from datetime import date, timedelta
+
+from app.models.maintenance import MaintenanceUpdate
+from app.services import maintenance_reminders, maintenance_service
+from app.services.maintenance_reminders import ReminderScheduler
+
+
+def _split(text):
+    # top-level commas of a PostgREST or= filter (not inside () or "")
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == '"' and text[i - 1] != "\\":
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _matches(row, clause):
+    if clause.startswith("and("):
+        return all(_matches(row, c) for c in _split(clause[4:-1]))
+    column, op, value = re.match(r"(\w+)\.(eq|gt|gte)\.(.*)", clause).groups()
+    if value.startswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    have = str(row[column])
+    return {"eq": have == value, "gt": have > value, "gte": have >= value}[op]
+
+
+class FakeQuery:
+    def __init__(self, table):
+        self.rows = list(table)
+        self.calls = []
+        self.ordering = []
+
+    def select(self, *_):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if str(r[column]) == str(value)]
+        return self
+
+    def gte(self, column, value):
+        self.rows = [r for r in self.rows if str(r[column]) >= value]
+        return self
+
+    def or_(self, text):
+        self.calls.append(text)
+        self.rows = [r for r in self.rows if any(_matches(r, c) for c in _split(text))]
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, n):
+        for column, desc in reversed(self.ordering):  # stable: last key first
+            self.rows.sort(key=lambda r: str(r[column]), reverse=desc)
+        self.rows = self.rows[:n]
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": self.rows})()
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, _):
+        query = FakeQuery(self.rows)
+        self.queries.append(query)
+        return query
+
+
+def _record(i, service_date="2026-01-01", due_in_days=30, service_type="oil_change"):
+    return {
+        "id": f"{i:05d}",
+        "user_id": "u1",
+        "vehicle_id": f"veh-{i}",
+        "service_type": service_type,
+        "service_date": service_date,
+        "next_due_date": (date.today() + timedelta(days=due_in_days)).isoformat(),
+    }
+
+
+def _scheduler(monkeypatch, rows, **kwargs):
+    fake = FakeSupabase(rows)
+    monkeypatch.setattr(maintenance_reminders, "supabase", fake)
+    scheduler = ReminderScheduler(**kwargs)
+    monkeypatch.setattr(ReminderScheduler, "running", property(lambda self: True))
+    return scheduler, fake
+
+
+def test_window_pages_by_keyset_and_pops_in_due_order(monkeypatch):
+    monkeypatch.setattr(maintenance_reminders, "PAGE_SIZE", 10)
+    rows = [_record(i, due_in_days=30 + i % 7) for i in range(35)]
+    scheduler, fake = _scheduler(monkeypatch, rows, max_items=1000)
+
+    assert scheduler.load_window() == 35
+    assert len(fake.queries) == 4  # 10 + 10 + 10 + 5
+    assert scheduler.loaded_until is None
+
+    batch = scheduler._pop_due(now=float("inf"))
+    dues = [r["next_due_date"] for r in batch]
+    assert dues == sorted(dues) and len(batch) == 35
+
+
+def test_older_service_never_replaces_a_newer_one(monkeypatch):
+    scheduler, _ = _scheduler(monkeypatch, [])
+    scheduler.schedule(_record(1, service_date="2026-03-01", due_in_days=60))
+    scheduler.schedule(_record(1, service_date="2026-01-01", due_in_days=20))
+    assert len(scheduler) == 1
+
+    (reminder,) = scheduler._pop_due(now=float("inf"))
+    assert reminder["service_date"] == "2026-03-01"
+
+
+def test_unschedule_falls_back_to_the_previous_service(monkeypatch):
+    previous = _record(1, service_date="2025-06-01", due_in_days=10)
+    scheduler, _ = _scheduler(monkeypatch, [previous])
+    latest = _record(1, service_date="2026-01-01", due_in_days=40)
+    scheduler.schedule(latest)
+
+    scheduler.unschedule(latest)
+    (reminder,) = scheduler._pop_due(now=float("inf"))
+    assert reminder["service_date"] == "2025-06-01"
+
+
+def test_drop_superseded_keeps_only_current_records(monkeypatch):
+    monkeypatch.setattr(maintenance_reminders, "SUPERSEDE_CHUNK", 2)
+    rows = [
+        _record(1, service_date="2026-01-01"),
+        _record(1, service_date="2026-02-01"),               # supersedes veh-1
+        _record(2, service_date="2026-01-01"),
+        _record(2, service_date="2025-01-01"),               # older: no effect
+        _record(3, service_date="2026-05-01", service_type="brake, pads"),
+        _record(3, service_date="2026-01-01"),
+        _record(4, service_date="2026-01-01", due_in_days=90),  # edited on another worker
+    ]
+    scheduler, fake = _scheduler(monkeypatch, rows)
+    batch = [
+        _record(1, service_date="2026-01-01"),
+        _record(2, service_date="2026-01-01"),
+        _record(3, service_date="2026-01-01", service_type="brake, pads"),
+        _record(4, service_date="2026-01-01"),
+        _record(5, service_date="2026-01-01"),                # deleted
+    ]
+
+    kept = scheduler._drop_superseded(batch)
+
+    assert [r["vehicle_id"] for r in kept] == ["veh-2"]
+    assert len(fake.queries) == 3  # 5 reminders in chunks of 2
+    assert [len(q.rows) for q in fake.queries] == [3, 2, 0]  # own and newer services only
+
+
+def test_only_the_lock_holder_runs(monkeypatch):
+    import asyncio
+
+    class Storage:
+        session_locks = True
+        attempts = 0
+        unlocked = None
+
+        def try_lock_job(self, name):
+            self.attempts += 1
+            return ("conn", name) if self.attempts == 3 else None
+
+        def unlock_job(self, handle):
+            self.unlocked = handle
+
+    storage = Storage()
+    monkeypatch.setattr(maintenance_reminders, "get_storage", lambda: storage)
+    monkeypatch.setattr(maintenance_reminders, "LEADER_RETRY_S", 0)
+    scheduler = ReminderScheduler()
+    seen = []
+
+    async def fake_run():
+        seen.append(scheduler._leader)
+
+    monkeypatch.setattr(scheduler, "_run", fake_run)
+    asyncio.run(scheduler.run())
+
+    assert storage.attempts == 3 and seen == [True]
+    assert storage.unlocked == ("conn", "maintenance_reminders") and not scheduler._leader
+
+    storage.session_locks = False
+    asyncio.run(scheduler.run())
+    assert seen == [True]  # no lock to elect a runner: never runs in the API
+
+
+def test_update_that_moves_the_service_date_earlier_replaces_the_reminder(monkeypatch):
+    rows = [_record(1, service_date="2026-03-01", due_in_days=60)]
+    scheduler, _ = _scheduler(monkeypatch, rows)
+    scheduler.schedule(rows[0])
+
+    class Storage:
+        def get_maintenance(self, user_id, maintenance_id):
+            return dict(rows[0])
+
+        def update_maintenance(self, user_id, maintenance_id, data):
+            rows[0] = {**rows[0], **data, "next_due_date": _record(1, due_in_days=20)["next_due_date"]}
+            return dict(rows[0])
+
+    monkeypatch.setattr(maintenance_service, "get_storage", lambda: Storage())
+    monkeypatch.setattr(maintenance_service, "reminder_scheduler", scheduler)
+
+    maintenance_service.update_maintenance_service(
+        "u1", rows[0]["id"], MaintenanceUpdate(service_date=date(2026, 1, 1))
+    )
+
+    (reminder,) = scheduler._pop_due(now=float("inf"))
+    assert reminder["service_date"] == "2026-01-01"
+    assert reminder["next_due_date"] == rows[0]["next_due_date"]